@@ -0,0 +1,435 @@
+"""
+End-to-end load benchmark
+
+Drives synthetic users through the real /start handler (deep links), the
+FSub "Try Again" callback and the broadcast engine against FakeClient, a
+local stand-in for Telegram with configurable latency and FloodWait
+injection. Runs on the in-memory database by default, so no network
+database skews the numbers.
+
+For each scenario it reports p50/p95/p99 latency, Telegram RPCs per request
+and database queries per request:
+
+    python benchmark.py --users 5000 --concurrency 200 --latency 40 --flood-rate 0.01
+    python benchmark.py --db sqlite:///bench.db --scenarios start,broadcast
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import math
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load benchmark for the /start flow")
+    parser.add_argument("--users", type=int, default=2000, help="synthetic users per scenario")
+    parser.add_argument("--concurrency", type=int, default=100, help="requests in flight at once")
+    parser.add_argument("--channels", type=int, default=20, help="channels with deep links")
+    parser.add_argument("--fsub", type=int, default=2, help="FSub channels every user must join")
+    parser.add_argument("--fsub-mode", choices=("off", "on"), default="off", help="FSub request mode")
+    parser.add_argument("--joined", type=float, default=0.8, help="share of /start users already in every FSub channel")
+    parser.add_argument("--request-links", type=float, default=0.5, help="share of deep links that are req_ links")
+    parser.add_argument("--latency", type=float, default=30, help="mean Telegram RPC latency (ms)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="latency varies by +/- this fraction")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="probability an RPC raises FloodWait")
+    parser.add_argument("--flood-wait", type=int, default=1, help="FloodWait value (seconds)")
+    parser.add_argument("--blocked", type=float, default=0.01, help="share of users who blocked the bot (broadcast)")
+    parser.add_argument("--broadcast-rate", type=float, default=1000, help="broadcast messages per second")
+    parser.add_argument("--scenarios", default="start,fsub_retry,broadcast")
+    parser.add_argument("--db", default="memory://", help="DB_URI to benchmark against")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="keep the handlers' log output")
+    return parser.parse_args()
+
+
+# The bot reads its configuration at import time
+args = parse_args()
+os.environ["DB_URI"] = args.db
+for key, value in (("APP_ID", "1"), ("API_HASH", "bench"), ("TG_BOT_TOKEN", "1:bench"),
+                   ("OWNER_ID", "1"), ("DATABASE_CHANNEL", "-1000000000001")):
+    os.environ.setdefault(key, value)
+
+from pyrogram.enums import ChatMemberStatus
+from pyrogram.errors import FloodWait, UserNotParticipant, UserIsBlocked
+
+from config import OWNER_ID, BROADCAST_BURST, BROADCAST_WORKERS, BROADCAST_MAX_RETRIES, SCHEDULER_FLUSH_INTERVAL
+from database import database
+from database.database import (
+    db, admin_registry, user_registrar, save_channel, save_encoded_link, save_encoded_link2, add_users
+)
+from broadcast import BroadcastEngine
+from scheduler import scheduler
+from invite_pool import invite_pool
+from plugins.fsub import fsub_member_updated
+from plugins.start import start_command
+from callback_router import router
+
+
+# ============================================
+# FAKE TELEGRAM
+# ============================================
+
+class FakeClient:
+    """Answers the RPCs used on the /start, FSub and broadcast paths.
+
+    Every call sleeps for the configured latency and raises FloodWait with
+    probability `flood_rate`. Calls are counted per method in `rpcs`.
+    """
+
+    def __init__(self, latency: float, jitter: float, flood_rate: float, flood_wait: int, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_rate = flood_rate
+        self.flood_wait = flood_wait
+        self.rpcs = Counter()
+        self.durations = defaultdict(list)  # method -> seconds per call
+        self.members = set()                # (chat_id, user_id)
+        self.blocked = set()
+        self.username = "BenchmarkBot"
+        self.uptime = datetime.now()
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+
+    async def rpc(self, method: str):
+        self.rpcs[method] += 1
+        started = time.perf_counter()
+        try:
+            if self.latency:
+                spread = self.latency * self.jitter
+                await asyncio.sleep(max(0.0, self._random.uniform(self.latency - spread, self.latency + spread)))
+            if self.flood_rate and self._random.random() < self.flood_rate:
+                self.rpcs["FloodWait"] += 1
+                raise FloodWait(value=self.flood_wait)
+        finally:
+            self.durations[method].append(time.perf_counter() - started)
+
+    def message(self, chat_id: int, text: str = None, from_user=None) -> "FakeMessage":
+        return FakeMessage(self, chat_id, next(self._ids), text, from_user)
+
+    async def get_me(self):
+        await self.rpc("get_me")
+        return SimpleNamespace(id=0, username=self.username)
+
+    async def get_users(self, user_id):
+        await self.rpc("get_users")
+        return SimpleNamespace(id=user_id, username="owner")
+
+    async def get_chat(self, chat_id):
+        await self.rpc("get_chat")
+        return SimpleNamespace(id=chat_id, title=f"Channel {abs(chat_id) % 10000}", username=None)
+
+    async def get_chat_member(self, chat_id, user_id):
+        await self.rpc("get_chat_member")
+        if (chat_id, user_id) not in self.members:
+            raise UserNotParticipant()
+        return SimpleNamespace(status=ChatMemberStatus.MEMBER)
+
+    async def create_chat_invite_link(self, chat_id, expire_date=None, creates_join_request=None, **kwargs):
+        await self.rpc("create_chat_invite_link")
+        return SimpleNamespace(invite_link=f"https://t.me/+bench{next(self._ids)}")
+
+    async def revoke_chat_invite_link(self, chat_id, invite_link):
+        await self.rpc("revoke_chat_invite_link")
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await self.rpc("send_message")
+        return self.message(chat_id, text)
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        await self.rpc("edit_message_text")
+
+    async def delete_messages(self, chat_id, message_ids):
+        await self.rpc("delete_messages")
+
+    async def pin_chat_message(self, chat_id, message_id, **kwargs):
+        await self.rpc("pin_chat_message")
+
+    async def get_messages(self, chat_id, message_id):
+        await self.rpc("get_messages")
+        return self.message(chat_id)
+
+
+class FakeMessage:
+    def __init__(self, client: FakeClient, chat_id: int, message_id: int, text: str = None, from_user=None):
+        self._client = client
+        self.id = message_id
+        self.chat = SimpleNamespace(id=chat_id)
+        self.text = text
+        self.from_user = from_user
+        self.reply_to_message = None
+        self.empty = False
+
+    async def reply_text(self, text, **kwargs):
+        await self._client.rpc("send_message")
+        return self._client.message(self.chat.id, text)
+
+    reply = reply_text
+
+    async def reply_photo(self, photo, **kwargs):
+        await self._client.rpc("send_photo")
+        return self._client.message(self.chat.id)
+
+    async def edit_text(self, text, **kwargs):
+        await self._client.rpc("edit_message_text")
+
+    async def edit_media(self, media, **kwargs):
+        await self._client.rpc("edit_message_media")
+
+    async def delete(self):
+        await self._client.rpc("delete_messages")
+
+    async def copy(self, chat_id, **kwargs):
+        await self._client.rpc("copy_message")
+        if chat_id in self._client.blocked:
+            raise UserIsBlocked()
+        return self._client.message(chat_id)
+
+
+class FakeCallbackQuery:
+    def __init__(self, client: FakeClient, data: str, from_user, message: FakeMessage):
+        self._client = client
+        self.data = data
+        self.from_user = from_user
+        self.message = message
+
+    async def answer(self, text: str = None, show_alert: bool = False):
+        await self._client.rpc("answer_callback_query")
+
+    async def edit_message_media(self, media, **kwargs):
+        await self._client.rpc("edit_message_media")
+
+
+def fake_user(user_id: int):
+    return SimpleNamespace(
+        id=user_id, first_name=f"User{user_id}", last_name=None, username=None,
+        mention=f'<a href="tg://user?id={user_id}">User{user_id}</a>'
+    )
+
+
+class CountingRepository:
+    """Wraps the active repository and counts calls per method"""
+
+    def __init__(self, inner):
+        self._inner = inner
+        self.queries = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self.queries[name] += 1
+            return attr(*args, **kwargs)
+        return call
+
+
+# ============================================
+# SCENARIOS
+# ============================================
+
+def percentile(ordered: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+class Benchmark:
+    def __init__(self, options):
+        self.options = options
+        self.random = random.Random(options.seed)
+        self.client = FakeClient(options.latency / 1000, options.jitter, options.flood_rate,
+                                 options.flood_wait, options.seed)
+        self.repo = CountingRepository(database.repo.inner)
+        self.normal_links = []   # deep-link start parameters
+        self.request_links = []
+        self.fsub_ids = []
+        self.next_user = itertools.count(1000)
+        self.results = []
+
+    async def setup(self):
+        database.set_repository(self.repo)
+        await database.init_database()
+        await admin_registry.start()
+        await db.load_ban_index()
+        for i in range(self.options.channels):
+            channel_id = -1001000000000 - i
+            await save_channel(channel_id)
+            self.normal_links.append(await save_encoded_link(channel_id))
+            self.request_links.append("req_" + await save_encoded_link2(channel_id, f"bench{i}"))
+        for i in range(self.options.fsub):
+            channel_id = -1002000000000 - i
+            await db.add_channel(channel_id)
+            await db.set_channel_mode(channel_id, self.options.fsub_mode)
+            self.fsub_ids.append(channel_id)
+        user_registrar.start()
+        await scheduler.start(self.client)
+        invite_pool.start(self.client)
+
+    async def teardown(self):
+        await invite_pool.stop()
+        await scheduler.stop()
+        await user_registrar.stop()
+        await admin_registry.stop()
+
+    def pick_link(self) -> str:
+        links = self.request_links if self.random.random() < self.options.request_links else self.normal_links
+        return self.random.choice(links)
+
+    def join(self, user_id: int):
+        for channel_id in self.fsub_ids:
+            self.client.members.add((channel_id, user_id))
+
+    async def run(self, name: str, requests: list, concurrency: int):
+        """Run `requests` (coroutine factories) with bounded concurrency and record the result"""
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def timed(request):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await request()
+                except Exception:
+                    # Pyrogram's dispatcher logs handler errors and carries on; so does the benchmark
+                    errors += 1
+                finally:
+                    latencies.append(time.perf_counter() - started)
+
+        self.client.rpcs.clear()
+        self.repo.queries.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(timed(request) for request in requests))
+        wall = time.perf_counter() - started
+        await self.settle()
+        self.record(name, len(requests), wall, latencies, errors)
+
+    async def settle(self):
+        """Let the write-behind user inserts and scheduler flushes land so they are counted"""
+        await user_registrar.flush()
+        await asyncio.sleep(SCHEDULER_FLUSH_INTERVAL)
+
+    def record(self, name: str, requests: int, wall: float, latencies: list, errors: int = 0):
+        self.results.append({
+            "name": name,
+            "requests": requests,
+            "errors": errors,
+            "wall": wall,
+            "latencies": sorted(latencies),
+            "rpcs": Counter(self.client.rpcs),
+            "queries": Counter(self.repo.queries),
+        })
+
+    async def scenario_start(self):
+        """/start with a deep link; a share of users still has to join the FSub channels"""
+        requests = []
+        for _ in range(self.options.users):
+            user_id = next(self.next_user)
+            if self.random.random() < self.options.joined:
+                self.join(user_id)
+            message = self.client.message(user_id, f"/start {self.pick_link()}", fake_user(user_id))
+            requests.append(lambda message=message: start_command(self.client, message))
+        await self.run("start", requests, self.options.concurrency)
+
+    async def scenario_fsub_retry(self):
+        """Users see the FSub panel, join every channel, then press Try Again"""
+        users = []
+        for _ in range(self.options.users):
+            user_id = next(self.next_user)
+            users.append((user_id, self.pick_link()))
+
+        # Panel first (not measured), then the join updates Telegram would deliver
+        for user_id, link in users:
+            await start_command(self.client, self.client.message(user_id, f"/start {link}", fake_user(user_id)))
+        for user_id, _ in users:
+            self.join(user_id)
+            for channel_id in self.fsub_ids:
+                await fsub_member_updated(self.client, SimpleNamespace(
+                    chat=SimpleNamespace(id=channel_id),
+                    old_chat_member=None,
+                    new_chat_member=SimpleNamespace(status=ChatMemberStatus.MEMBER, user=fake_user(user_id)),
+                ))
+
+        requests = [
+            lambda user_id=user_id, link=link: router.dispatch(self.client, FakeCallbackQuery(
+                self.client, f"retry:{link}", fake_user(user_id), self.client.message(user_id)
+            ))
+            for user_id, link in users
+        ]
+        await self.run("fsub_retry", requests, self.options.concurrency)
+
+    async def scenario_broadcast(self):
+        """One broadcast to the whole userbase"""
+        user_ids = [next(self.next_user) for _ in range(self.options.users)]
+        await add_users(user_ids)
+        self.client.blocked = set(self.random.sample(user_ids, int(len(user_ids) * self.options.blocked)))
+        engine = BroadcastEngine(
+            rate=self.options.broadcast_rate,
+            burst=max(BROADCAST_BURST, int(self.options.broadcast_rate)),
+            workers=BROADCAST_WORKERS,
+            max_retries=BROADCAST_MAX_RETRIES,
+            checkpoint_interval=1,
+        )
+        total = await database.count_users()
+
+        self.client.rpcs.clear()
+        self.client.durations["copy_message"] = []
+        self.repo.queries.clear()
+        started = time.perf_counter()
+        await engine.start(self.client, self.client.message(OWNER_ID), self.client.message(OWNER_ID), ["NORMAL"])
+        while engine.running:
+            await asyncio.sleep(0.05)
+        wall = time.perf_counter() - started
+        await self.settle()
+        # Per-recipient latency: one copy_message call, FloodWait sleeps not included
+        self.record("broadcast", total, wall, self.client.durations["copy_message"])
+
+    def report(self):
+        for result in self.results:
+            requests = max(result["requests"], 1)
+            latencies = [value * 1000 for value in result["latencies"]]
+            rpcs = result["rpcs"]
+            queries = result["queries"]
+            flood_waits = rpcs.pop("FloodWait", 0)
+            print(f"\n=== {result['name']} ({result['requests']} requests) ===")
+            print(f"  wall {result['wall']:.2f}s, {result['requests'] / result['wall']:.1f} req/s"
+                  f"  (handler errors: {result['errors']})")
+            print(
+                f"  latency ms: p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}  "
+                f"p99 {percentile(latencies, 99):.1f}  max {max(latencies, default=0):.1f}"
+            )
+            print(f"  RPCs/request: {sum(rpcs.values()) / requests:.2f}  (FloodWaits: {flood_waits})")
+            for method, count in rpcs.most_common():
+                print(f"    {method:28} {count / requests:.3f}")
+            print(f"  DB queries/request: {sum(queries.values()) / requests:.3f}")
+            for method, count in queries.most_common():
+                print(f"    {method:28} {count / requests:.3f}")
+
+
+async def main(options):
+    bench = Benchmark(options)
+    if not options.verbose:
+        # Handlers log through the queue listener to stderr; injected FloodWaits would flood the report
+        logging.disable(logging.CRITICAL)
+    await bench.setup()
+    try:
+        for name in options.scenarios.split(","):
+            await getattr(bench, f"scenario_{name.strip()}")()
+    finally:
+        await bench.teardown()
+    logging.disable(logging.NOTSET)
+    bench.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(args))
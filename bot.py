@@ -1,11 +1,20 @@
 # +++ Modified By [telegram username: @Codeflix_Bots
 import asyncio
 import sys
+import time
 from datetime import datetime
 from pyrogram import Client
+from pyrogram.errors import FloodWait
 from pyrogram.enums import ParseMode
-from config import API_HASH, APP_ID, LOGGER, TG_BOT_TOKEN, TG_BOT_WORKERS, PORT, OWNER_ID
+from config import API_HASH, APP_ID, LOGGER, TG_BOT_TOKEN, TG_BOT_WORKERS, PORT, OWNER_ID, DATABASE_CHANNEL, START_PIC, FORCE_PIC
 from plugins import web_server
+from database.database import init_database, count_rows, admin_registry, db, user_registrar
+from invite_pool import invite_pool
+from scheduler import scheduler
+from broadcast import broadcaster
+from media import media
+from stats import stats
+import metrics
 import pyrogram.utils
 from aiohttp import web
 
@@ -27,7 +36,28 @@ class Bot(Client):
         )
         self.LOGGER = LOGGER
 
+    async def invoke(self, query, *args, **kwargs):
+        # Every Telegram RPC passes through here; time it per raw method name
+        method = type(query).__name__
+        started = time.perf_counter()
+        try:
+            return await super().invoke(query, *args, **kwargs)
+        except FloodWait as e:
+            metrics.flood_waits.labels(method).inc()
+            metrics.flood_wait_seconds.inc(e.value)
+            raise
+        except Exception:
+            metrics.rpc_errors.labels(method).inc()
+            raise
+        finally:
+            metrics.rpc_latency.labels(method).observe(time.perf_counter() - started)
+
     async def start(self, *args, **kwargs):
+        # Tables, indexes and the admin list are ready before the first update is handled
+        await init_database()
+        await admin_registry.start()
+        await db.load_ban_index()
+        await media.load()
         await super().start()
         usr_bot_me = await self.get_me()
         self.uptime = datetime.now()
@@ -46,6 +76,13 @@ class Bot(Client):
         self.LOGGER(__name__).info("Bot Running..!\n\nCreated by \nhttps://t.me/ProObito")
         self.LOGGER(__name__).info(f"{name}")
         self.username = usr_bot_me.username
+        stats.start(count_rows)
+        user_registrar.start()
+        await scheduler.start(self)
+        invite_pool.start(self)
+        await broadcaster.resume(self)
+        # Resolve the main pictures to file_ids in the background; the rest resolve on first use
+        self._media_warmup = asyncio.create_task(media.warm(self, DATABASE_CHANNEL, [START_PIC, FORCE_PIC]))
 
         # Web-response
         try:
@@ -58,12 +95,14 @@ class Bot(Client):
             self.LOGGER(__name__).error(f"Failed to start web server: {e}")
 
     async def stop(self, *args):
+        await broadcaster.stop()
+        await invite_pool.stop()
+        await scheduler.stop()
+        await stats.stop()
+        await user_registrar.stop()
+        await admin_registry.stop()
         await super().stop()
         self.LOGGER(__name__).info("Bot stopped.")
 
-# Global cancel flag for broadcast
-is_canceled = False
-cancel_lock = asyncio.Lock()
-
 if __name__ == "__main__":
     Bot().run()
@@ -0,0 +1,354 @@
+"""
+Broadcast engine
+
+Sends a message to the whole userbase from a pool of workers sharing one
+token-bucket rate limiter. A FloodWait only pauses the worker that hit it.
+Progress is checkpointed to the broadcasts table, so a broadcast interrupted
+by a crash or restart resumes after the last acknowledged user.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+from pyrogram.errors import FloodWait, UserIsBlocked, InputUserDeactivated
+
+from config import (
+    BROADCAST_RATE, BROADCAST_BURST, BROADCAST_WORKERS,
+    BROADCAST_MAX_RETRIES, BROADCAST_CHECKPOINT_INTERVAL
+)
+from database.database import iter_userbase, count_users, del_user, save_broadcast, get_broadcasts, delete_broadcast
+from scheduler import scheduler
+from metrics import broadcast_deliveries
+from logs import get_logger
+
+log = get_logger(__name__)
+
+RESULTS = ("successful", "blocked", "deleted", "unsuccessful")
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, at most `capacity` banked."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _Delivery:
+    __slots__ = ("user_id", "result")
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.result = None
+
+
+class BroadcastJob:
+    """State of one broadcast; `as_state()` is what gets checkpointed."""
+
+    def __init__(self, broadcast_id: str, state: dict):
+        self.broadcast_id = broadcast_id
+        self.from_chat_id = state["from_chat_id"]
+        self.message_id = state["message_id"]
+        self.status_chat_id = state["status_chat_id"]
+        self.status_message_id = state["status_message_id"]
+        self.mode_text = state["mode_text"]
+        self.pin = state.get("pin", False)
+        self.delete_after = state.get("delete_after", 0)
+        self.silent = state.get("silent", False)
+        self.total = state.get("total", 0)
+        # Every user id <= acked_upto has been delivered (or given up on)
+        self.acked_upto = state.get("acked_upto", 0)
+        self.counts = {name: state.get("counts", {}).get(name, 0) for name in RESULTS}
+
+    @property
+    def mode(self) -> str:
+        return " + ".join(self.mode_text)
+
+    @property
+    def processed(self) -> int:
+        return sum(self.counts.values())
+
+    def as_state(self) -> dict:
+        return {
+            "from_chat_id": self.from_chat_id,
+            "message_id": self.message_id,
+            "status_chat_id": self.status_chat_id,
+            "status_message_id": self.status_message_id,
+            "mode_text": self.mode_text,
+            "pin": self.pin,
+            "delete_after": self.delete_after,
+            "silent": self.silent,
+            "total": self.total,
+            "acked_upto": self.acked_upto,
+            "counts": self.counts,
+        }
+
+
+def _progress_bar(percent: float, length: int = 20) -> str:
+    blocks = int(percent * length)
+    return "●" * blocks + "○" * (length - blocks)
+
+
+def _counts_text(job: BroadcastJob) -> str:
+    return f"""<b>›› Total Users: <code>{job.total}</code>
+›› Successful: <code>{job.counts['successful']}</code>
+›› Blocked: <code>{job.counts['blocked']}</code>
+›› Deleted: <code>{job.counts['deleted']}</code>
+›› Unsuccessful: <code>{job.counts['unsuccessful']}</code></b>"""
+
+
+def _progress_text(job: BroadcastJob, percent: float) -> str:
+    return f"""<b>›› BROADCAST ({job.mode}) IN PROGRESS...
+
+<blockquote>⏳:</b> [{_progress_bar(percent)}] <code>{percent:.0%}</code></blockquote>
+
+{_counts_text(job)}
+
+<i>➪ To stop broadcasting click: <b>/cancel</b></i>"""
+
+
+def _failed_text(job: BroadcastJob, percent: float) -> str:
+    return f"""<b>›› BROADCAST ({job.mode}) INTERRUPTED ⚠️
+
+<blockquote>Sᴛᴏᴘᴘᴇᴅ ᴀᴛ:</b> [{_progress_bar(percent)}] {percent:.0%}</blockquote>
+
+{_counts_text(job)}
+
+<i>➪ Progress is saved; the broadcast resumes on the next restart.</i>"""
+
+
+def _final_text(job: BroadcastJob, percent: float) -> str:
+    return f"""<b>›› BROADCAST ({job.mode}) COMPLETED ✅
+
+<blockquote>Dᴏɴᴇ:</b> [{_progress_bar(percent)}] {percent:.0%}</blockquote>
+
+{_counts_text(job)}"""
+
+
+class BroadcastEngine:
+    """Runs one broadcast at a time.
+
+    A producer streams user ids in ascending order to `workers` senders. Each
+    send takes a token from the shared bucket first; a FloodWait puts only
+    that worker to sleep before it retries the same user (up to
+    `max_retries` times). Finished deliveries advance a watermark over the
+    in-order window, and the watermark plus counters are saved every
+    `checkpoint_interval` seconds.
+    """
+
+    def __init__(self, rate: float, burst: int, workers: int, max_retries: int, checkpoint_interval: float):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.checkpoint_interval = checkpoint_interval
+        self.bucket = TokenBucket(rate, burst)
+        self._job = None
+        self._task = None
+        self._starting = False  # reserved by start() until the job is launched
+        self._cancel = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, client, broadcast_msg, status_msg, mode_text: list,
+                    pin: bool = False, delete_after: int = 0, silent: bool = False) -> bool:
+        """Start a new broadcast; returns False if one is already running or starting"""
+        if self._starting or self.running:
+            return False
+        # Reserve the engine before the first await so a concurrent start() backs off
+        self._starting = True
+        try:
+            job = BroadcastJob(f"{status_msg.chat.id}:{status_msg.id}", {
+                "from_chat_id": broadcast_msg.chat.id,
+                "message_id": broadcast_msg.id,
+                "status_chat_id": status_msg.chat.id,
+                "status_message_id": status_msg.id,
+                "mode_text": mode_text,
+                "pin": pin,
+                "delete_after": delete_after,
+                "silent": silent,
+                "total": await count_users(),
+            })
+            await save_broadcast(job.broadcast_id, job.as_state())
+            self._launch(client, job, broadcast_msg)
+        finally:
+            self._starting = False
+        return True
+
+    async def resume(self, client):
+        """Pick up a broadcast interrupted by a restart, if any"""
+        if self._starting or self.running:
+            return
+        for broadcast_id, state in await get_broadcasts():
+            job = BroadcastJob(broadcast_id, state)
+            try:
+                broadcast_msg = await client.get_messages(job.from_chat_id, job.message_id)
+            except Exception as e:
+                broadcast_msg = None
+                log.warning("Could not load broadcast message", broadcast_id=broadcast_id, error=e)
+            if broadcast_msg is None or broadcast_msg.empty:
+                await delete_broadcast(broadcast_id)
+                continue
+            log.info("Resuming broadcast", broadcast_id=broadcast_id, acked_upto=job.acked_upto)
+            self._launch(client, job, broadcast_msg)
+            return
+
+    def cancel(self) -> bool:
+        if not self.running:
+            return False
+        self._cancel.set()
+        return True
+
+    async def stop(self):
+        """Stop without dropping the checkpoint, so the broadcast resumes on next start"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _launch(self, client, job: BroadcastJob, broadcast_msg):
+        self._job = job
+        self._cancel.clear()
+        self._task = asyncio.create_task(self._run(client, job, broadcast_msg))
+
+    async def _run(self, client, job: BroadcastJob, broadcast_msg):
+        window = deque()  # _Delivery in dispatch order
+        queue = asyncio.Queue(maxsize=self.workers * 2)
+
+        def advance():
+            while window and window[0].result is not None:
+                delivery = window.popleft()
+                job.counts[delivery.result] += 1
+                job.acked_upto = delivery.user_id
+
+        async def worker():
+            while True:
+                delivery = await queue.get()
+                if delivery is None:
+                    return
+                if self._cancel.is_set():
+                    continue
+                delivery.result = await self._deliver(client, job, broadcast_msg, delivery.user_id)
+                broadcast_deliveries.labels(delivery.result).inc()
+                advance()
+
+        async def reporter():
+            last_percent = -1.0
+            while True:
+                await asyncio.sleep(self.checkpoint_interval)
+                await save_broadcast(job.broadcast_id, job.as_state())
+                percent = min(job.processed / job.total, 1.0) if job.total else 1.0
+                if percent - last_percent >= 0.05:
+                    await self._edit_status(client, job, _progress_text(job, percent))
+                    last_percent = percent
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        progress = asyncio.create_task(reporter())
+        try:
+            async for user_id in iter_userbase(after=job.acked_upto):
+                if self._cancel.is_set():
+                    break
+                delivery = _Delivery(user_id)
+                window.append(delivery)
+                await queue.put(delivery)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            for task in workers:
+                task.cancel()
+            # Keep the last acknowledged position for resume()
+            await save_broadcast(job.broadcast_id, job.as_state())
+            raise
+        except Exception:
+            # The userbase stream failed: keep the checkpoint instead of reporting completion
+            for task in workers:
+                task.cancel()
+            await save_broadcast(job.broadcast_id, job.as_state())
+            log.exception("Broadcast interrupted", broadcast_id=job.broadcast_id, acked_upto=job.acked_upto)
+            percent = min(job.processed / job.total, 1.0) if job.total else 0.0
+            await self._edit_status(client, job, _failed_text(job, percent))
+            self._job = None
+            return
+        finally:
+            progress.cancel()
+
+        # Users who joined during the broadcast were streamed too
+        job.total = max(job.total, job.processed)
+        await delete_broadcast(job.broadcast_id)
+        if self._cancel.is_set():
+            await self._edit_status(client, job, f"›› BROADCAST ({job.mode}) CANCELED ❌")
+        else:
+            await self._edit_status(client, job, _final_text(job, 1.0))
+        self._job = None
+
+    async def _deliver(self, client, job: BroadcastJob, broadcast_msg, chat_id: int) -> str:
+        for _ in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                sent_msg = await broadcast_msg.copy(chat_id, disable_notification=job.silent)
+            except FloodWait as e:
+                # Only this worker waits; the others keep draining the queue
+                await asyncio.sleep(e.value)
+                continue
+            except UserIsBlocked:
+                await del_user(chat_id)
+                return "blocked"
+            except InputUserDeactivated:
+                await del_user(chat_id)
+                return "deleted"
+            except Exception:
+                await del_user(chat_id)
+                return "unsuccessful"
+
+            if job.pin:
+                await self._pin(client, chat_id, sent_msg.id)
+            if job.delete_after:
+                scheduler.delete_message_later(chat_id, sent_msg.id, job.delete_after)
+            return "successful"
+        return "unsuccessful"
+
+    async def _pin(self, client, chat_id: int, message_id: int):
+        for _ in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                await client.pin_chat_message(chat_id, message_id, both_sides=True)
+                return
+            except FloodWait as e:
+                await asyncio.sleep(e.value)
+            except Exception:
+                return
+
+    async def _edit_status(self, client, job: BroadcastJob, text: str):
+        try:
+            await client.edit_message_text(job.status_chat_id, job.status_message_id, text)
+        except Exception as e:
+            log.warning("Failed to update broadcast status", broadcast_id=job.broadcast_id, error=e)
+
+
+broadcaster = BroadcastEngine(
+    rate=BROADCAST_RATE,
+    burst=BROADCAST_BURST,
+    workers=BROADCAST_WORKERS,
+    max_retries=BROADCAST_MAX_RETRIES,
+    checkpoint_interval=BROADCAST_CHECKPOINT_INTERVAL,
+)
@@ -0,0 +1,108 @@
+"""
+In-memory caches shared by the plugins and the database adapter
+"""
+
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a TTL.
+
+    `ttl` is the default lifetime in seconds; `set()` can override it per entry.
+    Hit/miss counters are kept so callers can report how well the cache works.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def peek(self, key, default=None):
+        """Like get() but without touching the LRU order or the hit/miss counters"""
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            return default
+        return item[1]
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        item = self._data.get(key)
+        return item is not None and item[0] > time.monotonic()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class KeyedLocks:
+    """One asyncio.Lock per key, kept only while it is in use.
+
+    Locks are held in a WeakValueDictionary, so a key's lock disappears once
+    no coroutine holds or waits on it and the map never grows past the number
+    of keys currently being worked on. Use as `async with locks[key]:`.
+    A hit means the lock already existed, i.e. the key was contended.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._locks = weakref.WeakValueDictionary()
+
+    def __getitem__(self, key) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+            self.misses += 1
+        else:
+            self.hits += 1
+        return lock
+
+    def __len__(self):
+        return len(self._locks)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._locks),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
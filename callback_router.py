@@ -0,0 +1,139 @@
+"""
+Callback query router
+
+Every callback query enters through one handler (plugins/cbb.py) and is
+dispatched to exactly one route. Callback data is "prefix" or "prefix:args";
+the prefix is a dict lookup and the handler receives `args` as a string.
+Buttons sent before the prefix namespace existed ("rfs_ch_123",
+"fsub_retry_xyz", ...) are resolved by longest match in a trie of legacy
+prefixes. Routes belong to named groups and time every call.
+"""
+
+import time
+from typing import Optional
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+class Route:
+    __slots__ = ("prefix", "group", "handler", "calls", "errors", "total_time", "max_time")
+
+    def __init__(self, prefix: str, group: str, handler):
+        self.prefix = prefix
+        self.group = group
+        self.handler = handler
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+
+class RouteGroup:
+    """Registers routes under one group name (e.g. "nav", "fsub", "pages")"""
+
+    def __init__(self, router: "CallbackRouter", name: str):
+        self.router = router
+        self.name = name
+
+    def route(self, prefix: str, legacy: Optional[str] = None, legacy_sep: Optional[str] = None):
+        """Decorator for `async def handler(client, query, args)`.
+
+        `legacy` is the old callback data this route replaces: a prefix if it
+        ends with "_", otherwise an exact value. The rest of a legacy prefix
+        match becomes `args`, with `legacy_sep` turned into ":".
+        """
+        def decorator(handler):
+            self.router.add(prefix, self.name, handler)
+            if legacy:
+                self.router.alias(legacy, prefix, legacy_sep)
+            return handler
+        return decorator
+
+
+class CallbackRouter:
+    def __init__(self):
+        self._routes = {}  # prefix -> Route
+        self._legacy = {}  # trie: char -> node; node[None] = (prefix, exact, sep)
+        self.unrouted = 0
+
+    def group(self, name: str) -> RouteGroup:
+        return RouteGroup(self, name)
+
+    def add(self, prefix: str, group: str, handler):
+        if ":" in prefix:
+            raise ValueError(f"Callback prefix may not contain ':': {prefix!r}")
+        if prefix in self._routes:
+            raise ValueError(f"Callback prefix already routed: {prefix!r}")
+        self._routes[prefix] = Route(prefix, group, handler)
+
+    def alias(self, legacy: str, prefix: str, sep: Optional[str] = None):
+        node = self._legacy
+        for char in legacy:
+            node = node.setdefault(char, {})
+        node[None] = (prefix, not legacy.endswith("_"), sep)
+
+    def resolve(self, data: str):
+        """(Route, args) for callback data, or (None, None)"""
+        prefix, _, args = data.partition(":")
+        route = self._routes.get(prefix)
+        if route is not None:
+            return route, args
+
+        # Legacy data: longest registered prefix wins
+        match = None
+        node = self._legacy
+        for position, char in enumerate(data):
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                match = (node[None], position + 1)
+
+        if match is None:
+            return None, None
+        (prefix, exact, sep), end = match
+        if exact and end != len(data):
+            return None, None
+        args = data[end:]
+        if sep:
+            args = args.replace(sep, ":")
+        return self._routes.get(prefix), args
+
+    async def dispatch(self, client, query):
+        data = query.data or ""
+        route, args = self.resolve(data)
+        if route is None:
+            self.unrouted += 1
+            log.warning("No callback route", data=data)
+            return await query.answer()
+
+        started = time.perf_counter()
+        try:
+            return await route.handler(client, query, args)
+        except Exception:
+            route.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            route.calls += 1
+            route.total_time += elapsed
+            if elapsed > route.max_time:
+                route.max_time = elapsed
+
+    def timings(self) -> dict:
+        """Per-route calls, errors and latency, busiest first"""
+        routes = sorted(self._routes.values(), key=lambda route: route.calls, reverse=True)
+        return {
+            route.prefix: {
+                "group": route.group,
+                "calls": route.calls,
+                "errors": route.errors,
+                "avg_ms": route.total_time / route.calls * 1000 if route.calls else 0.0,
+                "max_ms": route.max_time * 1000,
+            }
+            for route in routes
+        }
+
+
+router = CallbackRouter()
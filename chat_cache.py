@@ -0,0 +1,94 @@
+"""
+Shared chat metadata (get_chat) cache
+
+Every plugin asks this cache instead of calling client.get_chat directly.
+Concurrent misses for the same chat share one RPC, fresh entries are served
+from memory, and stale ones are served immediately while a single background
+refresh replaces them.
+"""
+
+import asyncio
+import time
+
+from cache import TTLCache
+from stats import stats
+from config import CHAT_CACHE_TTL, CHAT_CACHE_STALE_TTL, CHAT_CACHE_SIZE
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+class ChatCache:
+    """get_chat results keyed by chat ID.
+
+    An entry is fresh for `ttl` seconds. For a further `stale_ttl` seconds it
+    is still returned, but the first lookup starts a background refresh. Only
+    one get_chat per chat is ever in flight; every other caller awaits it.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, maxsize: int):
+        self.ttl = ttl
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl + stale_ttl)  # chat_id -> (fetched_at, chat)
+        self._inflight = {}  # chat_id -> Task
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def get(self, client, chat_id, fresh: bool = False):
+        """Chat metadata for `chat_id`; `fresh=True` bypasses the cache (e.g. permission checks)"""
+        entry = None if fresh else self._entries.get(chat_id)
+        if entry is not None:
+            fetched_at, chat = entry
+            if time.monotonic() - fetched_at >= self.ttl:
+                self.stale_hits += 1
+                self._fetch(client, chat_id)
+            return chat
+
+        # shield: a caller that is cancelled (e.g. the FSub timeout) must not cancel the shared fetch
+        return await asyncio.shield(self._fetch(client, chat_id))
+
+    def peek(self, chat_id):
+        """Cached chat (fresh or stale) without any I/O, or None"""
+        entry = self._entries.peek(chat_id)
+        return entry[1] if entry else None
+
+    def invalidate(self, chat_id):
+        self._entries.pop(chat_id)
+
+    def stats(self) -> dict:
+        return {
+            **self._entries.stats(),
+            "stale_hits": self.stale_hits,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "inflight": len(self._inflight),
+        }
+
+    def _fetch(self, client, chat_id) -> asyncio.Task:
+        task = self._inflight.get(chat_id)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        task = asyncio.create_task(self._load(client, chat_id))
+        self._inflight[chat_id] = task
+        task.add_done_callback(lambda done: self._finished(chat_id, done))
+        return task
+
+    def _finished(self, chat_id, task: asyncio.Task):
+        self._inflight.pop(chat_id, None)
+        if not task.cancelled():
+            task.exception()  # background refreshes have no awaiter; mark the error as seen
+
+    async def _load(self, client, chat_id):
+        try:
+            chat = await client.get_chat(chat_id)
+        except Exception as e:
+            self.errors += 1
+            log.error("Error getting chat info", chat_id=chat_id, error=e)
+            raise
+        self._entries.set(chat_id, (time.monotonic(), chat))
+        return chat
+
+
+chat_cache = ChatCache(ttl=CHAT_CACHE_TTL, stale_ttl=CHAT_CACHE_STALE_TTL, maxsize=CHAT_CACHE_SIZE)
+stats.track_cache("chats", chat_cache)
@@ -2,7 +2,7 @@ import os
 from os import environ
 import logging
 import re  # ← ADD THIS
-from logging.handlers import RotatingFileHandler
+from logs import setup_logging, parse_levels
 
 # Add after imports
 id_pattern = re.compile(r'^-?\d+$')  # ← ADD THIS
@@ -19,6 +19,16 @@ PORT = os.environ.get("PORT", "8080")
 # Database
 DB_URI = os.environ.get("DB_URI", "")
 DB_NAME = os.environ.get("DB_NAME", "link")
+CHANNEL_CACHE_TTL = int(os.environ.get("CHANNEL_CACHE_TTL", "120"))  # seconds a cached channel row stays valid
+CHANNEL_CACHE_SIZE = int(os.environ.get("CHANNEL_CACHE_SIZE", "5000"))
+USERBASE_BATCH_SIZE = int(os.environ.get("USERBASE_BATCH_SIZE", "1000"))  # user IDs fetched per round trip when streaming
+STATS_RECONCILE_INTERVAL = int(os.environ.get("STATS_RECONCILE_INTERVAL", "600"))  # seconds between /status recounts
+ADMIN_REFRESH_INTERVAL = int(os.environ.get("ADMIN_REFRESH_INTERVAL", "300"))  # seconds between admin list reloads
+BAN_BLOOM_THRESHOLD = int(os.environ.get("BAN_BLOOM_THRESHOLD", "100000"))  # bans above this use a Bloom filter instead of a set
+BAN_BLOOM_ERROR_RATE = float(os.environ.get("BAN_BLOOM_ERROR_RATE", "0.01"))  # false positive rate (confirmed in the DB)
+USER_FLUSH_INTERVAL = int(os.environ.get("USER_FLUSH_INTERVAL", "500"))  # ms between bulk user inserts
+USER_FLUSH_BATCH = int(os.environ.get("USER_FLUSH_BATCH", "500"))  # flush early once this many new users are queued
+USER_SEEN_SIZE = int(os.environ.get("USER_SEEN_SIZE", "200000"))  # user IDs remembered as already persisted
 
 #Auto approve 
 CHAT_ID = [int(app_chat_id) if id_pattern.search(app_chat_id) else app_chat_id for app_chat_id in environ.get('CHAT_ID', '').split()] # dont change anything 
@@ -27,6 +37,15 @@ APPROVED = environ.get("APPROVED_WELCOME", "on").lower()
 
 # Default
 TG_BOT_WORKERS = int(os.environ.get("TG_BOT_WORKERS", "40"))
+
+# PostgreSQL connection pool (sized for TG_BOT_WORKERS concurrent handlers)
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "5"))  # connections opened and prewarmed at startup
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", str(TG_BOT_WORKERS)))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "256"))  # prepared statements kept per connection
+DB_ACQUIRE_TIMEOUT = float(os.environ.get("DB_ACQUIRE_TIMEOUT", "10"))  # seconds to wait for a free connection
+DB_COMMAND_TIMEOUT = float(os.environ.get("DB_COMMAND_TIMEOUT", "60"))
+DB_CONN_LIFETIME = float(os.environ.get("DB_CONN_LIFETIME", "300"))  # idle seconds before a connection above min_size is closed
+DB_MAX_QUERIES = int(os.environ.get("DB_MAX_QUERIES", "50000"))  # queries before a connection is recycled
 #--- ---- ---- --- --- --- - -- -  - - - - - - - - - - - --  - -
 
 # Start pic
@@ -61,6 +80,40 @@ USER_REPLY_TEXT = "⚠️ ʙᴀᴋᴀ!!, ʏᴏᴜ ᴀʀᴇ ɴᴏᴛ ᴍʏ ᴍᴀ
 
 # Force sub link expiry (in seconds)
 FSUB_LINK_EXPIRY = int(os.environ.get("FSUB_LINK_EXPIRY", "300"))  # 5 minutes default
+FSUB_PANEL_CACHE_SIZE = int(os.environ.get("FSUB_PANEL_CACHE_SIZE", "1000"))  # memoized join keyboards
+
+# Force sub membership checks
+FSUB_CHECK_CONCURRENCY = int(os.environ.get("FSUB_CHECK_CONCURRENCY", "20"))  # max get_chat_member RPCs in flight (all users)
+FSUB_CHECK_TIMEOUT = float(os.environ.get("FSUB_CHECK_TIMEOUT", "8"))  # per /start deadline in seconds
+FSUB_MEMBER_CACHE_TTL = int(os.environ.get("FSUB_MEMBER_CACHE_TTL", "600"))  # cache "joined" results (seconds)
+FSUB_MEMBER_NEG_CACHE_TTL = int(os.environ.get("FSUB_MEMBER_NEG_CACHE_TTL", "20"))  # cache "not joined" results (seconds)
+FSUB_MEMBER_CACHE_SIZE = int(os.environ.get("FSUB_MEMBER_CACHE_SIZE", "100000"))
+
+# Chat metadata (get_chat) cache
+CHAT_CACHE_TTL = int(os.environ.get("CHAT_CACHE_TTL", "300"))  # seconds a chat is served without a refresh
+CHAT_CACHE_STALE_TTL = int(os.environ.get("CHAT_CACHE_STALE_TTL", "3600"))  # after that, served stale while refreshing in the background
+CHAT_CACHE_SIZE = int(os.environ.get("CHAT_CACHE_SIZE", "2000"))
+
+# Temporary (anti-spam) bans kept in memory; each entry expires with its ban
+TEMP_BAN_CACHE_SIZE = int(os.environ.get("TEMP_BAN_CACHE_SIZE", "10000"))
+
+# Pre-minted invite link pool (per hot channel and link type)
+INVITE_POOL_SIZE = int(os.environ.get("INVITE_POOL_SIZE", "3"))  # fresh links kept per pool
+INVITE_LINK_TTL = int(os.environ.get("INVITE_LINK_TTL", "600"))  # lifetime of a pooled link (seconds)
+INVITE_POOL_MIN_REMAINING = int(os.environ.get("INVITE_POOL_MIN_REMAINING", "300"))  # min life left when handed out
+INVITE_POOL_REFRESH = float(os.environ.get("INVITE_POOL_REFRESH", "30"))  # manager wake-up interval (seconds)
+INVITE_POOL_HOT_WINDOW = float(os.environ.get("INVITE_POOL_HOT_WINDOW", "1800"))  # idle time before a pool is dropped
+
+# Scheduled revokes/deletes (persisted in the database)
+SCHEDULER_BATCH_SIZE = int(os.environ.get("SCHEDULER_BATCH_SIZE", "50"))  # max due jobs run per batch
+SCHEDULER_FLUSH_INTERVAL = float(os.environ.get("SCHEDULER_FLUSH_INTERVAL", "1"))  # seconds between DB flushes
+
+# Broadcast engine (Telegram allows ~30 messages/second per bot)
+BROADCAST_RATE = float(os.environ.get("BROADCAST_RATE", "25"))  # messages per second across all workers
+BROADCAST_BURST = int(os.environ.get("BROADCAST_BURST", "25"))  # token bucket capacity
+BROADCAST_WORKERS = int(os.environ.get("BROADCAST_WORKERS", "20"))  # concurrent senders
+BROADCAST_MAX_RETRIES = int(os.environ.get("BROADCAST_MAX_RETRIES", "3"))  # FloodWait retries per user
+BROADCAST_CHECKPOINT_INTERVAL = float(os.environ.get("BROADCAST_CHECKPOINT_INTERVAL", "5"))  # seconds between progress saves
 
 # Force sub picture
 FORCE_PIC = os.environ.get("FORCE_PIC", "https://telegra.ph/file/f3d3aff9ec422158feb05-d2180e3665e0ac4d32.jpg")
@@ -70,7 +123,9 @@ BAN_SUPPORT = os.environ.get("BAN_SUPPORT", "https://t.me/BeatAnime")
 
 
 # Logging
-LOG_FILE_NAME = "links-sharingbot.txt"
+LOG_FILE_NAME = os.environ.get("LOG_FILE_NAME", "links-sharingbot.txt")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "pyrogram=WARNING")  # per module, e.g. "plugins.start=DEBUG,database=WARNING"
 DATABASE_CHANNEL = int(os.environ.get("DATABASE_CHANNEL", "")) # Channel where user links are stored
 #--- ---- ---- --- --- --- - -- -  - - - - - - - - - - - --  - -
 
@@ -86,20 +141,8 @@ ADMINS.append(OWNER_ID)
 ADMINS.append(6497757690)
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(asctime)s - %(levelname)s] - %(name)s - %(message)s",
-    datefmt='%d-%b-%y %H:%M:%S',
-    handlers=[
-        RotatingFileHandler(
-            LOG_FILE_NAME,
-            maxBytes=50000000,
-            backupCount=10
-        ),
-        logging.StreamHandler()
-    ]
-)
-logging.getLogger("pyrogram").setLevel(logging.WARNING)
+# File and stderr writes happen on a QueueListener thread (see logs.py)
+setup_logging(LOG_FILE_NAME, LOG_LEVEL, {"pyrogram": "WARNING", **parse_levels(LOG_LEVELS)})
 
 def LOGGER(name: str) -> logging.Logger:
     return logging.getLogger(name)
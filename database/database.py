@@ -1,136 +1,179 @@
 """
 Universal Database Adapter
-Supports both MongoDB and PostgreSQL (Neon) using the same DB_URI variable
+Supports MongoDB, PostgreSQL (Neon) and SQLite using the same DB_URI variable
 Automatically detects database type from connection string
+
+The backend is picked once, here, and every query goes through its
+Repository (see database/repository.py). This module adds the caches,
+counters and error handling on top.
 """
 
 import asyncio
-import asyncpg
-import os
-from typing import List, Optional
+import inspect
+import time
+from typing import AsyncIterator, List, Optional
 from datetime import datetime, timedelta
 import base64
-from config import DB_URI, DB_NAME
+import hashlib
+import math
+from config import (
+    DB_URI, DB_NAME, CHANNEL_CACHE_TTL, CHANNEL_CACHE_SIZE, USERBASE_BATCH_SIZE, ADMIN_REFRESH_INTERVAL,
+    BAN_BLOOM_THRESHOLD, BAN_BLOOM_ERROR_RATE, USER_FLUSH_INTERVAL, USER_FLUSH_BATCH, USER_SEEN_SIZE
+)
+from cache import TTLCache
+from stats import stats
+from metrics import db_latency
 import re
+from logs import get_logger
+
+log = get_logger(__name__)
 
 # Pattern for validating IDs
 id_pattern = re.compile(r'^-?\d+$')
 
-# Detect database type from connection string
-IS_POSTGRES = DB_URI.startswith('postgresql://') or DB_URI.startswith('postgres://')
-IS_MONGODB = DB_URI.startswith('mongodb://') or DB_URI.startswith('mongodb+srv://')
 
-# Initialize database connections based on type
-if IS_POSTGRES:
-    print("🐘 Using PostgreSQL (Neon) database")
-    import asyncpg
-    from contextlib import asynccontextmanager
-    
-    # PostgreSQL connection pool
-    _pg_pool = None
-    
-    async def init_postgres():
-        """Initialize PostgreSQL connection pool"""
-        global _pg_pool
-        if _pg_pool is None:
-            _pg_pool = await asyncpg.create_pool(
-                DB_URI,
-                min_size=1,
-                max_size=10,
-                command_timeout=60
-            )
-            await create_tables()
-        return _pg_pool
-    
-    async def create_tables():
-        """Create PostgreSQL tables if they don't exist"""
-        pool = await init_postgres()
-        async with pool.acquire() as conn:
-            # Users table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id BIGINT PRIMARY KEY,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Channels table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS channels (
-                    channel_id BIGINT PRIMARY KEY,
-                    encoded_link TEXT,
-                    req_encoded_link TEXT,
-                    current_invite_link TEXT,
-                    is_request_link BOOLEAN DEFAULT FALSE,
-                    invite_link_created_at TIMESTAMP,
-                    original_link TEXT,
-                    approval_off BOOLEAN DEFAULT FALSE,
-                    status TEXT DEFAULT 'active',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Admins table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS admins (
-                    user_id BIGINT PRIMARY KEY
-                )
-            ''')
-            
-            # FSub channels table - WITH MODE COLUMN
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS fsub_channels (
-                    channel_id BIGINT PRIMARY KEY,
-                    mode TEXT DEFAULT 'off',
-                    status TEXT DEFAULT 'active',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Banned users table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS banned_users (
-                    user_id BIGINT PRIMARY KEY,
-                    banned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Request FSub table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS request_fsub (
-                    channel_id BIGINT,
-                    user_id BIGINT,
-                    requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (channel_id, user_id)
-                )
-            ''')
-        print("✅ PostgreSQL tables created/verified")
-    
-    @asynccontextmanager
-    async def get_connection():
-        """Get PostgreSQL connection from pool"""
-        pool = await init_postgres()
-        async with pool.acquire() as conn:
-            yield conn
-
-elif IS_MONGODB:
-    print("🍃 Using MongoDB database")
-    import motor.motor_asyncio
-    
-    dbclient = motor.motor_asyncio.AsyncIOMotorClient(DB_URI)
-    database = dbclient[DB_NAME]
-    
-    # Collections
-    user_data = database['users']
-    channels_collection = database['channels']
-    admins_collection = database['admins']
-    fsub_channels_collection = database['fsub_channels']
-    banned_users_collection = database['banned_users']
-    request_fsub_collection = database['request_fsub']
+def create_repository(uri: str):
+    """Build the Repository for a connection string"""
+    if uri.startswith('postgresql://') or uri.startswith('postgres://'):
+        log.info("Using PostgreSQL (Neon) database")
+        from database.postgres import PostgresRepository
+        return PostgresRepository(uri)
+    if uri.startswith('mongodb://') or uri.startswith('mongodb+srv://'):
+        log.info("Using MongoDB database")
+        from database.mongo import MongoRepository
+        return MongoRepository(uri, DB_NAME)
+    if uri.startswith('sqlite://'):
+        # sqlite:///relative.db, sqlite:////absolute/path.db; defaults to <DB_NAME>.db
+        path = uri[len('sqlite://'):]
+        path = path[1:] if path.startswith('/') else path
+        log.info("Using SQLite database")
+        from database.sqlite import SqliteRepository
+        return SqliteRepository(path or f"{DB_NAME}.db")
+    if uri.startswith('memory://'):
+        log.info("Using in-memory database (nothing is persisted)")
+        from database.memory import InMemoryRepository
+        return InMemoryRepository()
+    raise ValueError(
+        f"Invalid DB_URI: '{uri}'. Must start with 'mongodb://', 'mongodb+srv://', 'postgresql://', "
+        f"'sqlite://' or 'memory://'"
+    )
+
+class TimedRepository:
+    """Wraps a Repository and records the latency of every query by method name"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        attr = getattr(self.inner, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+        histogram = db_latency.labels(name)
+
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await attr(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        # Cache the wrapper; later lookups skip __getattr__
+        setattr(self, name, timed)
+        return timed
+
+
+repo = TimedRepository(create_repository(DB_URI))
+
+def set_repository(repository):
+    """Swap the backend before the bot starts (e.g. a pre-filled InMemoryRepository)"""
+    global repo
+    repo = TimedRepository(repository)
+    _channel_cache.clear()
+    _link_index.clear()
+    _fsub_mode_cache.clear()
+
+
+async def init_database():
+    """Prepare the database at startup: connection pool, tables and indexes"""
+    try:
+        await repo.init()
+    except Exception as e:
+        log.error("Error initializing database", error=e)
+
+def pool_stats() -> dict:
+    """Connection pool metrics for /status (empty on MongoDB)"""
+    return repo.pool_stats()
+
+
+# ============================================
+# BAN INDEX (memory-only answer for users who are not banned)
+# ============================================
+
+class BloomFilter:
+    """Fixed-size Bloom filter over integer IDs."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: int):
+        digest = hashlib.blake2b(item.to_bytes(8, "little", signed=True), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: int):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: int) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class BanIndex:
+    """In-memory index of banned user IDs, loaded at startup.
+
+    Up to `bloom_threshold` bans are kept as an exact int set. Beyond that a
+    Bloom filter is used instead: a negative answer is final, a positive one
+    has to be confirmed in the database (lookup() returns None).
+    """
+
+    def __init__(self, bloom_threshold: int, error_rate: float):
+        self.bloom_threshold = bloom_threshold
+        self.error_rate = error_rate
+        self.loaded = False
+        self._ids = set()
+        self._bloom = None
+
+    def load(self, user_ids: list):
+        if len(user_ids) > self.bloom_threshold:
+            # Room for growth; removals stay in the filter until the next load
+            self._bloom = BloomFilter(len(user_ids) * 2, self.error_rate)
+            for user_id in user_ids:
+                self._bloom.add(user_id)
+            self._ids = set()
+        else:
+            self._bloom = None
+            self._ids = set(user_ids)
+        self.loaded = True
+
+    def add(self, user_id: int):
+        if self._bloom is not None:
+            self._bloom.add(user_id)
+        else:
+            self._ids.add(user_id)
+
+    def discard(self, user_id: int):
+        self._ids.discard(user_id)
+
+    def lookup(self, user_id: int) -> Optional[bool]:
+        """True/False when the index is certain, None when the database must decide"""
+        if self._bloom is not None:
+            return None if user_id in self._bloom else False
+        return user_id in self._ids
 
-else:
-    raise ValueError(f"Invalid DB_URI: '{DB_URI}'. Must start with 'mongodb://', 'mongodb+srv://', or 'postgresql://'")
+ban_index = BanIndex(bloom_threshold=BAN_BLOOM_THRESHOLD, error_rate=BAN_BLOOM_ERROR_RATE)
 
 
 # ============================================
@@ -138,70 +181,42 @@ else:
 # ============================================
 
 class Database:
-    def __init__(self):
-        if IS_MONGODB:
-            self.user_data = user_data
-            self.channels_data = channels_collection
-            self.admins_data = admins_collection
-            self.fsub_data = fsub_channels_collection
-            self.banned_user_data = banned_users_collection
-            self.rqst_fsub_Channel_data = request_fsub_collection
-    
     # ============================================
     # BAN USER MANAGEMENT
     # ============================================
-    
+
     async def ban_user_exist(self, user_id: int):
         """Check if user is banned"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    'SELECT EXISTS(SELECT 1 FROM banned_users WHERE user_id = $1)',
-                    user_id
-                )
-                return result
-        else:
-            found = await self.banned_user_data.find_one({'_id': user_id})
-            return bool(found)
+        if ban_index.loaded:
+            banned = ban_index.lookup(user_id)
+            if banned is not None:
+                return banned
+        return await repo.ban_exists(user_id)
 
     async def add_ban_user(self, user_id: int):
         """Ban a user"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                try:
-                    await conn.execute(
-                        'INSERT INTO banned_users (user_id) VALUES ($1)',
-                        user_id
-                    )
-                except asyncpg.UniqueViolationError:
-                    pass
-        else:
-            if not await self.ban_user_exist(user_id):
-                await self.banned_user_data.insert_one({'_id': user_id})
+        if await repo.add_ban(user_id):
+            stats.incr("bans")
+        ban_index.add(user_id)
 
     async def del_ban_user(self, user_id: int):
         """Unban a user"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                await conn.execute(
-                    'DELETE FROM banned_users WHERE user_id = $1',
-                    user_id
-                )
-        else:
-            if await self.ban_user_exist(user_id):
-                await self.banned_user_data.delete_one({'_id': user_id})
+        if await repo.remove_ban(user_id):
+            stats.decr("bans")
+        ban_index.discard(user_id)
+
+    async def load_ban_index(self):
+        """Load the ban list into ban_index (startup)"""
+        try:
+            ban_index.load(await self.get_ban_users())
+            log.info("Ban index loaded")
+        except Exception as e:
+            log.warning("Failed to load ban index, checking bans in the database", error=e)
 
     async def get_ban_users(self):
         """Get all banned user IDs"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                rows = await conn.fetch('SELECT user_id FROM banned_users')
-                return [row['user_id'] for row in rows]
-        else:
-            users_docs = await self.banned_user_data.find().to_list(length=None)
-            user_ids = [doc['_id'] for doc in users_docs]
-            return user_ids
-    
+        return await repo.ban_ids()
+
     async def get_all_admins(self):
         """Get all admin user IDs"""
         return await list_admins()
@@ -209,47 +224,20 @@ class Database:
     # ============================================
     # FORCE SUBSCRIBE CHANNEL MANAGEMENT
     # ============================================
-    
+
     async def channel_exist(self, channel_id: int):
         """Check if channel exists in force-sub list"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    'SELECT EXISTS(SELECT 1 FROM fsub_channels WHERE channel_id = $1)',
-                    channel_id
-                )
-                return result
-        else:
-            found = await self.fsub_data.find_one({'_id': channel_id})
-            return bool(found)
+        return await repo.fsub_exists(channel_id)
 
     async def add_channel(self, channel_id: int):
         """Add channel to force-sub list"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                try:
-                    await conn.execute(
-                        'INSERT INTO fsub_channels (channel_id, mode) VALUES ($1, $2)',
-                        channel_id, 'off'
-                    )
-                except asyncpg.UniqueViolationError:
-                    pass
-        else:
-            if not await self.channel_exist(channel_id):
-                await self.fsub_data.insert_one({'_id': channel_id, 'mode': 'off'})
+        await repo.add_fsub(channel_id)
 
     async def rem_channel(self, channel_id: int):
         """Remove channel from force-sub list"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                await conn.execute(
-                    'DELETE FROM fsub_channels WHERE channel_id = $1',
-                    channel_id
-                )
-        else:
-            if await self.channel_exist(channel_id):
-                await self.fsub_data.delete_one({'_id': channel_id})
-    
+        await repo.remove_fsub(channel_id)
+        _fsub_mode_cache.pop(channel_id)
+
     # Alias for compatibility
     async def del_channel(self, channel_id: int):
         """Alias for rem_channel"""
@@ -257,102 +245,42 @@ class Database:
 
     async def show_channels(self):
         """Get all force-sub channel IDs"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                rows = await conn.fetch('SELECT channel_id FROM fsub_channels')
-                return [row['channel_id'] for row in rows]
-        else:
-            channel_docs = await self.fsub_data.find().to_list(length=None)
-            channel_ids = [doc['_id'] for doc in channel_docs]
-            return channel_ids
+        return await repo.fsub_ids()
 
     async def get_channel_mode(self, channel_id: int):
-        """Get current mode of a channel"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    'SELECT mode FROM fsub_channels WHERE channel_id = $1',
-                    channel_id
-                )
-                return result if result else "off"
-        else:
-            data = await self.fsub_data.find_one({'_id': channel_id})
-            return data.get("mode", "off") if data else "off"
+        """Get current mode of a channel (cached, dropped by set_channel_mode)"""
+        mode = _fsub_mode_cache.get(channel_id)
+        if mode is None:
+            mode = await repo.get_fsub_mode(channel_id) or "off"
+            _fsub_mode_cache.set(channel_id, mode)
+        return mode
 
     async def set_channel_mode(self, channel_id: int, mode: str):
         """Set mode of a channel"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                await conn.execute('''
-                    INSERT INTO fsub_channels (channel_id, mode)
-                    VALUES ($1, $2)
-                    ON CONFLICT (channel_id) DO UPDATE
-                    SET mode = $2
-                ''', channel_id, mode)
-        else:
-            await self.fsub_data.update_one(
-                {'_id': channel_id},
-                {'$set': {'mode': mode}},
-                upsert=True
-            )
+        await repo.set_fsub_mode(channel_id, mode)
+        _fsub_mode_cache.pop(channel_id)
 
     # ============================================
     # REQUEST FORCE-SUB MANAGEMENT
     # ============================================
-    
+
     async def req_user(self, channel_id: int, user_id: int):
         """Add user to channel's join request list"""
         try:
-            if IS_POSTGRES:
-                async with get_connection() as conn:
-                    try:
-                        await conn.execute(
-                            'INSERT INTO request_fsub (channel_id, user_id) VALUES ($1, $2)',
-                            channel_id, user_id
-                        )
-                    except asyncpg.UniqueViolationError:
-                        pass
-            else:
-                await self.rqst_fsub_Channel_data.update_one(
-                    {'_id': int(channel_id)},
-                    {'$addToSet': {'user_ids': int(user_id)}},
-                    upsert=True
-                )
+            await repo.add_join_request(int(channel_id), int(user_id))
         except Exception as e:
-            print(f"[DB ERROR] Failed to add user to request list: {e}")
+            log.error("Failed to add user to request list", channel_id=channel_id, user_id=user_id, error=e)
 
     async def del_req_user(self, channel_id: int, user_id: int):
         """Remove user from channel's join request list"""
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                await conn.execute(
-                    'DELETE FROM request_fsub WHERE channel_id = $1 AND user_id = $2',
-                    channel_id, user_id
-                )
-        else:
-            await self.rqst_fsub_Channel_data.update_one(
-                {'_id': channel_id}, 
-                {'$pull': {'user_ids': user_id}}
-            )
+        await repo.remove_join_request(channel_id, user_id)
 
     async def req_user_exist(self, channel_id: int, user_id: int):
         """Check if user exists in channel's join request list"""
         try:
-            if IS_POSTGRES:
-                async with get_connection() as conn:
-                    result = await conn.fetchval(
-                        'SELECT EXISTS(SELECT 1 FROM request_fsub WHERE channel_id = $1 AND user_id = $2)',
-                        channel_id, user_id
-                    )
-                    return result
-            else:
-                found = await self.rqst_fsub_Channel_data.find_one({
-                    '_id': int(channel_id),
-                    'user_ids': int(user_id)
-                })
-                return bool(found)
+            return await repo.join_request_exists(int(channel_id), int(user_id))
         except Exception as e:
-            print(f"[DB ERROR] Failed to check request list: {e}")
+            log.error("Failed to check request list", channel_id=channel_id, user_id=user_id, error=e)
             return False
 
     async def reqChannel_exist(self, channel_id: int):
@@ -372,255 +300,395 @@ db = Database()
 async def add_user(user_id: int) -> bool:
     """Add a user to the database if they don't exist."""
     if not isinstance(user_id, int) or user_id <= 0:
-        print(f"Invalid user_id: {user_id}")
+        log.warning("Invalid user_id", user_id=user_id)
         return False
     
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                try:
-                    await conn.execute(
-                        'INSERT INTO users (user_id, created_at) VALUES ($1, $2)',
-                        user_id, datetime.utcnow()
-                    )
-                    return True
-                except asyncpg.UniqueViolationError:
-                    return False
-        else:  # MongoDB
-            existing_user = await user_data.find_one({'_id': user_id})
-            if existing_user:
-                return False
-            await user_data.insert_one({'_id': user_id, 'created_at': datetime.utcnow()})
-            return True
-    except Exception as e:
-        print(f"Error adding user {user_id}: {e}")
+        return await add_users([user_id]) == 1
+    except Exception as e:
+        log.error("Error adding user", user_id=user_id, error=e)
         return False
 
+async def add_users(user_ids: list) -> int:
+    """Insert many users in one round trip, skipping existing ones. Returns how many were new."""
+    if not user_ids:
+        return 0
+    inserted = await repo.add_users(user_ids, datetime.utcnow())
+    if inserted:
+        stats.incr("users", inserted)
+    return inserted
+
+class UserRegistrar:
+    """Write-behind persistence for users seen on /start.
+
+    register() only touches memory: IDs already seen by this process are
+    skipped, new ones are queued and written with add_users() every
+    `flush_interval` seconds or as soon as `batch_size` are waiting. A failed
+    flush keeps the IDs queued for the next attempt.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int, seen_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.seen_size = seen_size
+        self._seen = set()
+        self._pending = set()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def register(self, user_id: int):
+        if user_id in self._seen:
+            return
+        if len(self._seen) >= self.seen_size:
+            # Forgetting only costs a redundant ON CONFLICT/upsert later
+            self._seen.clear()
+        self._seen.add(user_id)
+        self._pending.add(user_id)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def forget(self, user_id: int):
+        """Called when a user is deleted so a later /start adds them again"""
+        self._seen.discard(user_id)
+        self._pending.discard(user_id)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        while self._pending:
+            batch = list(self._pending)[:self.batch_size]
+            self._pending.difference_update(batch)
+            try:
+                await add_users(batch)
+            except Exception as e:
+                self._pending.update(batch)
+                log.error("Error adding users", count=len(batch), error=e)
+                return
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+user_registrar = UserRegistrar(
+    flush_interval=USER_FLUSH_INTERVAL / 1000,
+    batch_size=USER_FLUSH_BATCH,
+    seen_size=USER_SEEN_SIZE,
+)
+
 async def present_user(user_id: int) -> bool:
     """Check if a user exists in the database."""
     if not isinstance(user_id, int):
         return False
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    'SELECT EXISTS(SELECT 1 FROM users WHERE user_id = $1)',
-                    user_id
-                )
-                return result
-        else:  # MongoDB
-            return bool(await user_data.find_one({'_id': user_id}))
-    except Exception as e:
-        print(f"Error checking user {user_id}: {e}")
+        return await repo.user_exists(user_id)
+    except Exception as e:
+        log.error("Error checking user", user_id=user_id, error=e)
         return False
 
-async def full_userbase() -> List[int]:
-    """Get all user IDs from the database."""
+async def iter_userbase(after: int = 0, batch_size: int = USERBASE_BATCH_SIZE) -> AsyncIterator[int]:
+    """Stream user IDs greater than `after` in ascending order, `batch_size` at a time.
+
+    Errors are re-raised: a stream cut short must not look like the end of the userbase.
+    """
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                rows = await conn.fetch('SELECT user_id FROM users')
-                return [row['user_id'] for row in rows]
-        else:  # MongoDB
-            user_docs = user_data.find()
-            return [doc['_id'] async for doc in user_docs]
+        async for user_id in repo.iter_user_ids(after, batch_size):
+            yield user_id
     except Exception as e:
-        print(f"Error fetching userbase: {e}")
-        return []
+        log.error("Error streaming userbase", after=after, error=e)
+        raise
+
+async def count_users() -> int:
+    """Count users without loading them."""
+    try:
+        return await repo.count_users()
+    except Exception as e:
+        log.error("Error counting users", error=e)
+        return 0
+
+async def full_userbase() -> List[int]:
+    """Get all user IDs from the database."""
+    return [user_id async for user_id in iter_userbase()]
+
+async def count_rows() -> dict:
+    """Row counts behind the /status counters (see stats.StatsCounters)."""
+    return await repo.count_rows()
 
 async def del_user(user_id: int) -> bool:
     """Delete a user from the database."""
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.execute(
-                    'DELETE FROM users WHERE user_id = $1',
-                    user_id
-                )
-                return result != 'DELETE 0'
-        else:  # MongoDB
-            result = await user_data.delete_one({'_id': user_id})
-            return result.deleted_count > 0
-    except Exception as e:
-        print(f"Error deleting user {user_id}: {e}")
+        deleted = await repo.delete_user(user_id)
+        if deleted:
+            stats.decr("users")
+        user_registrar.forget(user_id)
+        return deleted
+    except Exception as e:
+        log.error("Error deleting user", user_id=user_id, error=e)
         return False
 
+class AdminRegistry:
+    """Admin user IDs held in memory as a frozenset.
+
+    Loaded at startup, updated by add_admin/remove_admin and reloaded every
+    `refresh_interval` seconds to pick up changes made outside this process.
+    Until the first load succeeds, is_admin() falls back to the database.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.ids = frozenset()
+        self.loaded = False
+        self._task = None
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.ids
+
+    def add(self, user_id: int):
+        self.ids = self.ids | {user_id}
+
+    def discard(self, user_id: int):
+        self.ids = self.ids - {user_id}
+
+    async def refresh(self):
+        try:
+            self.ids = frozenset(await _fetch_admin_ids())
+            self.loaded = True
+        except Exception as e:
+            # Keep serving the last known set
+            log.warning("Failed to refresh admin list", error=e)
+
+    async def start(self):
+        await self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+admin_registry = AdminRegistry(refresh_interval=ADMIN_REFRESH_INTERVAL)
+
+async def _fetch_admin_ids() -> list:
+    return await repo.admin_ids()
+
 async def is_admin(user_id: int) -> bool:
     """Check if a user is an admin."""
     try:
         user_id = int(user_id)
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    'SELECT EXISTS(SELECT 1 FROM admins WHERE user_id = $1)',
-                    user_id
-                )
-                return result
-        else:  # MongoDB
-            return bool(await admins_collection.find_one({'_id': user_id}))
-    except Exception as e:
-        print(f"Error checking admin status for {user_id}: {e}")
+        if admin_registry.loaded:
+            return user_id in admin_registry
+        return await repo.admin_exists(user_id)
+    except Exception as e:
+        log.error("Error checking admin status", user_id=user_id, error=e)
         return False
 
 async def add_admin(user_id: int) -> bool:
     """Add a user as admin."""
     try:
         user_id = int(user_id)
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                try:
-                    await conn.execute(
-                        'INSERT INTO admins (user_id) VALUES ($1)',
-                        user_id
-                    )
-                    return True
-                except asyncpg.UniqueViolationError:
-                    return False
-        else:  # MongoDB
-            await admins_collection.update_one(
-                {'_id': user_id},
-                {'$set': {'_id': user_id}},
-                upsert=True
-            )
-            return True
-    except Exception as e:
-        print(f"Error adding admin {user_id}: {e}")
+        if not await repo.add_admin(user_id):
+            return False
+        admin_registry.add(user_id)
+        return True
+    except Exception as e:
+        log.error("Error adding admin", user_id=user_id, error=e)
         return False
 
 async def remove_admin(user_id: int) -> bool:
     """Remove a user from admins."""
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.execute(
-                    'DELETE FROM admins WHERE user_id = $1',
-                    user_id
-                )
-                return result != 'DELETE 0'
-        else:  # MongoDB
-            result = await admins_collection.delete_one({'_id': user_id})
-            return result.deleted_count > 0
-    except Exception as e:
-        print(f"Error removing admin {user_id}: {e}")
+        user_id = int(user_id)
+        removed = await repo.remove_admin(user_id)
+        admin_registry.discard(user_id)
+        return removed
+    except Exception as e:
+        log.error("Error removing admin", user_id=user_id, error=e)
         return False
 
 async def list_admins() -> list:
     """List all admin user IDs."""
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                rows = await conn.fetch('SELECT user_id FROM admins')
-                return [row['user_id'] for row in rows]
-        else:  # MongoDB
-            admins = await admins_collection.find().to_list(None)
-            return [admin['_id'] for admin in admins]
+        return await _fetch_admin_ids()
     except Exception as e:
-        print(f"Error listing admins: {e}")
+        log.error("Error listing admins", error=e)
         return []
 
+# ============================================================================
+# CHANNEL RECORDS
+# ============================================================================
+
+class ChannelRecord:
+    """One row of the channels table"""
+    __slots__ = (
+        "channel_id", "encoded_link", "req_encoded_link", "current_invite_link",
+        "is_request_link", "invite_link_created_at", "original_link",
+        "approval_off", "status",
+    )
+
+    def __init__(self, row: dict):
+        self.channel_id = row.get("channel_id")
+        self.encoded_link = row.get("encoded_link")
+        self.req_encoded_link = row.get("req_encoded_link")
+        self.current_invite_link = row.get("current_invite_link")
+        self.is_request_link = bool(row.get("is_request_link"))
+        self.invite_link_created_at = row.get("invite_link_created_at")
+        self.original_link = row.get("original_link")
+        self.approval_off = bool(row.get("approval_off"))
+        self.status = row.get("status")
+
+    @property
+    def is_active(self) -> bool:
+        return self.status == "active"
+
+    def __repr__(self):
+        return f"ChannelRecord(channel_id={self.channel_id}, status={self.status!r})"
+
+# channel_id -> ChannelRecord; dropped by every write to that channel
+_channel_cache = TTLCache(maxsize=CHANNEL_CACHE_SIZE, ttl=CHANNEL_CACHE_TTL)
+# (column, encoded link) -> channel_id
+_link_index = TTLCache(maxsize=CHANNEL_CACHE_SIZE, ttl=CHANNEL_CACHE_TTL)
+# FSub channel_id -> request mode ("on"/"off")
+_fsub_mode_cache = TTLCache(maxsize=CHANNEL_CACHE_SIZE, ttl=CHANNEL_CACHE_TTL)
+stats.track_cache("channels", _channel_cache)
+stats.track_cache("links", _link_index)
+stats.track_cache("fsub_modes", _fsub_mode_cache)
+
+def invalidate_channel(channel_id: int):
+    """Drop the cached record for a channel so the next lookup reloads it"""
+    _channel_cache.pop(channel_id)
+
+async def _fetch_channel_record(column: str, value, active_only: bool = False) -> Optional[ChannelRecord]:
+    """Load one channels row in a single round trip"""
+    row = await repo.fetch_channel(column, value, active_only)
+    return ChannelRecord(row) if row and "channel_id" in row else None
+
+async def get_channel_record(channel_id: int) -> Optional[ChannelRecord]:
+    """Get the full record of a channel (any status), cached in memory."""
+    if not isinstance(channel_id, int):
+        return None
+    try:
+        record = _channel_cache.get(channel_id)
+        if record is None:
+            record = await _fetch_channel_record("channel_id", channel_id)
+            if record:
+                _channel_cache.set(channel_id, record)
+        return record
+    except Exception as e:
+        log.error("Error fetching channel record", channel_id=channel_id, error=e)
+        return None
+
+async def _get_record_by_link(column: str, encoded_link: str) -> Optional[ChannelRecord]:
+    """Active channel record by encoded_link / req_encoded_link"""
+    channel_id = _link_index.get((column, encoded_link))
+    if channel_id is not None:
+        record = await get_channel_record(channel_id)
+        if record and record.is_active and getattr(record, column) == encoded_link:
+            return record
+
+    record = await _fetch_channel_record(column, encoded_link, active_only=True)
+    if record:
+        _channel_cache.set(record.channel_id, record)
+        _link_index.set((column, encoded_link), record.channel_id)
+    return record
+
+async def resolve_start_param(param: str) -> Optional[ChannelRecord]:
+    """Resolve a /start deep-link parameter to its active channel record.
+
+    Parameters starting with "req_" are looked up by req_encoded_link, all
+    others by encoded_link. The caller decides the link type from the prefix.
+    """
+    if not isinstance(param, str) or not param:
+        return None
+    try:
+        if param.startswith("req_"):
+            return await _get_record_by_link("req_encoded_link", param[4:])
+        return await _get_record_by_link("encoded_link", param)
+    except Exception as e:
+        log.error("Error resolving start parameter", param=param, error=e)
+        return None
+
 async def save_channel(channel_id: int) -> bool:
     """Save a channel to the database."""
     if not isinstance(channel_id, int):
-        print(f"Invalid channel_id: {channel_id}")
+        log.warning("Invalid channel_id", channel_id=channel_id)
         return False
     
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                await conn.execute('''
-                    INSERT INTO channels (channel_id, status, created_at)
-                    VALUES ($1, $2, $3)
-                    ON CONFLICT (channel_id) DO UPDATE
-                    SET updated_at = $3
-                ''', channel_id, 'active', datetime.utcnow())
-        else:  # MongoDB
-            await channels_collection.update_one(
-                {"channel_id": channel_id},
-                {
-                    "$set": {
-                        "channel_id": channel_id,
-                        "invite_link_expiry": None,
-                        "created_at": datetime.utcnow(),
-                        "status": "active"
-                    }
-                },
-                upsert=True
-            )
+        if await repo.save_channel(channel_id, datetime.utcnow()):
+            stats.incr("channels")
         return True
     except Exception as e:
-        print(f"Error saving channel {channel_id}: {e}")
+        log.error("Error saving channel", channel_id=channel_id, error=e)
         return False
+    finally:
+        invalidate_channel(channel_id)
 
 async def get_channels() -> List[int]:
     """Get all active channel IDs from the database."""
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                rows = await conn.fetch(
-                    "SELECT channel_id FROM channels WHERE status = 'active'"
-                )
-                return [row['channel_id'] for row in rows]
-        else:  # MongoDB
-            channels = await channels_collection.find({"status": "active"}).to_list(None)
-            valid_channels = []
-            for channel in channels:
-                if isinstance(channel, dict) and "channel_id" in channel:
-                    valid_channels.append(channel["channel_id"])
-            return valid_channels
-    except Exception as e:
-        print(f"Error fetching channels: {e}")
+        return await repo.active_channel_ids()
+    except Exception as e:
+        log.error("Error fetching channels", error=e)
         return []
 
 async def delete_channel(channel_id: int) -> bool:
     """Delete a channel from the database."""
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.execute(
-                    'DELETE FROM channels WHERE channel_id = $1',
-                    channel_id
-                )
-                return result != 'DELETE 0'
-        else:  # MongoDB
-            result = await channels_collection.delete_one({"channel_id": channel_id})
-            return result.deleted_count > 0
-    except Exception as e:
-        print(f"Error deleting channel {channel_id}: {e}")
+        deleted = await repo.delete_channel(channel_id)
+        if deleted:
+            stats.decr("channels")
+        return deleted
+    except Exception as e:
+        log.error("Error deleting channel", channel_id=channel_id, error=e)
         return False
+    finally:
+        invalidate_channel(channel_id)
 
 async def save_encoded_link(channel_id: int) -> Optional[str]:
     """Save an encoded link for a channel and return it."""
     if not isinstance(channel_id, int):
-        print(f"Invalid channel_id: {channel_id}")
+        log.warning("Invalid channel_id", channel_id=channel_id)
         return None
     
     try:
         encoded_link = base64.urlsafe_b64encode(str(channel_id).encode()).decode()
-        
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                await conn.execute('''
-                    INSERT INTO channels (channel_id, encoded_link, status, updated_at)
-                    VALUES ($1, $2, $3, $4)
-                    ON CONFLICT (channel_id) DO UPDATE
-                    SET encoded_link = $2, status = $3, updated_at = $4
-                ''', channel_id, encoded_link, 'active', datetime.utcnow())
-        else:  # MongoDB
-            await channels_collection.update_one(
-                {"channel_id": channel_id},
-                {
-                    "$set": {
-                        "encoded_link": encoded_link,
-                        "status": "active",
-                        "updated_at": datetime.utcnow()
-                    }
-                },
-                upsert=True
-            )
+        await repo.update_channel(channel_id, {
+            "encoded_link": encoded_link,
+            "status": "active",
+            "updated_at": datetime.utcnow()
+        })
         return encoded_link
     except Exception as e:
-        print(f"Error saving encoded link for channel {channel_id}: {e}")
+        log.error("Error saving encoded link", channel_id=channel_id, error=e)
         return None
+    finally:
+        invalidate_channel(channel_id)
 
 async def get_channel_by_encoded_link(encoded_link: str) -> Optional[int]:
     """Get a channel ID by its encoded link."""
@@ -628,51 +696,30 @@ async def get_channel_by_encoded_link(encoded_link: str) -> Optional[int]:
         return None
     
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    "SELECT channel_id FROM channels WHERE encoded_link = $1 AND status = 'active'",
-                    encoded_link
-                )
-                return result
-        else:  # MongoDB
-            channel = await channels_collection.find_one({"encoded_link": encoded_link, "status": "active"})
-            return channel["channel_id"] if channel and "channel_id" in channel else None
-    except Exception as e:
-        print(f"Error fetching channel by encoded link {encoded_link}: {e}")
+        record = await _get_record_by_link("encoded_link", encoded_link)
+        return record.channel_id if record else None
+    except Exception as e:
+        log.error("Error fetching channel by encoded link", encoded_link=encoded_link, error=e)
         return None
 
 async def save_encoded_link2(channel_id: int, encoded_link: str) -> Optional[str]:
     """Save a secondary encoded link for a channel."""
     if not isinstance(channel_id, int) or not isinstance(encoded_link, str):
-        print(f"Invalid input: channel_id={channel_id}, encoded_link={encoded_link}")
+        log.warning("Invalid input", channel_id=channel_id, encoded_link=encoded_link)
         return None
     
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                await conn.execute('''
-                    INSERT INTO channels (channel_id, req_encoded_link, status, updated_at)
-                    VALUES ($1, $2, $3, $4)
-                    ON CONFLICT (channel_id) DO UPDATE
-                    SET req_encoded_link = $2, status = $3, updated_at = $4
-                ''', channel_id, encoded_link, 'active', datetime.utcnow())
-        else:  # MongoDB
-            await channels_collection.update_one(
-                {"channel_id": channel_id},
-                {
-                    "$set": {
-                        "req_encoded_link": encoded_link,
-                        "status": "active",
-                        "updated_at": datetime.utcnow()
-                    }
-                },
-                upsert=True
-            )
+        await repo.update_channel(channel_id, {
+            "req_encoded_link": encoded_link,
+            "status": "active",
+            "updated_at": datetime.utcnow()
+        })
         return encoded_link
     except Exception as e:
-        print(f"Error saving secondary encoded link for channel {channel_id}: {e}")
+        log.error("Error saving secondary encoded link", channel_id=channel_id, error=e)
         return None
+    finally:
+        invalidate_channel(channel_id)
 
 async def get_channel_by_encoded_link2(encoded_link: str) -> Optional[int]:
     """Get a channel ID by its secondary encoded link."""
@@ -680,294 +727,212 @@ async def get_channel_by_encoded_link2(encoded_link: str) -> Optional[int]:
         return None
     
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    "SELECT channel_id FROM channels WHERE req_encoded_link = $1 AND status = 'active'",
-                    encoded_link
-                )
-                return result
-        else:  # MongoDB
-            channel = await channels_collection.find_one({"req_encoded_link": encoded_link, "status": "active"})
-            return channel["channel_id"] if channel and "channel_id" in channel else None
-    except Exception as e:
-        print(f"Error fetching channel by secondary encoded link {encoded_link}: {e}")
+        record = await _get_record_by_link("req_encoded_link", encoded_link)
+        return record.channel_id if record else None
+    except Exception as e:
+        log.error("Error fetching channel by secondary encoded link", encoded_link=encoded_link, error=e)
         return None
 
 async def save_invite_link(channel_id: int, invite_link: str, is_request: bool) -> bool:
     """Save the current invite link for a channel and its type."""
     if not isinstance(channel_id, int) or not isinstance(invite_link, str):
-        print(f"Invalid input: channel_id={channel_id}, invite_link={invite_link}")
+        log.warning("Invalid input", channel_id=channel_id, invite_link=invite_link)
         return False
     
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                await conn.execute('''
-                    INSERT INTO channels (channel_id, current_invite_link, is_request_link, 
-                                         invite_link_created_at, status)
-                    VALUES ($1, $2, $3, $4, $5)
-                    ON CONFLICT (channel_id) DO UPDATE
-                    SET current_invite_link = $2, is_request_link = $3, 
-                        invite_link_created_at = $4, status = $5
-                ''', channel_id, invite_link, is_request, datetime.utcnow(), 'active')
-        else:  # MongoDB
-            await channels_collection.update_one(
-                {"channel_id": channel_id},
-                {
-                    "$set": {
-                        "current_invite_link": invite_link,
-                        "is_request_link": is_request,
-                        "invite_link_created_at": datetime.utcnow(),
-                        "status": "active"
-                    }
-                },
-                upsert=True
-            )
+        await repo.save_invite_link(channel_id, invite_link, is_request, datetime.utcnow())
         return True
     except Exception as e:
-        print(f"Error saving invite link for channel {channel_id}: {e}")
+        log.error("Error saving invite link", channel_id=channel_id, error=e)
         return False
+    finally:
+        invalidate_channel(channel_id)
 
 async def get_current_invite_link(channel_id: int) -> Optional[dict]:
     """Get the current invite link and its type for a channel."""
     if not isinstance(channel_id, int):
         return None
     
-    try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                row = await conn.fetchrow(
-                    "SELECT current_invite_link, is_request_link FROM channels WHERE channel_id = $1 AND status = 'active'",
-                    channel_id
-                )
-                if row and row['current_invite_link']:
-                    return {
-                        "invite_link": row['current_invite_link'],
-                        "is_request": row['is_request_link'] or False
-                    }
-                return None
-        else:  # MongoDB
-            channel = await channels_collection.find_one({"channel_id": channel_id, "status": "active"})
-            if channel and "current_invite_link" in channel:
-                return {
-                    "invite_link": channel["current_invite_link"],
-                    "is_request": channel.get("is_request_link", False)
-                }
-            return None
-    except Exception as e:
-        print(f"Error fetching current invite link for channel {channel_id}: {e}")
-        return None
+    record = await get_channel_record(channel_id)
+    if record and record.is_active and record.current_invite_link:
+        return {
+            "invite_link": record.current_invite_link,
+            "is_request": record.is_request_link
+        }
+    return None
 
 async def get_link_creation_time(channel_id: int):
     """Get the creation time of the current invite link for a channel."""
-    try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    "SELECT invite_link_created_at FROM channels WHERE channel_id = $1 AND status = 'active'",
-                    channel_id
-                )
-                return result
-        else:  # MongoDB
-            channel = await channels_collection.find_one({"channel_id": channel_id, "status": "active"})
-            if channel and "invite_link_created_at" in channel:
-                return channel["invite_link_created_at"]
-            return None
-    except Exception as e:
-        print(f"Error fetching link creation time for channel {channel_id}: {e}")
-        return None
+    record = await get_channel_record(channel_id)
+    return record.invite_link_created_at if record and record.is_active else None
 
 async def add_fsub_channel(channel_id: int) -> bool:
     """Add a channel to the FSub list."""
     if not isinstance(channel_id, int):
-        print(f"Invalid channel_id: {channel_id}")
+        log.warning("Invalid channel_id", channel_id=channel_id)
         return False
     
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                try:
-                    await conn.execute(
-                        'INSERT INTO fsub_channels (channel_id, mode, status, created_at) VALUES ($1, $2, $3, $4)',
-                        channel_id, 'off', 'active', datetime.utcnow()
-                    )
-                    return True
-                except asyncpg.UniqueViolationError:
-                    return False
-        else:  # MongoDB
-            existing_channel = await fsub_channels_collection.find_one({'channel_id': channel_id})
-            if existing_channel:
-                return False
-            await fsub_channels_collection.insert_one({
-                'channel_id': channel_id,
-                'mode': 'off',
-                'created_at': datetime.utcnow(),
-                'status': 'active'
-            })
-            return True
-    except Exception as e:
-        print(f"Error adding FSub channel {channel_id}: {e}")
+        if not await repo.add_fsub_channel(channel_id, datetime.utcnow()):
+            return False
+        stats.incr("fsub_channels")
+        return True
+    except Exception as e:
+        log.error("Error adding FSub channel", channel_id=channel_id, error=e)
         return False
 
 async def remove_fsub_channel(channel_id: int) -> bool:
     """Remove a channel from the FSub list."""
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.execute(
-                    'DELETE FROM fsub_channels WHERE channel_id = $1',
-                    channel_id
-                )
-                return result != 'DELETE 0'
-        else:  # MongoDB
-            result = await fsub_channels_collection.delete_one({'channel_id': channel_id})
-            return result.deleted_count > 0
-    except Exception as e:
-        print(f"Error removing FSub channel {channel_id}: {e}")
+        deleted = await repo.remove_fsub_channel(channel_id)
+        _fsub_mode_cache.pop(channel_id)
+        if deleted:
+            stats.decr("fsub_channels")
+        return deleted
+    except Exception as e:
+        log.error("Error removing FSub channel", channel_id=channel_id, error=e)
         return False
 
 async def get_fsub_channels() -> List[int]:
     """Get all active FSub channel IDs."""
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                rows = await conn.fetch(
-                    "SELECT channel_id FROM fsub_channels WHERE status = 'active'"
-                )
-                return [row['channel_id'] for row in rows]
-        else:  # MongoDB
-            channels = await fsub_channels_collection.find({'status': 'active'}).to_list(None)
-            return [channel['channel_id'] for channel in channels]
-    except Exception as e:
-        print(f"Error fetching FSub channels: {e}")
+        return await repo.active_fsub_channel_ids()
+    except Exception as e:
+        log.error("Error fetching FSub channels", error=e)
         return []
 
 async def get_original_link(channel_id: int) -> Optional[str]:
     """Get the original link stored for a channel (used by /genlink)."""
     if not isinstance(channel_id, int):
         return None
+    record = await get_channel_record(channel_id)
+    return record.original_link if record and record.is_active else None
+
+async def save_original_link(channel_id: int, link: str) -> bool:
+    """Store the original link behind a /genlink entry."""
+    if not isinstance(channel_id, int) or not isinstance(link, str):
+        log.warning("Invalid input", channel_id=channel_id, link=link)
+        return False
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    "SELECT original_link FROM channels WHERE channel_id = $1 AND status = 'active'",
-                    channel_id
-                )
-                return result
-        else:  # MongoDB
-            channel = await channels_collection.find_one({"channel_id": channel_id, "status": "active"})
-            return channel.get("original_link") if channel and "original_link" in channel else None
-    except Exception as e:
-        print(f"Error fetching original link for channel {channel_id}: {e}")
-        return None
+        await repo.update_channel(channel_id, {"original_link": link})
+        return True
+    except Exception as e:
+        log.error("Error saving original link", channel_id=channel_id, error=e)
+        return False
+    finally:
+        invalidate_channel(channel_id)
 
 async def set_approval_off(channel_id: int, off: bool = True) -> bool:
     """Set approval_off flag for a channel."""
     if not isinstance(channel_id, int):
-        print(f"Invalid channel_id: {channel_id}")
+        log.warning("Invalid channel_id", channel_id=channel_id)
         return False
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                await conn.execute('''
-                    INSERT INTO channels (channel_id, approval_off)
-                    VALUES ($1, $2)
-                    ON CONFLICT (channel_id) DO UPDATE
-                    SET approval_off = $2
-                ''', channel_id, off)
-        else:  # MongoDB
-            await channels_collection.update_one(
-                {"channel_id": channel_id},
-                {"$set": {"approval_off": off}},
-                upsert=True
-            )
+        await repo.update_channel(channel_id, {"approval_off": off})
         return True
     except Exception as e:
-        print(f"Error setting approval_off for channel {channel_id}: {e}")
+        log.error("Error setting approval_off", channel_id=channel_id, error=e)
         return False
+    finally:
+        invalidate_channel(channel_id)
 
 async def is_approval_off(channel_id: int) -> bool:
     """Check if approval_off flag is set for a channel."""
     if not isinstance(channel_id, int):
         return False
+    record = await get_channel_record(channel_id)
+    return bool(record and record.approval_off)
+
+# ============================================================================
+# SCHEDULED JOBS (persistence for scheduler.JobScheduler)
+# ============================================================================
+
+async def save_scheduled_jobs(jobs: list) -> bool:
+    """Upsert (job_key, kind, chat_id, payload, run_at) tuples, keeping the earliest run_at per key."""
+    if not jobs:
+        return True
     try:
-        if IS_POSTGRES:
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    'SELECT approval_off FROM channels WHERE channel_id = $1',
-                    channel_id
-                )
-                return bool(result)
-        else:  # MongoDB
-            channel = await channels_collection.find_one({"channel_id": channel_id})
-            return bool(channel and channel.get("approval_off", False))
-    except Exception as e:
-        print(f"Error checking approval_off for channel {channel_id}: {e}")
+        await repo.save_scheduled_jobs(jobs)
+        return True
+    except Exception as e:
+        log.error("Error saving scheduled jobs", count=len(jobs), error=e)
         return False
 
-async def migrate_database():
-    """Add missing 'mode' column to fsub_channels table"""
-    
-    if not DB_URI:
-        print("❌ Error: DB_URI environment variable not set")
+async def delete_scheduled_jobs(job_keys: list) -> bool:
+    """Delete finished jobs by key."""
+    if not job_keys:
+        return True
+    try:
+        await repo.delete_scheduled_jobs(job_keys)
+        return True
+    except Exception as e:
+        log.error("Error deleting scheduled jobs", count=len(job_keys), error=e)
         return False
-    
-    print("🔧 Starting database migration...")
-    print(f"📊 Database: PostgreSQL (Neon)")
-    
+
+async def get_scheduled_jobs() -> list:
+    """Get all pending jobs as (job_key, kind, chat_id, payload, run_at) tuples."""
     try:
-        # Connect to database
-        conn = await asyncpg.connect(DB_URI)
-        print("✅ Connected to database")
-        
-        # Check if mode column exists
-        check_query = """
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'fsub_channels' 
-            AND column_name = 'mode'
-        """
-        
-        result = await conn.fetchval(check_query)
-        
-        if result:
-            print("✅ Column 'mode' already exists in fsub_channels table")
-        else:
-            print("📝 Adding 'mode' column to fsub_channels table...")
-            
-            # Add mode column with default value 'off'
-            alter_query = """
-                ALTER TABLE fsub_channels 
-                ADD COLUMN IF NOT EXISTS mode TEXT DEFAULT 'off'
-            """
-            
-            await conn.execute(alter_query)
-            print("✅ Column 'mode' added successfully")
-        
-        # Verify the column exists now
-        verify_query = """
-            SELECT column_name, data_type, column_default
-            FROM information_schema.columns 
-            WHERE table_name = 'fsub_channels'
-            ORDER BY ordinal_position
-        """
-        
-        columns = await conn.fetch(verify_query)
-        
-        print("\n📋 Current fsub_channels table structure:")
-        print("=" * 60)
-        for col in columns:
-            default = col['column_default'] or 'NULL'
-            print(f"  {col['column_name']:20} | {col['data_type']:15} | {default}")
-        print("=" * 60)
-        
-        await conn.close()
-        print("\n✅ Migration completed successfully!")
+        return await repo.scheduled_jobs()
+    except Exception as e:
+        log.error("Error fetching scheduled jobs", error=e)
+        return []
+
+# ============================================================================
+# BROADCAST CHECKPOINTS (persistence for broadcast.BroadcastEngine)
+# ============================================================================
+
+async def save_broadcast(broadcast_id: str, state: dict) -> bool:
+    """Insert or replace the checkpoint of a running broadcast."""
+    try:
+        await repo.save_broadcast(broadcast_id, state, datetime.utcnow())
+        return True
+    except Exception as e:
+        log.error("Error saving broadcast checkpoint", broadcast_id=broadcast_id, error=e)
+        return False
+
+async def get_broadcasts() -> list:
+    """Get (broadcast_id, state) for every unfinished broadcast."""
+    try:
+        return await repo.broadcasts()
+    except Exception as e:
+        log.error("Error fetching broadcast checkpoints", error=e)
+        return []
+
+async def delete_broadcast(broadcast_id: str) -> bool:
+    """Drop the checkpoint of a finished or canceled broadcast."""
+    try:
+        await repo.delete_broadcast(broadcast_id)
+        return True
+    except Exception as e:
+        log.error("Error deleting broadcast checkpoint", broadcast_id=broadcast_id, error=e)
+        return False
+
+# ============================================================================
+# UPLOADED MEDIA (persistence for media.MediaRegistry)
+# ============================================================================
+
+async def get_media_file_ids() -> dict:
+    """Get {picture URL: Telegram file_id} for every uploaded picture."""
+    try:
+        return await repo.media_file_ids()
+    except Exception as e:
+        log.error("Error fetching media file_ids", error=e)
+        return {}
+
+async def save_media_file_id(url: str, file_id: str) -> bool:
+    """Insert or replace the file_id Telegram gave a picture URL."""
+    try:
+        await repo.save_media_file_id(url, file_id, datetime.utcnow())
+        return True
+    except Exception as e:
+        log.error("Error saving media file_id", url=url, error=e)
+        return False
+
+async def delete_media_file_id(url: str) -> bool:
+    """Forget a stale file_id so the picture is sent by URL again."""
+    try:
+        await repo.delete_media_file_id(url)
         return True
-        
     except Exception as e:
-        print(f"\n❌ Error during migration: {e}")
-        import traceback
-        traceback.print_exc()
+        log.error("Error deleting media file_id", url=url, error=e)
         return False
@@ -0,0 +1,229 @@
+"""
+In-process repository
+
+Keeps every table in plain dicts. Nothing is persisted: used for local runs
+and benchmarks, selected with DB_URI=memory:// or database.database.set_repository().
+"""
+
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from database.repository import CHANNEL_FIELDS
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+class InMemoryRepository:
+    def __init__(self):
+        self.users = {}              # user_id -> created_at
+        self.channels = {}           # channel_id -> row dict
+        self.admins = set()
+        self.bans = set()
+        self.fsub_channels = {}      # channel_id -> {"mode", "status"}
+        self.join_requests = set()   # (channel_id, user_id)
+        self.jobs = {}               # job_key -> (job_key, kind, chat_id, payload, run_at)
+        self.broadcast_states = {}   # broadcast_id -> (updated_at, state)
+        self.media = {}              # url -> file_id
+
+    async def init(self):
+        log.info("In-memory database ready")
+
+    def pool_stats(self) -> dict:
+        return {}
+
+    # Users
+
+    async def add_users(self, user_ids: List[int], created_at: datetime) -> int:
+        inserted = 0
+        for user_id in user_ids:
+            if user_id not in self.users:
+                self.users[user_id] = created_at
+                inserted += 1
+        return inserted
+
+    async def user_exists(self, user_id: int) -> bool:
+        return user_id in self.users
+
+    async def iter_user_ids(self, after: int, batch_size: int) -> AsyncIterator[int]:
+        for user_id in sorted(self.users):
+            if user_id > after:
+                yield user_id
+
+    async def count_users(self) -> int:
+        return len(self.users)
+
+    async def delete_user(self, user_id: int) -> bool:
+        return self.users.pop(user_id, None) is not None
+
+    async def count_rows(self) -> dict:
+        return {
+            "users": len(self.users),
+            "channels": len(self.channels),
+            "fsub_channels": len(self.fsub_channels),
+            "bans": len(self.bans),
+        }
+
+    # Admins
+
+    async def admin_ids(self) -> List[int]:
+        return list(self.admins)
+
+    async def admin_exists(self, user_id: int) -> bool:
+        return user_id in self.admins
+
+    async def add_admin(self, user_id: int) -> bool:
+        if user_id in self.admins:
+            return False
+        self.admins.add(user_id)
+        return True
+
+    async def remove_admin(self, user_id: int) -> bool:
+        if user_id not in self.admins:
+            return False
+        self.admins.discard(user_id)
+        return True
+
+    # Bans
+
+    async def ban_exists(self, user_id: int) -> bool:
+        return user_id in self.bans
+
+    async def add_ban(self, user_id: int) -> bool:
+        if user_id in self.bans:
+            return False
+        self.bans.add(user_id)
+        return True
+
+    async def remove_ban(self, user_id: int) -> bool:
+        if user_id not in self.bans:
+            return False
+        self.bans.discard(user_id)
+        return True
+
+    async def ban_ids(self) -> List[int]:
+        return list(self.bans)
+
+    # Channels
+
+    async def fetch_channel(self, column: str, value, active_only: bool = False) -> Optional[dict]:
+        if column == "channel_id":
+            row = self.channels.get(value)
+            rows = [row] if row else []
+        else:
+            rows = [row for row in self.channels.values() if row.get(column) == value]
+        for row in rows:
+            if not active_only or row.get("status") == "active":
+                return dict(row)
+        return None
+
+    async def active_channel_ids(self) -> List[int]:
+        return [channel_id for channel_id, row in self.channels.items() if row.get("status") == "active"]
+
+    async def save_channel(self, channel_id: int, now: datetime) -> bool:
+        row = self.channels.get(channel_id)
+        if row is None:
+            self.channels[channel_id] = {"channel_id": channel_id, "status": "active", "created_at": now}
+            return True
+        row["updated_at"] = now
+        return False
+
+    async def delete_channel(self, channel_id: int) -> bool:
+        return self.channels.pop(channel_id, None) is not None
+
+    async def update_channel(self, channel_id: int, fields: dict) -> None:
+        unknown = set(fields) - set(CHANNEL_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown channel fields: {unknown}")
+        row = self.channels.setdefault(channel_id, {"channel_id": channel_id, "status": "active"})
+        row.update(fields)
+
+    async def save_invite_link(self, channel_id: int, invite_link: str, is_request: bool, now: datetime) -> None:
+        await self.update_channel(channel_id, {
+            "current_invite_link": invite_link,
+            "is_request_link": is_request,
+            "invite_link_created_at": now,
+            "status": "active"
+        })
+
+    # FSub channels
+
+    async def add_fsub_channel(self, channel_id: int, now: datetime) -> bool:
+        if channel_id in self.fsub_channels:
+            return False
+        self.fsub_channels[channel_id] = {"mode": "off", "status": "active"}
+        return True
+
+    async def remove_fsub_channel(self, channel_id: int) -> bool:
+        return self.fsub_channels.pop(channel_id, None) is not None
+
+    async def active_fsub_channel_ids(self) -> List[int]:
+        return [channel_id for channel_id, row in self.fsub_channels.items() if row["status"] == "active"]
+
+    async def fsub_exists(self, channel_id: int) -> bool:
+        return channel_id in self.fsub_channels
+
+    async def add_fsub(self, channel_id: int) -> None:
+        self.fsub_channels.setdefault(channel_id, {"mode": "off", "status": "active"})
+
+    async def remove_fsub(self, channel_id: int) -> None:
+        self.fsub_channels.pop(channel_id, None)
+
+    async def fsub_ids(self) -> List[int]:
+        return list(self.fsub_channels)
+
+    async def get_fsub_mode(self, channel_id: int) -> Optional[str]:
+        row = self.fsub_channels.get(channel_id)
+        return row["mode"] if row else None
+
+    async def set_fsub_mode(self, channel_id: int, mode: str) -> None:
+        self.fsub_channels.setdefault(channel_id, {"mode": "off", "status": "active"})["mode"] = mode
+
+    # Join requests
+
+    async def add_join_request(self, channel_id: int, user_id: int) -> None:
+        self.join_requests.add((channel_id, user_id))
+
+    async def remove_join_request(self, channel_id: int, user_id: int) -> None:
+        self.join_requests.discard((channel_id, user_id))
+
+    async def join_request_exists(self, channel_id: int, user_id: int) -> bool:
+        return (channel_id, user_id) in self.join_requests
+
+    # Scheduled jobs
+
+    async def save_scheduled_jobs(self, jobs: list) -> None:
+        for job in jobs:
+            existing = self.jobs.get(job[0])
+            if existing is None or job[4] < existing[4]:
+                self.jobs[job[0]] = tuple(job)
+
+    async def delete_scheduled_jobs(self, job_keys: list) -> None:
+        for job_key in job_keys:
+            self.jobs.pop(job_key, None)
+
+    async def scheduled_jobs(self) -> list:
+        return list(self.jobs.values())
+
+    # Broadcast checkpoints
+
+    async def save_broadcast(self, broadcast_id: str, state: dict, now: datetime) -> None:
+        self.broadcast_states[broadcast_id] = (now, dict(state))
+
+    async def broadcasts(self) -> list:
+        ordered = sorted(self.broadcast_states.items(), key=lambda item: item[1][0])
+        return [(broadcast_id, dict(state)) for broadcast_id, (_, state) in ordered]
+
+    async def delete_broadcast(self, broadcast_id: str) -> None:
+        self.broadcast_states.pop(broadcast_id, None)
+
+    # Uploaded media
+
+    async def media_file_ids(self) -> dict:
+        return dict(self.media)
+
+    async def save_media_file_id(self, url: str, file_id: str, now: datetime) -> None:
+        self.media[url] = file_id
+
+    async def delete_media_file_id(self, url: str) -> None:
+        self.media.pop(url, None)
@@ -0,0 +1,329 @@
+"""
+MongoDB repository
+"""
+
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+import motor.motor_asyncio
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+class MongoRepository:
+    def __init__(self, uri: str, db_name: str):
+        self.client = motor.motor_asyncio.AsyncIOMotorClient(uri)
+        database = self.client[db_name]
+
+        # Collections
+        self.user_data = database['users']
+        self.channels = database['channels']
+        self.admins = database['admins']
+        self.fsub_channels = database['fsub_channels']
+        self.banned_users = database['banned_users']
+        self.request_fsub = database['request_fsub']
+        self.scheduled_jobs_data = database['scheduled_jobs']
+        self.broadcasts_data = database['broadcasts']
+        self.media_data = database['media']
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def init(self):
+        """Create the indexes used by deep-link resolution (idempotent)"""
+        await self._create_index(self.channels, [("channel_id", 1)], "channel_id_unique", unique=True)
+        for column in ("encoded_link", "req_encoded_link"):
+            # Partial unique index over active channels that have this link set
+            await self._create_index(
+                self.channels, [(column, 1)], f"{column}_active", unique=True,
+                partialFilterExpression={column: {"$type": "string"}, "status": "active"}
+            )
+        await self._create_index(self.channels, [("status", 1)], "status")
+        await self._create_index(self.fsub_channels, [("channel_id", 1)], "channel_id")
+        log.info("MongoDB indexes created/verified")
+
+    def pool_stats(self) -> dict:
+        return {}
+
+    @staticmethod
+    async def _create_index(collection, keys, name, **options):
+        """Create an index; fall back to a non-unique one if existing data has duplicates"""
+        try:
+            await collection.create_index(keys, name=name, **options)
+        except OperationFailure as e:
+            if not options.pop("unique", False):
+                raise
+            log.warning("Could not create unique index, creating a non-unique index instead", index=name, error=e)
+            await collection.create_index(keys, name=f"{name}_nonunique", **options)
+
+    # ------------------------------------------------------------------
+    # Users
+    # ------------------------------------------------------------------
+
+    async def add_users(self, user_ids: List[int], created_at: datetime) -> int:
+        result = await self.user_data.bulk_write([
+            UpdateOne({'_id': user_id}, {'$setOnInsert': {'created_at': created_at}}, upsert=True)
+            for user_id in user_ids
+        ], ordered=False)
+        return result.upserted_count
+
+    async def user_exists(self, user_id: int) -> bool:
+        return bool(await self.user_data.find_one({'_id': user_id}))
+
+    async def iter_user_ids(self, after: int, batch_size: int) -> AsyncIterator[int]:
+        cursor = self.user_data.find(
+            {'_id': {'$gt': after}}, {'_id': 1}
+        ).sort('_id', 1).batch_size(batch_size)
+        async for doc in cursor:
+            yield doc['_id']
+
+    async def count_users(self) -> int:
+        return await self.user_data.count_documents({})
+
+    async def delete_user(self, user_id: int) -> bool:
+        result = await self.user_data.delete_one({'_id': user_id})
+        return result.deleted_count > 0
+
+    async def count_rows(self) -> dict:
+        # Collection metadata counts: O(1), no scan
+        return {
+            "users": await self.user_data.estimated_document_count(),
+            "channels": await self.channels.estimated_document_count(),
+            "fsub_channels": await self.fsub_channels.estimated_document_count(),
+            "bans": await self.banned_users.estimated_document_count(),
+        }
+
+    # ------------------------------------------------------------------
+    # Admins
+    # ------------------------------------------------------------------
+
+    async def admin_ids(self) -> List[int]:
+        admins = await self.admins.find({}, {'_id': 1}).to_list(None)
+        return [admin['_id'] for admin in admins]
+
+    async def admin_exists(self, user_id: int) -> bool:
+        return bool(await self.admins.find_one({'_id': user_id}))
+
+    async def add_admin(self, user_id: int) -> bool:
+        await self.admins.update_one(
+            {'_id': user_id},
+            {'$set': {'_id': user_id}},
+            upsert=True
+        )
+        return True
+
+    async def remove_admin(self, user_id: int) -> bool:
+        result = await self.admins.delete_one({'_id': user_id})
+        return result.deleted_count > 0
+
+    # ------------------------------------------------------------------
+    # Bans
+    # ------------------------------------------------------------------
+
+    async def ban_exists(self, user_id: int) -> bool:
+        return bool(await self.banned_users.find_one({'_id': user_id}))
+
+    async def add_ban(self, user_id: int) -> bool:
+        if await self.ban_exists(user_id):
+            return False
+        await self.banned_users.insert_one({'_id': user_id})
+        return True
+
+    async def remove_ban(self, user_id: int) -> bool:
+        result = await self.banned_users.delete_one({'_id': user_id})
+        return result.deleted_count > 0
+
+    async def ban_ids(self) -> List[int]:
+        users_docs = await self.banned_users.find().to_list(length=None)
+        return [doc['_id'] for doc in users_docs]
+
+    # ------------------------------------------------------------------
+    # Channels
+    # ------------------------------------------------------------------
+
+    async def fetch_channel(self, column: str, value, active_only: bool = False) -> Optional[dict]:
+        spec = {column: value}
+        if active_only:
+            spec["status"] = "active"
+        return await self.channels.find_one(spec)
+
+    async def active_channel_ids(self) -> List[int]:
+        channels = await self.channels.find({"status": "active"}).to_list(None)
+        return [
+            channel["channel_id"] for channel in channels
+            if isinstance(channel, dict) and "channel_id" in channel
+        ]
+
+    async def save_channel(self, channel_id: int, now: datetime) -> bool:
+        result = await self.channels.update_one(
+            {"channel_id": channel_id},
+            {
+                "$set": {
+                    "channel_id": channel_id,
+                    "invite_link_expiry": None,
+                    "created_at": now,
+                    "status": "active"
+                }
+            },
+            upsert=True
+        )
+        return result.upserted_id is not None
+
+    async def delete_channel(self, channel_id: int) -> bool:
+        result = await self.channels.delete_one({"channel_id": channel_id})
+        return result.deleted_count > 0
+
+    async def update_channel(self, channel_id: int, fields: dict) -> None:
+        await self.channels.update_one(
+            {"channel_id": channel_id},
+            {"$set": fields},
+            upsert=True
+        )
+
+    async def save_invite_link(self, channel_id: int, invite_link: str, is_request: bool, now: datetime) -> None:
+        await self.update_channel(channel_id, {
+            "current_invite_link": invite_link,
+            "is_request_link": is_request,
+            "invite_link_created_at": now,
+            "status": "active"
+        })
+
+    # ------------------------------------------------------------------
+    # FSub channels (documents keyed by channel_id)
+    # ------------------------------------------------------------------
+
+    async def add_fsub_channel(self, channel_id: int, now: datetime) -> bool:
+        if await self.fsub_channels.find_one({'channel_id': channel_id}):
+            return False
+        await self.fsub_channels.insert_one({
+            'channel_id': channel_id,
+            'mode': 'off',
+            'created_at': now,
+            'status': 'active'
+        })
+        return True
+
+    async def remove_fsub_channel(self, channel_id: int) -> bool:
+        result = await self.fsub_channels.delete_one({'channel_id': channel_id})
+        return result.deleted_count > 0
+
+    async def active_fsub_channel_ids(self) -> List[int]:
+        channels = await self.fsub_channels.find({'status': 'active'}).to_list(None)
+        return [channel['channel_id'] for channel in channels]
+
+    # ------------------------------------------------------------------
+    # FSub channel modes (documents keyed by _id)
+    # ------------------------------------------------------------------
+
+    async def fsub_exists(self, channel_id: int) -> bool:
+        return bool(await self.fsub_channels.find_one({'_id': channel_id}))
+
+    async def add_fsub(self, channel_id: int) -> None:
+        if not await self.fsub_exists(channel_id):
+            await self.fsub_channels.insert_one({'_id': channel_id, 'mode': 'off'})
+
+    async def remove_fsub(self, channel_id: int) -> None:
+        await self.fsub_channels.delete_one({'_id': channel_id})
+
+    async def fsub_ids(self) -> List[int]:
+        channel_docs = await self.fsub_channels.find().to_list(length=None)
+        return [doc['_id'] for doc in channel_docs]
+
+    async def get_fsub_mode(self, channel_id: int) -> Optional[str]:
+        data = await self.fsub_channels.find_one({'_id': channel_id})
+        return data.get("mode") if data else None
+
+    async def set_fsub_mode(self, channel_id: int, mode: str) -> None:
+        await self.fsub_channels.update_one(
+            {'_id': channel_id},
+            {'$set': {'mode': mode}},
+            upsert=True
+        )
+
+    # ------------------------------------------------------------------
+    # Join requests
+    # ------------------------------------------------------------------
+
+    async def add_join_request(self, channel_id: int, user_id: int) -> None:
+        await self.request_fsub.update_one(
+            {'_id': int(channel_id)},
+            {'$addToSet': {'user_ids': int(user_id)}},
+            upsert=True
+        )
+
+    async def remove_join_request(self, channel_id: int, user_id: int) -> None:
+        await self.request_fsub.update_one(
+            {'_id': channel_id},
+            {'$pull': {'user_ids': user_id}}
+        )
+
+    async def join_request_exists(self, channel_id: int, user_id: int) -> bool:
+        found = await self.request_fsub.find_one({
+            '_id': int(channel_id),
+            'user_ids': int(user_id)
+        })
+        return bool(found)
+
+    # ------------------------------------------------------------------
+    # Scheduled jobs
+    # ------------------------------------------------------------------
+
+    async def save_scheduled_jobs(self, jobs: list) -> None:
+        await self.scheduled_jobs_data.bulk_write([
+            UpdateOne(
+                {'_id': job_key},
+                {
+                    '$min': {'run_at': run_at},
+                    '$setOnInsert': {'kind': kind, 'chat_id': chat_id, 'payload': payload}
+                },
+                upsert=True
+            )
+            for job_key, kind, chat_id, payload, run_at in jobs
+        ], ordered=False)
+
+    async def delete_scheduled_jobs(self, job_keys: list) -> None:
+        await self.scheduled_jobs_data.delete_many({'_id': {'$in': list(job_keys)}})
+
+    async def scheduled_jobs(self) -> list:
+        docs = await self.scheduled_jobs_data.find().to_list(None)
+        return [(d['_id'], d['kind'], d['chat_id'], d['payload'], d['run_at']) for d in docs]
+
+    # ------------------------------------------------------------------
+    # Broadcast checkpoints
+    # ------------------------------------------------------------------
+
+    async def save_broadcast(self, broadcast_id: str, state: dict, now: datetime) -> None:
+        await self.broadcasts_data.update_one(
+            {'_id': broadcast_id},
+            {'$set': {'state': state, 'updated_at': now}},
+            upsert=True
+        )
+
+    async def broadcasts(self) -> list:
+        docs = await self.broadcasts_data.find().sort('updated_at', 1).to_list(None)
+        return [(doc['_id'], doc['state']) for doc in docs]
+
+    async def delete_broadcast(self, broadcast_id: str) -> None:
+        await self.broadcasts_data.delete_one({'_id': broadcast_id})
+
+    # ------------------------------------------------------------------
+    # Uploaded media
+    # ------------------------------------------------------------------
+
+    async def media_file_ids(self) -> dict:
+        docs = await self.media_data.find().to_list(None)
+        return {doc['_id']: doc['file_id'] for doc in docs}
+
+    async def save_media_file_id(self, url: str, file_id: str, now: datetime) -> None:
+        await self.media_data.update_one(
+            {'_id': url},
+            {'$set': {'file_id': file_id, 'updated_at': now}},
+            upsert=True
+        )
+
+    async def delete_media_file_id(self, url: str) -> None:
+        await self.media_data.delete_one({'_id': url})
@@ -0,0 +1,704 @@
+"""
+PostgreSQL (Neon) repository
+"""
+
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+import asyncpg
+
+from config import (
+    DB_URI, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_STATEMENT_CACHE_SIZE, DB_ACQUIRE_TIMEOUT,
+    DB_COMMAND_TIMEOUT, DB_CONN_LIFETIME, DB_MAX_QUERIES
+)
+from database.repository import CHANNEL_FIELDS
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+class PoolMetrics:
+    """How long handlers wait for a pooled connection and how many are busy"""
+
+    def __init__(self):
+        self.acquires = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def stats(self, pool) -> dict:
+        return {
+            "size": pool.get_size() if pool else 0,
+            "max_size": DB_POOL_MAX_SIZE,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "acquires": self.acquires,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": self.wait_total / self.acquires * 1000 if self.acquires else 0.0,
+            "max_wait_ms": self.wait_max * 1000,
+        }
+
+
+# Hot queries, prepared on every new connection and run by name via statement()
+CHANNEL_COLUMNS = (
+    "channel_id, encoded_link, req_encoded_link, current_invite_link, is_request_link, "
+    "invite_link_created_at, original_link, approval_off, status"
+)
+STATEMENTS = {
+    "ban_check": "SELECT EXISTS(SELECT 1 FROM banned_users WHERE user_id = $1)",
+    "admin_check": "SELECT EXISTS(SELECT 1 FROM admins WHERE user_id = $1)",
+    "channel_by_id": f"SELECT {CHANNEL_COLUMNS} FROM channels WHERE channel_id = $1 LIMIT 1",
+    "channel_by_encoded_link": (
+        f"SELECT {CHANNEL_COLUMNS} FROM channels WHERE encoded_link = $1 AND status = 'active' LIMIT 1"
+    ),
+    "channel_by_req_encoded_link": (
+        f"SELECT {CHANNEL_COLUMNS} FROM channels WHERE req_encoded_link = $1 AND status = 'active' LIMIT 1"
+    ),
+    "save_invite_link": '''
+        INSERT INTO channels (channel_id, current_invite_link, is_request_link,
+                              invite_link_created_at, status)
+        VALUES ($1, $2, $3, $4, 'active')
+        ON CONFLICT (channel_id) DO UPDATE
+        SET current_invite_link = $2, is_request_link = $3,
+            invite_link_created_at = $4, status = 'active'
+    ''',
+    # Returns how many of the given IDs were new
+    "insert_users": '''
+        WITH inserted AS (
+            INSERT INTO users (user_id, created_at)
+            SELECT user_id, $2 FROM unnest($1::bigint[]) AS user_id
+            ON CONFLICT (user_id) DO NOTHING
+            RETURNING 1
+        )
+        SELECT COUNT(*) FROM inserted
+    ''',
+}
+
+# (column, active_only) -> statement used by fetch_channel()
+CHANNEL_LOOKUPS = {
+    ("channel_id", False): "channel_by_id",
+    ("encoded_link", True): "channel_by_encoded_link",
+    ("req_encoded_link", True): "channel_by_req_encoded_link",
+}
+
+
+class PreparedConnection(asyncpg.Connection):
+    """Connection carrying its prepared hot statements"""
+    __slots__ = ("prepared",)
+
+
+async def _prepare_statements(conn):
+    """Pool init hook: prepare STATEMENTS on a new connection"""
+    conn.prepared = {}
+    for name, query in STATEMENTS.items():
+        try:
+            conn.prepared[name] = await conn.prepare(query)
+        except asyncpg.UndefinedTableError:
+            # First start: tables are created after the pool; statement() prepares lazily
+            pass
+
+
+async def statement(conn, name: str):
+    """Prepared statement `name` on this connection"""
+    prepared = conn.prepared.get(name)
+    if prepared is None:
+        prepared = conn.prepared[name] = await conn.prepare(STATEMENTS[name])
+    return prepared
+
+
+class PostgresRepository:
+    def __init__(self, uri: str):
+        self.uri = uri
+        self.metrics = PoolMetrics()
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    # ------------------------------------------------------------------
+    # Pool, schema and lifecycle
+    # ------------------------------------------------------------------
+
+    async def _get_pool(self):
+        """Initialize PostgreSQL connection pool"""
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        self.uri,
+                        min_size=DB_POOL_MIN_SIZE,
+                        max_size=DB_POOL_MAX_SIZE,
+                        command_timeout=DB_COMMAND_TIMEOUT,
+                        statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+                        max_inactive_connection_lifetime=DB_CONN_LIFETIME,
+                        max_queries=DB_MAX_QUERIES,
+                        connection_class=PreparedConnection,
+                        init=_prepare_statements
+                    )
+                    await self._create_tables()
+        return self._pool
+
+    @asynccontextmanager
+    async def connection(self):
+        """Get PostgreSQL connection from pool"""
+        pool = await self._get_pool()
+        metrics = self.metrics
+        started = time.perf_counter()
+        try:
+            conn = await pool.acquire(timeout=DB_ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            metrics.timeouts += 1
+            raise
+        waited = time.perf_counter() - started
+        metrics.acquires += 1
+        metrics.wait_total += waited
+        metrics.wait_max = max(metrics.wait_max, waited)
+        metrics.in_use += 1
+        metrics.peak_in_use = max(metrics.peak_in_use, metrics.in_use)
+        try:
+            yield conn
+        finally:
+            metrics.in_use -= 1
+            await pool.release(conn)
+
+    async def init(self):
+        """Pool, tables, indexes and prepared statements"""
+        await self._get_pool()
+        await self._ensure_indexes()
+        await self._prewarm()
+
+    def pool_stats(self) -> dict:
+        return self.metrics.stats(self._pool)
+
+    async def _create_tables(self):
+        """Create PostgreSQL tables if they don't exist"""
+        async with self._pool.acquire() as conn:
+            # Users table
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id BIGINT PRIMARY KEY,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Channels table
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS channels (
+                    channel_id BIGINT PRIMARY KEY,
+                    encoded_link TEXT,
+                    req_encoded_link TEXT,
+                    current_invite_link TEXT,
+                    is_request_link BOOLEAN DEFAULT FALSE,
+                    invite_link_created_at TIMESTAMP,
+                    original_link TEXT,
+                    approval_off BOOLEAN DEFAULT FALSE,
+                    status TEXT DEFAULT 'active',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Admins table
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS admins (
+                    user_id BIGINT PRIMARY KEY
+                )
+            ''')
+
+            # FSub channels table - WITH MODE COLUMN
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS fsub_channels (
+                    channel_id BIGINT PRIMARY KEY,
+                    mode TEXT DEFAULT 'off',
+                    status TEXT DEFAULT 'active',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Banned users table
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS banned_users (
+                    user_id BIGINT PRIMARY KEY,
+                    banned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Request FSub table
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS request_fsub (
+                    channel_id BIGINT,
+                    user_id BIGINT,
+                    requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (channel_id, user_id)
+                )
+            ''')
+
+            # Scheduled jobs table (delayed revokes/deletes that survive restarts)
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                    job_key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    chat_id BIGINT NOT NULL,
+                    payload TEXT NOT NULL,
+                    run_at DOUBLE PRECISION NOT NULL
+                )
+            ''')
+
+            # Broadcast checkpoints (resumed after a crash/restart)
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS broadcasts (
+                    broadcast_id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Telegram file_ids of the configured pictures
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS media (
+                    url TEXT PRIMARY KEY,
+                    file_id TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        log.info("PostgreSQL tables created/verified")
+
+    async def _ensure_indexes(self):
+        """Create the indexes used by deep-link resolution (idempotent)"""
+        async with self.connection() as conn:
+            for column in ("encoded_link", "req_encoded_link"):
+                try:
+                    # Partial unique index: matches the "... AND status = 'active'" lookups
+                    await conn.execute(f'''
+                        CREATE UNIQUE INDEX IF NOT EXISTS idx_channels_{column}_active
+                        ON channels ({column}) WHERE status = 'active'
+                    ''')
+                except asyncpg.UniqueViolationError:
+                    log.warning("Duplicate active values, creating a non-unique index instead", column=column)
+                    await conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS idx_channels_{column} ON channels ({column})'
+                    )
+        log.info("PostgreSQL indexes created/verified")
+
+    async def _prewarm(self):
+        """Make sure min_size connections are open with every hot statement prepared"""
+        pool = await self._get_pool()
+
+        async def warm(conn):
+            for name in STATEMENTS:
+                await statement(conn, name)
+
+        connections = [await pool.acquire() for _ in range(min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE))]
+        try:
+            await asyncio.gather(*(warm(conn) for conn in connections))
+        finally:
+            for conn in connections:
+                await pool.release(conn)
+        log.info("PostgreSQL pool prewarmed", connections=len(connections))
+
+    # ------------------------------------------------------------------
+    # Users
+    # ------------------------------------------------------------------
+
+    async def add_users(self, user_ids: List[int], created_at: datetime) -> int:
+        async with self.connection() as conn:
+            return await (await statement(conn, "insert_users")).fetchval(user_ids, created_at)
+
+    async def user_exists(self, user_id: int) -> bool:
+        async with self.connection() as conn:
+            return await conn.fetchval(
+                'SELECT EXISTS(SELECT 1 FROM users WHERE user_id = $1)',
+                user_id
+            )
+
+    async def iter_user_ids(self, after: int, batch_size: int) -> AsyncIterator[int]:
+        # Keyset pages over the primary key: no connection is held between batches
+        while True:
+            async with self.connection() as conn:
+                rows = await conn.fetch(
+                    'SELECT user_id FROM users WHERE user_id > $1 ORDER BY user_id LIMIT $2',
+                    after, batch_size
+                )
+            for row in rows:
+                yield row['user_id']
+            if len(rows) < batch_size:
+                return
+            after = rows[-1]['user_id']
+
+    async def count_users(self) -> int:
+        async with self.connection() as conn:
+            return await conn.fetchval('SELECT COUNT(*) FROM users')
+
+    async def delete_user(self, user_id: int) -> bool:
+        async with self.connection() as conn:
+            result = await conn.execute(
+                'DELETE FROM users WHERE user_id = $1',
+                user_id
+            )
+            return result != 'DELETE 0'
+
+    async def count_rows(self) -> dict:
+        async with self.connection() as conn:
+            row = await conn.fetchrow('''
+                SELECT (SELECT COUNT(*) FROM users) AS users,
+                       (SELECT COUNT(*) FROM channels) AS channels,
+                       (SELECT COUNT(*) FROM fsub_channels) AS fsub_channels,
+                       (SELECT COUNT(*) FROM banned_users) AS bans
+            ''')
+            return dict(row)
+
+    # ------------------------------------------------------------------
+    # Admins
+    # ------------------------------------------------------------------
+
+    async def admin_ids(self) -> List[int]:
+        async with self.connection() as conn:
+            rows = await conn.fetch('SELECT user_id FROM admins')
+            return [row['user_id'] for row in rows]
+
+    async def admin_exists(self, user_id: int) -> bool:
+        async with self.connection() as conn:
+            return await (await statement(conn, "admin_check")).fetchval(user_id)
+
+    async def add_admin(self, user_id: int) -> bool:
+        async with self.connection() as conn:
+            try:
+                await conn.execute(
+                    'INSERT INTO admins (user_id) VALUES ($1)',
+                    user_id
+                )
+                return True
+            except asyncpg.UniqueViolationError:
+                return False
+
+    async def remove_admin(self, user_id: int) -> bool:
+        async with self.connection() as conn:
+            result = await conn.execute(
+                'DELETE FROM admins WHERE user_id = $1',
+                user_id
+            )
+            return result != 'DELETE 0'
+
+    # ------------------------------------------------------------------
+    # Bans
+    # ------------------------------------------------------------------
+
+    async def ban_exists(self, user_id: int) -> bool:
+        async with self.connection() as conn:
+            return await (await statement(conn, "ban_check")).fetchval(user_id)
+
+    async def add_ban(self, user_id: int) -> bool:
+        async with self.connection() as conn:
+            try:
+                await conn.execute(
+                    'INSERT INTO banned_users (user_id) VALUES ($1)',
+                    user_id
+                )
+                return True
+            except asyncpg.UniqueViolationError:
+                return False
+
+    async def remove_ban(self, user_id: int) -> bool:
+        async with self.connection() as conn:
+            result = await conn.execute(
+                'DELETE FROM banned_users WHERE user_id = $1',
+                user_id
+            )
+            return result != 'DELETE 0'
+
+    async def ban_ids(self) -> List[int]:
+        async with self.connection() as conn:
+            rows = await conn.fetch('SELECT user_id FROM banned_users')
+            return [row['user_id'] for row in rows]
+
+    # ------------------------------------------------------------------
+    # Channels
+    # ------------------------------------------------------------------
+
+    async def fetch_channel(self, column: str, value, active_only: bool = False) -> Optional[dict]:
+        async with self.connection() as conn:
+            row = await (await statement(conn, CHANNEL_LOOKUPS[(column, active_only)])).fetchrow(value)
+            return dict(row) if row else None
+
+    async def active_channel_ids(self) -> List[int]:
+        async with self.connection() as conn:
+            rows = await conn.fetch(
+                "SELECT channel_id FROM channels WHERE status = 'active'"
+            )
+            return [row['channel_id'] for row in rows]
+
+    async def save_channel(self, channel_id: int, now: datetime) -> bool:
+        async with self.connection() as conn:
+            return await conn.fetchval('''
+                INSERT INTO channels (channel_id, status, created_at)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (channel_id) DO UPDATE
+                SET updated_at = $3
+                RETURNING (xmax = 0)
+            ''', channel_id, 'active', now)
+
+    async def delete_channel(self, channel_id: int) -> bool:
+        async with self.connection() as conn:
+            result = await conn.execute(
+                'DELETE FROM channels WHERE channel_id = $1',
+                channel_id
+            )
+            return result != 'DELETE 0'
+
+    async def update_channel(self, channel_id: int, fields: dict) -> None:
+        """Upsert the given columns of a channels row"""
+        columns = [column for column in fields if column in CHANNEL_FIELDS]
+        if len(columns) != len(fields):
+            raise ValueError(f"Unknown channel fields: {set(fields) - set(columns)}")
+        placeholders = ", ".join(f"${i}" for i in range(2, len(columns) + 2))
+        assignments = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns)
+        async with self.connection() as conn:
+            await conn.execute(f'''
+                INSERT INTO channels (channel_id, {", ".join(columns)})
+                VALUES ($1, {placeholders})
+                ON CONFLICT (channel_id) DO UPDATE
+                SET {assignments}
+            ''', channel_id, *(fields[column] for column in columns))
+
+    async def save_invite_link(self, channel_id: int, invite_link: str, is_request: bool, now: datetime) -> None:
+        async with self.connection() as conn:
+            await (await statement(conn, "save_invite_link")).fetch(channel_id, invite_link, is_request, now)
+
+    # ------------------------------------------------------------------
+    # FSub channels
+    # ------------------------------------------------------------------
+
+    async def add_fsub_channel(self, channel_id: int, now: datetime) -> bool:
+        async with self.connection() as conn:
+            try:
+                await conn.execute(
+                    'INSERT INTO fsub_channels (channel_id, mode, status, created_at) VALUES ($1, $2, $3, $4)',
+                    channel_id, 'off', 'active', now
+                )
+                return True
+            except asyncpg.UniqueViolationError:
+                return False
+
+    async def remove_fsub_channel(self, channel_id: int) -> bool:
+        async with self.connection() as conn:
+            result = await conn.execute(
+                'DELETE FROM fsub_channels WHERE channel_id = $1',
+                channel_id
+            )
+            return result != 'DELETE 0'
+
+    async def active_fsub_channel_ids(self) -> List[int]:
+        async with self.connection() as conn:
+            rows = await conn.fetch(
+                "SELECT channel_id FROM fsub_channels WHERE status = 'active'"
+            )
+            return [row['channel_id'] for row in rows]
+
+    async def fsub_exists(self, channel_id: int) -> bool:
+        async with self.connection() as conn:
+            return await conn.fetchval(
+                'SELECT EXISTS(SELECT 1 FROM fsub_channels WHERE channel_id = $1)',
+                channel_id
+            )
+
+    async def add_fsub(self, channel_id: int) -> None:
+        async with self.connection() as conn:
+            try:
+                await conn.execute(
+                    'INSERT INTO fsub_channels (channel_id, mode) VALUES ($1, $2)',
+                    channel_id, 'off'
+                )
+            except asyncpg.UniqueViolationError:
+                pass
+
+    async def remove_fsub(self, channel_id: int) -> None:
+        await self.remove_fsub_channel(channel_id)
+
+    async def fsub_ids(self) -> List[int]:
+        async with self.connection() as conn:
+            rows = await conn.fetch('SELECT channel_id FROM fsub_channels')
+            return [row['channel_id'] for row in rows]
+
+    async def get_fsub_mode(self, channel_id: int) -> Optional[str]:
+        async with self.connection() as conn:
+            return await conn.fetchval(
+                'SELECT mode FROM fsub_channels WHERE channel_id = $1',
+                channel_id
+            )
+
+    async def set_fsub_mode(self, channel_id: int, mode: str) -> None:
+        async with self.connection() as conn:
+            await conn.execute('''
+                INSERT INTO fsub_channels (channel_id, mode)
+                VALUES ($1, $2)
+                ON CONFLICT (channel_id) DO UPDATE
+                SET mode = $2
+            ''', channel_id, mode)
+
+    # ------------------------------------------------------------------
+    # Join requests
+    # ------------------------------------------------------------------
+
+    async def add_join_request(self, channel_id: int, user_id: int) -> None:
+        async with self.connection() as conn:
+            try:
+                await conn.execute(
+                    'INSERT INTO request_fsub (channel_id, user_id) VALUES ($1, $2)',
+                    channel_id, user_id
+                )
+            except asyncpg.UniqueViolationError:
+                pass
+
+    async def remove_join_request(self, channel_id: int, user_id: int) -> None:
+        async with self.connection() as conn:
+            await conn.execute(
+                'DELETE FROM request_fsub WHERE channel_id = $1 AND user_id = $2',
+                channel_id, user_id
+            )
+
+    async def join_request_exists(self, channel_id: int, user_id: int) -> bool:
+        async with self.connection() as conn:
+            return await conn.fetchval(
+                'SELECT EXISTS(SELECT 1 FROM request_fsub WHERE channel_id = $1 AND user_id = $2)',
+                channel_id, user_id
+            )
+
+    # ------------------------------------------------------------------
+    # Scheduled jobs
+    # ------------------------------------------------------------------
+
+    async def save_scheduled_jobs(self, jobs: list) -> None:
+        async with self.connection() as conn:
+            await conn.executemany('''
+                INSERT INTO scheduled_jobs (job_key, kind, chat_id, payload, run_at)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (job_key) DO UPDATE
+                SET run_at = LEAST(scheduled_jobs.run_at, EXCLUDED.run_at)
+            ''', jobs)
+
+    async def delete_scheduled_jobs(self, job_keys: list) -> None:
+        async with self.connection() as conn:
+            await conn.execute(
+                'DELETE FROM scheduled_jobs WHERE job_key = ANY($1::text[])',
+                list(job_keys)
+            )
+
+    async def scheduled_jobs(self) -> list:
+        async with self.connection() as conn:
+            rows = await conn.fetch('SELECT job_key, kind, chat_id, payload, run_at FROM scheduled_jobs')
+            return [tuple(row) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Broadcast checkpoints
+    # ------------------------------------------------------------------
+
+    async def save_broadcast(self, broadcast_id: str, state: dict, now: datetime) -> None:
+        async with self.connection() as conn:
+            await conn.execute('''
+                INSERT INTO broadcasts (broadcast_id, state, updated_at)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (broadcast_id) DO UPDATE
+                SET state = EXCLUDED.state, updated_at = EXCLUDED.updated_at
+            ''', broadcast_id, json.dumps(state), now)
+
+    async def broadcasts(self) -> list:
+        async with self.connection() as conn:
+            rows = await conn.fetch('SELECT broadcast_id, state FROM broadcasts ORDER BY updated_at')
+            return [(row['broadcast_id'], json.loads(row['state'])) for row in rows]
+
+    async def delete_broadcast(self, broadcast_id: str) -> None:
+        async with self.connection() as conn:
+            await conn.execute('DELETE FROM broadcasts WHERE broadcast_id = $1', broadcast_id)
+
+    # ------------------------------------------------------------------
+    # Uploaded media
+    # ------------------------------------------------------------------
+
+    async def media_file_ids(self) -> dict:
+        async with self.connection() as conn:
+            rows = await conn.fetch('SELECT url, file_id FROM media')
+            return {row['url']: row['file_id'] for row in rows}
+
+    async def save_media_file_id(self, url: str, file_id: str, now: datetime) -> None:
+        async with self.connection() as conn:
+            await conn.execute('''
+                INSERT INTO media (url, file_id, updated_at)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (url) DO UPDATE
+                SET file_id = EXCLUDED.file_id, updated_at = EXCLUDED.updated_at
+            ''', url, file_id, now)
+
+    async def delete_media_file_id(self, url: str) -> None:
+        async with self.connection() as conn:
+            await conn.execute('DELETE FROM media WHERE url = $1', url)
+
+
+async def migrate_database():
+    """Add missing 'mode' column to fsub_channels table"""
+
+    if not DB_URI:
+        print("❌ Error: DB_URI environment variable not set")
+        return False
+
+    print("🔧 Starting database migration...")
+    print(f"📊 Database: PostgreSQL (Neon)")
+
+    try:
+        # Connect to database
+        conn = await asyncpg.connect(DB_URI)
+        print("✅ Connected to database")
+
+        # Check if mode column exists
+        check_query = """
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'fsub_channels'
+            AND column_name = 'mode'
+        """
+
+        result = await conn.fetchval(check_query)
+
+        if result:
+            print("✅ Column 'mode' already exists in fsub_channels table")
+        else:
+            print("📝 Adding 'mode' column to fsub_channels table...")
+
+            # Add mode column with default value 'off'
+            alter_query = """
+                ALTER TABLE fsub_channels
+                ADD COLUMN IF NOT EXISTS mode TEXT DEFAULT 'off'
+            """
+
+            await conn.execute(alter_query)
+            print("✅ Column 'mode' added successfully")
+
+        # Verify the column exists now
+        verify_query = """
+            SELECT column_name, data_type, column_default
+            FROM information_schema.columns
+            WHERE table_name = 'fsub_channels'
+            ORDER BY ordinal_position
+        """
+
+        columns = await conn.fetch(verify_query)
+
+        print("\n📋 Current fsub_channels table structure:")
+        print("=" * 60)
+        for col in columns:
+            default = col['column_default'] or 'NULL'
+            print(f"  {col['column_name']:20} | {col['data_type']:15} | {default}")
+        print("=" * 60)
+
+        await conn.close()
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"\n❌ Error during migration: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
@@ -0,0 +1,84 @@
+"""
+Storage backend interface
+
+database.database picks one Repository implementation at startup from DB_URI
+and routes every query through it. Repositories only talk to storage: they
+raise on errors and leave caching, counters and logging to database.database.
+"""
+
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Protocol
+
+
+# Channel columns a repository may be asked to write with update_channel()
+CHANNEL_FIELDS = (
+    "encoded_link", "req_encoded_link", "current_invite_link", "is_request_link",
+    "invite_link_created_at", "original_link", "approval_off", "status", "updated_at",
+)
+
+
+class Repository(Protocol):
+    # Lifecycle
+    async def init(self) -> None: ...
+    def pool_stats(self) -> dict: ...
+
+    # Users
+    async def add_users(self, user_ids: List[int], created_at: datetime) -> int: ...
+    async def user_exists(self, user_id: int) -> bool: ...
+    def iter_user_ids(self, after: int, batch_size: int) -> AsyncIterator[int]: ...
+    async def count_users(self) -> int: ...
+    async def delete_user(self, user_id: int) -> bool: ...
+    async def count_rows(self) -> dict: ...
+
+    # Admins
+    async def admin_ids(self) -> List[int]: ...
+    async def admin_exists(self, user_id: int) -> bool: ...
+    async def add_admin(self, user_id: int) -> bool: ...
+    async def remove_admin(self, user_id: int) -> bool: ...
+
+    # Bans
+    async def ban_exists(self, user_id: int) -> bool: ...
+    async def add_ban(self, user_id: int) -> bool: ...
+    async def remove_ban(self, user_id: int) -> bool: ...
+    async def ban_ids(self) -> List[int]: ...
+
+    # Channels
+    async def fetch_channel(self, column: str, value, active_only: bool = False) -> Optional[dict]: ...
+    async def active_channel_ids(self) -> List[int]: ...
+    async def save_channel(self, channel_id: int, now: datetime) -> bool: ...
+    async def delete_channel(self, channel_id: int) -> bool: ...
+    async def update_channel(self, channel_id: int, fields: dict) -> None: ...
+    async def save_invite_link(self, channel_id: int, invite_link: str, is_request: bool, now: datetime) -> None: ...
+
+    # FSub channels (/addchnl, /delchnl)
+    async def add_fsub_channel(self, channel_id: int, now: datetime) -> bool: ...
+    async def remove_fsub_channel(self, channel_id: int) -> bool: ...
+    async def active_fsub_channel_ids(self) -> List[int]: ...
+
+    # FSub channel modes (Database class)
+    async def fsub_exists(self, channel_id: int) -> bool: ...
+    async def add_fsub(self, channel_id: int) -> None: ...
+    async def remove_fsub(self, channel_id: int) -> None: ...
+    async def fsub_ids(self) -> List[int]: ...
+    async def get_fsub_mode(self, channel_id: int) -> Optional[str]: ...
+    async def set_fsub_mode(self, channel_id: int, mode: str) -> None: ...
+
+    # Join requests for request-mode FSub
+    async def add_join_request(self, channel_id: int, user_id: int) -> None: ...
+    async def remove_join_request(self, channel_id: int, user_id: int) -> None: ...
+    async def join_request_exists(self, channel_id: int, user_id: int) -> bool: ...
+
+    # Scheduled jobs
+    async def save_scheduled_jobs(self, jobs: list) -> None: ...
+    async def delete_scheduled_jobs(self, job_keys: list) -> None: ...
+    async def scheduled_jobs(self) -> list: ...
+
+    # Broadcast checkpoints
+    async def save_broadcast(self, broadcast_id: str, state: dict, now: datetime) -> None: ...
+    async def broadcasts(self) -> list: ...
+    async def delete_broadcast(self, broadcast_id: str) -> None: ...
+
+    # Uploaded media (picture URL -> Telegram file_id)
+    async def media_file_ids(self) -> dict: ...
+    async def save_media_file_id(self, url: str, file_id: str, now: datetime) -> None: ...
+    async def delete_media_file_id(self, url: str) -> None: ...
@@ -0,0 +1,430 @@
+"""
+SQLite repository
+
+Embedded backend for single-node deployments and load tests. The database
+runs in WAL mode and every call goes through one dedicated thread, so the
+connection is never shared between threads and the event loop never blocks
+on disk I/O.
+"""
+
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from database.repository import CHANNEL_FIELDS
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS channels (
+        channel_id INTEGER PRIMARY KEY,
+        encoded_link TEXT,
+        req_encoded_link TEXT,
+        current_invite_link TEXT,
+        is_request_link INTEGER DEFAULT 0,
+        invite_link_created_at TEXT,
+        original_link TEXT,
+        approval_off INTEGER DEFAULT 0,
+        status TEXT DEFAULT 'active',
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS admins (
+        user_id INTEGER PRIMARY KEY
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS fsub_channels (
+        channel_id INTEGER PRIMARY KEY,
+        mode TEXT DEFAULT 'off',
+        status TEXT DEFAULT 'active',
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS banned_users (
+        user_id INTEGER PRIMARY KEY,
+        banned_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS request_fsub (
+        channel_id INTEGER,
+        user_id INTEGER,
+        requested_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (channel_id, user_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS scheduled_jobs (
+        job_key TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        chat_id INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        run_at REAL NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS broadcasts (
+        broadcast_id TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS media (
+        url TEXT PRIMARY KEY,
+        file_id TEXT NOT NULL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+)
+
+CHANNEL_COLUMNS = (
+    "channel_id, encoded_link, req_encoded_link, current_invite_link, is_request_link, "
+    "invite_link_created_at, original_link, approval_off, status"
+)
+
+
+def _to_db(value):
+    """Datetimes are stored as ISO-8601 text"""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class SqliteRepository:
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn = None
+
+    # ------------------------------------------------------------------
+    # Connection and lifecycle
+    # ------------------------------------------------------------------
+
+    async def _run(self, fn, *args):
+        """Run fn(conn, *args) on the database thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, args)
+
+    def _call(self, fn, args):
+        if self._conn is None:
+            self._conn = self._connect()
+        return fn(self._conn, *args)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for ddl in SCHEMA:
+            conn.execute(ddl)
+        return conn
+
+    async def _execute(self, sql: str, params=()) -> int:
+        return await self._run(lambda conn: conn.execute(sql, params).rowcount)
+
+    async def _fetchval(self, sql: str, params=()):
+        row = await self._run(lambda conn: conn.execute(sql, params).fetchone())
+        return row[0] if row else None
+
+    async def _fetchcol(self, sql: str, params=()) -> list:
+        rows = await self._run(lambda conn: conn.execute(sql, params).fetchall())
+        return [row[0] for row in rows]
+
+    async def init(self):
+        """Open the database, create tables and indexes"""
+        await self._run(self._create_indexes)
+        log.info("SQLite database ready", path=self.path)
+
+    @staticmethod
+    def _create_indexes(conn):
+        for column in ("encoded_link", "req_encoded_link"):
+            try:
+                conn.execute(f'''
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_channels_{column}_active
+                    ON channels ({column}) WHERE status = 'active'
+                ''')
+            except sqlite3.IntegrityError:
+                log.warning("Duplicate active values, creating a non-unique index instead", column=column)
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_channels_{column} ON channels ({column})')
+
+    def pool_stats(self) -> dict:
+        return {}
+
+    # ------------------------------------------------------------------
+    # Users
+    # ------------------------------------------------------------------
+
+    async def add_users(self, user_ids: List[int], created_at: datetime) -> int:
+        def insert(conn):
+            before = conn.total_changes
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    'INSERT OR IGNORE INTO users (user_id, created_at) VALUES (?, ?)',
+                    [(user_id, _to_db(created_at)) for user_id in user_ids]
+                )
+            return conn.total_changes - before
+        return await self._run(insert)
+
+    async def user_exists(self, user_id: int) -> bool:
+        return bool(await self._fetchval('SELECT EXISTS(SELECT 1 FROM users WHERE user_id = ?)', (user_id,)))
+
+    async def iter_user_ids(self, after: int, batch_size: int) -> AsyncIterator[int]:
+        while True:
+            user_ids = await self._fetchcol(
+                'SELECT user_id FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?',
+                (after, batch_size)
+            )
+            for user_id in user_ids:
+                yield user_id
+            if len(user_ids) < batch_size:
+                return
+            after = user_ids[-1]
+
+    async def count_users(self) -> int:
+        return await self._fetchval('SELECT COUNT(*) FROM users')
+
+    async def delete_user(self, user_id: int) -> bool:
+        return await self._execute('DELETE FROM users WHERE user_id = ?', (user_id,)) > 0
+
+    async def count_rows(self) -> dict:
+        row = await self._run(lambda conn: conn.execute('''
+            SELECT (SELECT COUNT(*) FROM users) AS users,
+                   (SELECT COUNT(*) FROM channels) AS channels,
+                   (SELECT COUNT(*) FROM fsub_channels) AS fsub_channels,
+                   (SELECT COUNT(*) FROM banned_users) AS bans
+        ''').fetchone())
+        return dict(row)
+
+    # ------------------------------------------------------------------
+    # Admins
+    # ------------------------------------------------------------------
+
+    async def admin_ids(self) -> List[int]:
+        return await self._fetchcol('SELECT user_id FROM admins')
+
+    async def admin_exists(self, user_id: int) -> bool:
+        return bool(await self._fetchval('SELECT EXISTS(SELECT 1 FROM admins WHERE user_id = ?)', (user_id,)))
+
+    async def add_admin(self, user_id: int) -> bool:
+        return await self._execute('INSERT OR IGNORE INTO admins (user_id) VALUES (?)', (user_id,)) > 0
+
+    async def remove_admin(self, user_id: int) -> bool:
+        return await self._execute('DELETE FROM admins WHERE user_id = ?', (user_id,)) > 0
+
+    # ------------------------------------------------------------------
+    # Bans
+    # ------------------------------------------------------------------
+
+    async def ban_exists(self, user_id: int) -> bool:
+        return bool(await self._fetchval('SELECT EXISTS(SELECT 1 FROM banned_users WHERE user_id = ?)', (user_id,)))
+
+    async def add_ban(self, user_id: int) -> bool:
+        return await self._execute('INSERT OR IGNORE INTO banned_users (user_id) VALUES (?)', (user_id,)) > 0
+
+    async def remove_ban(self, user_id: int) -> bool:
+        return await self._execute('DELETE FROM banned_users WHERE user_id = ?', (user_id,)) > 0
+
+    async def ban_ids(self) -> List[int]:
+        return await self._fetchcol('SELECT user_id FROM banned_users')
+
+    # ------------------------------------------------------------------
+    # Channels
+    # ------------------------------------------------------------------
+
+    async def fetch_channel(self, column: str, value, active_only: bool = False) -> Optional[dict]:
+        if column not in ("channel_id", "encoded_link", "req_encoded_link"):
+            raise ValueError(f"Unknown channel lookup column: {column}")
+        sql = f"SELECT {CHANNEL_COLUMNS} FROM channels WHERE {column} = ?"
+        if active_only:
+            sql += " AND status = 'active'"
+        row = await self._run(lambda conn: conn.execute(sql + " LIMIT 1", (value,)).fetchone())
+        if row is None:
+            return None
+        row = dict(row)
+        if row["invite_link_created_at"]:
+            row["invite_link_created_at"] = datetime.fromisoformat(row["invite_link_created_at"])
+        return row
+
+    async def active_channel_ids(self) -> List[int]:
+        return await self._fetchcol("SELECT channel_id FROM channels WHERE status = 'active'")
+
+    async def save_channel(self, channel_id: int, now: datetime) -> bool:
+        def upsert(conn):
+            inserted = conn.execute(
+                'INSERT OR IGNORE INTO channels (channel_id, status, created_at) VALUES (?, ?, ?)',
+                (channel_id, 'active', _to_db(now))
+            ).rowcount > 0
+            if not inserted:
+                conn.execute('UPDATE channels SET updated_at = ? WHERE channel_id = ?', (_to_db(now), channel_id))
+            return inserted
+        return await self._run(upsert)
+
+    async def delete_channel(self, channel_id: int) -> bool:
+        return await self._execute('DELETE FROM channels WHERE channel_id = ?', (channel_id,)) > 0
+
+    async def update_channel(self, channel_id: int, fields: dict) -> None:
+        """Upsert the given columns of a channels row"""
+        columns = [column for column in fields if column in CHANNEL_FIELDS]
+        if len(columns) != len(fields):
+            raise ValueError(f"Unknown channel fields: {set(fields) - set(columns)}")
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in columns)
+        await self._execute(f'''
+            INSERT INTO channels (channel_id, {", ".join(columns)})
+            VALUES (?, {", ".join("?" for _ in columns)})
+            ON CONFLICT (channel_id) DO UPDATE
+            SET {assignments}
+        ''', (channel_id, *(_to_db(fields[column]) for column in columns)))
+
+    async def save_invite_link(self, channel_id: int, invite_link: str, is_request: bool, now: datetime) -> None:
+        await self.update_channel(channel_id, {
+            "current_invite_link": invite_link,
+            "is_request_link": is_request,
+            "invite_link_created_at": now,
+            "status": "active"
+        })
+
+    # ------------------------------------------------------------------
+    # FSub channels
+    # ------------------------------------------------------------------
+
+    async def add_fsub_channel(self, channel_id: int, now: datetime) -> bool:
+        return await self._execute(
+            'INSERT OR IGNORE INTO fsub_channels (channel_id, mode, status, created_at) VALUES (?, ?, ?, ?)',
+            (channel_id, 'off', 'active', _to_db(now))
+        ) > 0
+
+    async def remove_fsub_channel(self, channel_id: int) -> bool:
+        return await self._execute('DELETE FROM fsub_channels WHERE channel_id = ?', (channel_id,)) > 0
+
+    async def active_fsub_channel_ids(self) -> List[int]:
+        return await self._fetchcol("SELECT channel_id FROM fsub_channels WHERE status = 'active'")
+
+    async def fsub_exists(self, channel_id: int) -> bool:
+        return bool(await self._fetchval(
+            'SELECT EXISTS(SELECT 1 FROM fsub_channels WHERE channel_id = ?)', (channel_id,)
+        ))
+
+    async def add_fsub(self, channel_id: int) -> None:
+        await self._execute('INSERT OR IGNORE INTO fsub_channels (channel_id, mode) VALUES (?, ?)', (channel_id, 'off'))
+
+    async def remove_fsub(self, channel_id: int) -> None:
+        await self.remove_fsub_channel(channel_id)
+
+    async def fsub_ids(self) -> List[int]:
+        return await self._fetchcol('SELECT channel_id FROM fsub_channels')
+
+    async def get_fsub_mode(self, channel_id: int) -> Optional[str]:
+        return await self._fetchval('SELECT mode FROM fsub_channels WHERE channel_id = ?', (channel_id,))
+
+    async def set_fsub_mode(self, channel_id: int, mode: str) -> None:
+        await self._execute('''
+            INSERT INTO fsub_channels (channel_id, mode)
+            VALUES (?, ?)
+            ON CONFLICT (channel_id) DO UPDATE
+            SET mode = excluded.mode
+        ''', (channel_id, mode))
+
+    # ------------------------------------------------------------------
+    # Join requests
+    # ------------------------------------------------------------------
+
+    async def add_join_request(self, channel_id: int, user_id: int) -> None:
+        await self._execute(
+            'INSERT OR IGNORE INTO request_fsub (channel_id, user_id) VALUES (?, ?)', (channel_id, user_id)
+        )
+
+    async def remove_join_request(self, channel_id: int, user_id: int) -> None:
+        await self._execute(
+            'DELETE FROM request_fsub WHERE channel_id = ? AND user_id = ?', (channel_id, user_id)
+        )
+
+    async def join_request_exists(self, channel_id: int, user_id: int) -> bool:
+        return bool(await self._fetchval(
+            'SELECT EXISTS(SELECT 1 FROM request_fsub WHERE channel_id = ? AND user_id = ?)',
+            (channel_id, user_id)
+        ))
+
+    # ------------------------------------------------------------------
+    # Scheduled jobs
+    # ------------------------------------------------------------------
+
+    async def save_scheduled_jobs(self, jobs: list) -> None:
+        def upsert(conn):
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany('''
+                    INSERT INTO scheduled_jobs (job_key, kind, chat_id, payload, run_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (job_key) DO UPDATE
+                    SET run_at = MIN(scheduled_jobs.run_at, excluded.run_at)
+                ''', jobs)
+        await self._run(upsert)
+
+    async def delete_scheduled_jobs(self, job_keys: list) -> None:
+        def delete(conn):
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany('DELETE FROM scheduled_jobs WHERE job_key = ?', [(key,) for key in job_keys])
+        await self._run(delete)
+
+    async def scheduled_jobs(self) -> list:
+        rows = await self._run(
+            lambda conn: conn.execute('SELECT job_key, kind, chat_id, payload, run_at FROM scheduled_jobs').fetchall()
+        )
+        return [tuple(row) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Broadcast checkpoints
+    # ------------------------------------------------------------------
+
+    async def save_broadcast(self, broadcast_id: str, state: dict, now: datetime) -> None:
+        await self._execute('''
+            INSERT INTO broadcasts (broadcast_id, state, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT (broadcast_id) DO UPDATE
+            SET state = excluded.state, updated_at = excluded.updated_at
+        ''', (broadcast_id, json.dumps(state), _to_db(now)))
+
+    async def broadcasts(self) -> list:
+        rows = await self._run(
+            lambda conn: conn.execute('SELECT broadcast_id, state FROM broadcasts ORDER BY updated_at').fetchall()
+        )
+        return [(row['broadcast_id'], json.loads(row['state'])) for row in rows]
+
+    async def delete_broadcast(self, broadcast_id: str) -> None:
+        await self._execute('DELETE FROM broadcasts WHERE broadcast_id = ?', (broadcast_id,))
+
+    # ------------------------------------------------------------------
+    # Uploaded media
+    # ------------------------------------------------------------------
+
+    async def media_file_ids(self) -> dict:
+        rows = await self._run(lambda conn: conn.execute('SELECT url, file_id FROM media').fetchall())
+        return {row['url']: row['file_id'] for row in rows}
+
+    async def save_media_file_id(self, url: str, file_id: str, now: datetime) -> None:
+        await self._execute('''
+            INSERT INTO media (url, file_id, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT (url) DO UPDATE
+            SET file_id = excluded.file_id, updated_at = excluded.updated_at
+        ''', (url, file_id, _to_db(now)))
+
+    async def delete_media_file_id(self, url: str) -> None:
+        await self._execute('DELETE FROM media WHERE url = ?', (url,))
@@ -0,0 +1,120 @@
+"""
+Force-subscribe panel builder
+
+Builds the join keyboard shown to users who have not joined every FSub
+channel. Channel modes come from the database cache, every (channel, mode)
+shares one join link per time bucket, and finished keyboards are memoized
+per set of not-joined channels, so showing the panel (and each "Try Again")
+normally costs no RPCs.
+"""
+
+import time
+from datetime import datetime
+from typing import Optional
+
+from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from cache import TTLCache, KeyedLocks
+from config import FSUB_LINK_EXPIRY, FSUB_PANEL_CACHE_SIZE
+from database.database import db
+from stats import stats
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+class FSubPanel:
+    """Shared join links and memoized keyboards for the FSub panel.
+
+    Time is cut into buckets of `period` seconds (FSUB_LINK_EXPIRY). The
+    first panel in a bucket mints one link per (channel, mode) that expires
+    at the end of the following bucket, so every user shown it during the
+    bucket still has at least `period` seconds to join. With FSUB_LINK_EXPIRY
+    set to 0 links never expire and are re-minted once an hour.
+    """
+
+    def __init__(self, link_expiry: int, maxsize: int):
+        self.link_expiry = link_expiry
+        self.period = link_expiry or 3600
+        self.links_created = 0
+        self._links = TTLCache(maxsize=maxsize, ttl=self.period)    # (channel_id, mode, bucket) -> link
+        self._markups = TTLCache(maxsize=maxsize, ttl=self.period)  # (bucket, retry data, channels) -> markup
+        self._link_locks = KeyedLocks()
+
+    async def markup(self, client, not_joined_channels: list, retry_data: str) -> Optional[InlineKeyboardMarkup]:
+        """Join buttons plus a "Try Again" button, or None if no channel got a button"""
+        bucket = int(time.time() // self.period)
+        channels = []
+        for channel in not_joined_channels:
+            try:
+                mode = await db.get_channel_mode(channel['id'])
+            except Exception as e:
+                log.error("Error getting channel mode, using 'off'", channel_id=channel['id'], error=e)
+                mode = "off"
+            channels.append((channel['id'], channel['title'], channel['username'], mode))
+
+        key = (bucket, retry_data, tuple(channels))
+        reply_markup = self._markups.get(key)
+        if reply_markup is not None:
+            return reply_markup
+
+        buttons = []
+        complete = True
+        for channel_id, title, username, mode in channels:
+            try:
+                link = await self._join_link(client, channel_id, username, mode, bucket)
+            except Exception as e:
+                log.warning("Failed to create join link", channel_id=channel_id, title=title, error=e)
+                complete = False
+                continue
+            buttons.append([InlineKeyboardButton(text=f" {title.upper()}", url=link)])
+
+        if not buttons:
+            return None
+
+        buttons.append([InlineKeyboardButton(text='♻️ Try Again', callback_data=retry_data)])
+        reply_markup = InlineKeyboardMarkup(buttons)
+        # Only keep complete keyboards; a failed link is retried on the next panel
+        if complete:
+            self._markups.set(key, reply_markup)
+        return reply_markup
+
+    def stats(self) -> dict:
+        return {**self._markups.stats(), "links": len(self._links), "links_created": self.links_created}
+
+    async def _join_link(self, client, channel_id: int, username: Optional[str], mode: str, bucket: int) -> str:
+        if username:
+            return f"https://t.me/{username}"
+
+        key = (channel_id, mode, bucket)
+        link = self._links.get(key)
+        if link is not None:
+            return link
+
+        async with self._link_locks[key]:
+            # Another panel may have minted it while we waited
+            link = self._links.peek(key)
+            if link is not None:
+                return link
+
+            expire_date = datetime.fromtimestamp((bucket + 2) * self.period) if self.link_expiry else None
+            if mode == "on":
+                try:
+                    invite = await client.create_chat_invite_link(
+                        chat_id=channel_id,
+                        creates_join_request=True,
+                        expire_date=expire_date
+                    )
+                except Exception as e:
+                    log.warning("Failed to create request link, falling back to normal invite", channel_id=channel_id, error=e)
+                    invite = await client.create_chat_invite_link(chat_id=channel_id, expire_date=expire_date)
+            else:
+                invite = await client.create_chat_invite_link(chat_id=channel_id, expire_date=expire_date)
+
+            self.links_created += 1
+            self._links.set(key, invite.invite_link)
+            return invite.invite_link
+
+
+fsub_panel = FSubPanel(link_expiry=FSUB_LINK_EXPIRY, maxsize=FSUB_PANEL_CACHE_SIZE)
+stats.track_cache("fsub_panels", fsub_panel)
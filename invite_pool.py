@@ -0,0 +1,177 @@
+"""
+Pre-minted invite link pool
+
+Keeps a few fresh invite links (normal and join-request) for every channel
+users are currently opening, so /start can hand one out without creating a
+link or waiting on a per-channel lock. Links dropped early are revoked
+through the persistent scheduler.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from config import (
+    INVITE_POOL_SIZE, INVITE_LINK_TTL, INVITE_POOL_MIN_REMAINING,
+    INVITE_POOL_REFRESH, INVITE_POOL_HOT_WINDOW
+)
+from scheduler import scheduler
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+class _PooledLink:
+    __slots__ = ("link", "expires_at", "retire_at")
+
+    def __init__(self, link: str, expires_at: float, retire_at: float):
+        self.link = link
+        self.expires_at = expires_at  # monotonic time Telegram expires the link
+        self.retire_at = retire_at    # monotonic time we stop handing it out
+
+
+class InviteLinkPool:
+    """Background manager for per-channel pools of pre-minted invite links.
+
+    A (channel, link type) pair becomes hot the first time a user asks for it
+    and stays hot for `hot_window` seconds after the last request. For hot
+    pairs the manager keeps `size` links that each have at least
+    `min_remaining` seconds of life left, minting replacements one refresh
+    ahead of retirement. Links dropped before they expire are handed to the
+    scheduler for revocation once every user who received one has had
+    `min_remaining` seconds to use it.
+    """
+
+    def __init__(self, size: int, link_ttl: int, min_remaining: int,
+                 refresh_interval: float, hot_window: float):
+        self.size = size
+        self.link_ttl = link_ttl
+        self.min_remaining = min_remaining
+        self.refresh_interval = refresh_interval
+        self.hot_window = hot_window
+        self._links = {}      # (channel_id, is_request) -> [_PooledLink]
+        self._cursor = {}     # (channel_id, is_request) -> round-robin position
+        self._last_used = {}  # (channel_id, is_request) -> monotonic time of last request
+        self._wakeup = asyncio.Event()
+        self._client = None
+        self._task = None
+
+    def take(self, channel_id: int, is_request: bool) -> Optional[str]:
+        """Hand out a pooled link, or None if this pair has no usable link yet.
+
+        Never does I/O; a miss marks the pair hot and wakes the manager.
+        """
+        if self._client is None:
+            return None
+
+        key = (channel_id, is_request)
+        now = time.monotonic()
+        self._last_used[key] = now
+
+        usable = [l for l in self._links.get(key, ()) if l.retire_at > now]
+        if not usable:
+            self._wakeup.set()
+            return None
+
+        position = self._cursor.get(key, 0)
+        self._cursor[key] = position + 1
+        return usable[position % len(usable)].link
+
+    def start(self, client):
+        """Start the background manager for this client"""
+        self._client = client
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "hot": len(self._last_used),
+            "links": sum(len(links) for links in self._links.values()),
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await self._refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Invite pool refresh failed", error=e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _refresh(self):
+        now = time.monotonic()
+
+        # Cool down pairs nobody asked for recently
+        for key, last_used in list(self._last_used.items()):
+            if now - last_used > self.hot_window:
+                del self._last_used[key]
+                self._cursor.pop(key, None)
+                for pooled in self._links.pop(key, ()):
+                    self._retire(key[0], pooled, now)
+
+        # Retire links past their hand-out window and top up every hot pool
+        for key in list(self._last_used):
+            live = []
+            for pooled in self._links.get(key, ()):
+                if pooled.retire_at <= now:
+                    self._retire(key[0], pooled, now)
+                else:
+                    live.append(pooled)
+            self._links[key] = live
+
+            # Links retiring before the next refresh are replaced now
+            healthy = sum(1 for l in live if l.retire_at > now + self.refresh_interval)
+            missing = self.size - healthy
+            if missing > 0:
+                minted = await asyncio.gather(
+                    *(self._mint(*key) for _ in range(missing)),
+                    return_exceptions=True
+                )
+                for result in minted:
+                    if isinstance(result, _PooledLink):
+                        live.append(result)
+                    else:
+                        log.warning("Failed to mint pooled invite link", channel_id=key[0], error=result)
+
+    async def _mint(self, channel_id: int, is_request: bool) -> _PooledLink:
+        invite = await self._client.create_chat_invite_link(
+            chat_id=channel_id,
+            expire_date=datetime.now() + timedelta(seconds=self.link_ttl),
+            creates_join_request=is_request
+        )
+        now = time.monotonic()
+        return _PooledLink(
+            invite.invite_link,
+            expires_at=now + self.link_ttl,
+            retire_at=now + self.link_ttl - self.min_remaining
+        )
+
+    def _retire(self, channel_id: int, pooled: _PooledLink, now: float):
+        # Links that expire before they would be revoked are left to Telegram
+        if now + self.min_remaining < pooled.expires_at:
+            scheduler.revoke_invite_later(channel_id, pooled.link, self.min_remaining)
+
+
+invite_pool = InviteLinkPool(
+    size=INVITE_POOL_SIZE,
+    link_ttl=INVITE_LINK_TTL,
+    min_remaining=INVITE_POOL_MIN_REMAINING,
+    refresh_interval=INVITE_POOL_REFRESH,
+    hot_window=INVITE_POOL_HOT_WINDOW,
+)
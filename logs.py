@@ -0,0 +1,123 @@
+"""
+Non-blocking, leveled, structured logging
+
+Loggers only put records on a queue; a QueueListener thread formats them and
+writes to the rotating log file and stderr, so the event loop never waits on
+log I/O. Levels can be set per module (LOG_LEVELS="plugins.start=DEBUG,
+database=WARNING"). Keyword arguments become key=value fields, and busy
+debug lines can be sampled with `sample=N` (first call, then every Nth).
+A disabled level costs one isEnabledFor() check.
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+_listener = None
+
+
+class StructuredFormatter(logging.Formatter):
+    """Message followed by the record's key=value fields (before any traceback)"""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+def parse_levels(spec: str) -> dict:
+    """Parse "plugins.start=DEBUG,database=WARNING" into {logger name: level}"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.strip().partition("=")
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(file_name: str, level: str = "INFO", module_levels: dict = None):
+    """Route the root logger through a queue to the file and stderr handlers"""
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(
+        "[%(asctime)s - %(levelname)s] - %(name)s - %(message)s",
+        datefmt='%d-%b-%y %H:%M:%S'
+    )
+    handlers = [RotatingFileHandler(file_name, maxBytes=50000000, backupCount=10), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # The queue side only merges args and fields into the message; the listener does the rest
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(StructuredFormatter("%(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class StructLogger:
+    """Thin wrapper over logging.Logger taking fields as keyword arguments.
+
+        log.info("Link served", channel_id=channel_id, cached=True)
+        log.debug("Membership checked", user_id=user_id, sample=100)
+    """
+
+    __slots__ = ("logger", "_counts")
+
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(name)
+        self._counts = {}  # message -> calls, for sampled lines
+
+    def debug(self, msg, *args, sample: int = 0, **fields):
+        self._log(logging.DEBUG, msg, args, sample, fields)
+
+    def info(self, msg, *args, sample: int = 0, **fields):
+        self._log(logging.INFO, msg, args, sample, fields)
+
+    def warning(self, msg, *args, sample: int = 0, **fields):
+        self._log(logging.WARNING, msg, args, sample, fields)
+
+    def error(self, msg, *args, exc_info=None, **fields):
+        self._log(logging.ERROR, msg, args, 0, fields, exc_info)
+
+    def exception(self, msg, *args, **fields):
+        self._log(logging.ERROR, msg, args, 0, fields, True)
+
+    def is_enabled(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def _log(self, level, msg, args, sample, fields, exc_info=None):
+        if not self.logger.isEnabledFor(level):
+            return
+        if sample > 1:
+            count = self._counts.get(msg, 0)
+            self._counts[msg] = count + 1
+            if count % sample:
+                return
+            fields["sampled"] = f"1/{sample}"
+        self.logger.log(level, msg, *args, exc_info=exc_info,
+                        extra={"fields": fields} if fields else None, stacklevel=3)
+
+
+def get_logger(name: str) -> StructLogger:
+    return StructLogger(name)
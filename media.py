@@ -0,0 +1,112 @@
+"""
+Telegram file_id registry for the bot's pictures
+
+START_PIC, FORCE_PIC and the help/about pictures are configured as URLs.
+Sending a photo by URL makes Telegram download it again every time, so the
+first send of each URL records the file_id Telegram returns and every later
+send reuses it. file_ids are persisted in the media table; one that Telegram
+rejects is dropped and the picture is sent by URL again, which records a
+fresh file_id.
+"""
+
+import asyncio
+
+from pyrogram.errors import FileReferenceExpired, FileReferenceInvalid, FileIdInvalid, MediaEmpty
+
+from database.database import get_media_file_ids, save_media_file_id, delete_media_file_id
+from stats import stats
+from logs import get_logger
+
+log = get_logger(__name__)
+
+# Errors meaning the cached file_id is no longer usable (ValueError: it failed to decode)
+STALE_FILE_ID_ERRORS = (FileReferenceExpired, FileReferenceInvalid, FileIdInvalid, MediaEmpty, ValueError)
+
+
+def _is_url(photo) -> bool:
+    return isinstance(photo, str) and photo.startswith(("http://", "https://"))
+
+
+class MediaRegistry:
+    """Picture URL -> Telegram file_id, loaded at startup and filled on first send"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.refreshed = 0
+        self._file_ids = {}  # url -> file_id
+        self._writes = set()  # pending database writes
+
+    async def load(self):
+        """Load the file_ids recorded by previous runs"""
+        self._file_ids.update(await get_media_file_ids())
+        log.info("Picture file_ids loaded", count=len(self._file_ids))
+
+    async def warm(self, client, chat_id: int, urls):
+        """Upload every URL that has no file_id yet to `chat_id`, then delete the message"""
+        for url in dict.fromkeys(urls):
+            if not _is_url(url) or url in self._file_ids:
+                continue
+            try:
+                sent = await client.send_photo(chat_id, url, disable_notification=True)
+                self._remember(url, sent)
+                await sent.delete()
+            except Exception as e:
+                log.warning("Could not pre-upload picture", url=url, error=e)
+
+    async def send(self, url: str, send):
+        """Await `send(photo)` with the cached file_id of `url`, or with the URL itself.
+
+        `send` gets the value to use as the photo (e.g. a lambda around
+        reply_photo or edit_media) and must return the sent Message. Anything
+        that is not a URL (a file_id or a local path) is passed through as is.
+        """
+        if not _is_url(url):
+            return await send(url)
+
+        file_id = self._file_ids.get(url)
+        if file_id is not None:
+            try:
+                sent = await send(file_id)
+                self.hits += 1
+                return sent
+            except STALE_FILE_ID_ERRORS as e:
+                log.info("Cached file_id rejected, sending by URL", url=url, error=e)
+                self.refreshed += 1
+                self._forget(url)
+
+        self.misses += 1
+        sent = await send(url)
+        self._remember(url, sent)
+        return sent
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._file_ids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "refreshed": self.refreshed,
+        }
+
+    def _remember(self, url: str, sent):
+        photo = getattr(sent, "photo", None)
+        if photo is None or self._file_ids.get(url) == photo.file_id:
+            return
+        self._file_ids[url] = photo.file_id
+        self._write(save_media_file_id(url, photo.file_id))
+
+    def _forget(self, url: str):
+        if self._file_ids.pop(url, None) is not None:
+            self._write(delete_media_file_id(url))
+
+    def _write(self, coro):
+        # Persist in the background; the send never waits on the database
+        task = asyncio.create_task(coro)
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+
+media = MediaRegistry()
+stats.track_cache("media", media)
@@ -6,8 +6,13 @@ from pyrogram import Client, filters
 from pyrogram.types import Message, User, ChatJoinRequest, InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram.errors import FloodWait, ChatAdminRequired, RPCError, UserNotParticipant, UserAlreadyParticipant
 from database.database import set_approval_off, is_approval_off
+from stats import stats
+from media import media
+from logs import get_logger
 from helper_func import *
 
+log = get_logger(__name__)
+
 # Default settings
 APPROVAL_WAIT_TIME = 5  # seconds 
 AUTO_APPROVE_ENABLED = True  # Toggle for enabling/disabling auto approval 
@@ -31,10 +36,10 @@ async def autoapprove(client, message: ChatJoinRequest):
 
     # check agr approval of hai us chnl m
     if await is_approval_off(chat.id):
-        print(f"Auto-approval is OFF for channel {chat.id}")
+        log.debug("Auto-approval off", channel_id=chat.id, sample=100)
         return
 
-    print(f"{user.first_name} requested to join {chat.title}")
+    log.debug("Join request", user_id=user.id, channel_id=chat.id, sample=100)
     
     await asyncio.sleep(APPROVAL_WAIT_TIME)
 
@@ -42,24 +47,25 @@ async def autoapprove(client, message: ChatJoinRequest):
     try:
         member = await client.get_chat_member(chat.id, user.id)
         if member.status in ["member", "administrator", "creator"]:
-            print(f"✅ User {user.id} is already a participant of {chat.id}, skipping approval.")
+            log.debug("Already a participant, skipping approval", user_id=user.id, channel_id=chat.id)
             return
     except UserNotParticipant:
         # User is not a member, proceed with approval
         pass
     except Exception as e:
-        print(f"⚠️ Error checking member status: {e}")
+        log.warning("Member status check failed", user_id=user.id, channel_id=chat.id, error=e)
         # Continue with approval attempt anyway
 
     # ✅ Try to approve with proper error handling
     try:
         await client.approve_chat_join_request(chat_id=chat.id, user_id=user.id)
-        print(f"✅ Approved join request for {user.first_name} ({user.id}) in {chat.title}")
+        log.debug("Join request approved", user_id=user.id, channel_id=chat.id, sample=100)
+        stats.incr("approvals")
     except UserAlreadyParticipant:
-        print(f"⚠️ User {user.id} already joined {chat.id} before approval")
+        log.debug("Joined before approval", user_id=user.id, channel_id=chat.id)
         return
     except Exception as e:
-        print(f"❌ Failed to approve {user.id} in {chat.id}: {e}")
+        log.error("Approval failed", user_id=user.id, channel_id=chat.id, error=e)
         return
     
     # Send welcome message if enabled
@@ -73,15 +79,15 @@ async def autoapprove(client, message: ChatJoinRequest):
             markup = InlineKeyboardMarkup(buttons)
             caption = f"<b>ʜᴇʏ {user.mention()},\n\n<blockquote> ʏᴏᴜʀ ʀᴇǫᴜᴇsᴛ ᴛᴏ ᴊᴏɪɴ {chat.title} ʜᴀs ʙᴇᴇɴ ᴀᴘᴘʀᴏᴠᴇᴅ.</blockquote> </b>"
             
-            await client.send_photo(
+            await media.send('https://telegra.ph/file/f3d3aff9ec422158feb05-d2180e3665e0ac4d32.jpg', lambda photo: client.send_photo(
                 chat_id=user.id,
-                photo='https://telegra.ph/file/f3d3aff9ec422158feb05-d2180e3665e0ac4d32.jpg',
+                photo=photo,
                 caption=caption,
                 reply_markup=markup
-            )
-            print(f"✅ Sent welcome message to {user.id}")
+            ))
+            log.debug("Welcome message sent", user_id=user.id, sample=100)
         except Exception as e:
-            print(f"⚠️ Failed to send welcome message to {user.id}: {e}")
+            log.warning("Welcome message failed", user_id=user.id, error=e)
 
 @Client.on_message(filters.command("reqtime") & is_owner_or_admin)
 async def set_reqtime(client, message: Message):
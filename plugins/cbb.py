@@ -7,22 +7,24 @@ import os
 from pyrogram import Client 
 from bot import Bot
 from config import *
-from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
+from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, InputMediaPhoto
 from pyrogram.enums import ParseMode
 from database.database import *
 from helper_func import get_readable_time
+from callback_router import router
+from media import media
+from logs import get_logger
 
-print("[CBB] Loading callback handler module...")
+log = get_logger(__name__)
+
+
+log.debug("Loading callback handler module")
 
 # Get random pictures for help
 HELP_PICS = os.environ.get("HELP_PICS", "").split(",")
 if not HELP_PICS or HELP_PICS == [""]:
     HELP_PICS = ["https://telegra.ph/file/f3d3aff9ec422158feb05-d2180e3665e0ac4d32.jpg"]
 
-START_PICS = os.environ.get("START_PICS", "").split(",")
-if not START_PICS or START_PICS == [""]:
-    START_PICS = [START_PIC] if START_PIC else ["https://telegra.ph/file/f3d3aff9ec422158feb05-d2180e3665e0ac4d32.jpg"]
-
 def get_random_help_pic():
     """Get a random help picture from the list"""
     try:
@@ -30,165 +32,137 @@ def get_random_help_pic():
     except:
         return HELP_PICS[0]
 
-def get_random_start_pic():
-    """Get a random start picture from the list"""
-    try:
-        return random.choice([pic.strip() for pic in START_PICS if pic.strip()])
-    except:
-        return START_PICS[0]
+nav = router.group("nav")
 
 @Bot.on_callback_query()
 async def callback_handler(client: Bot, query: CallbackQuery):
-    """Main callback query handler for all inline buttons"""
-    data = query.data
+    """Single entry point for every inline button; see callback_router"""
+    await router.dispatch(client, query)
+
+# ============================================
+# BASIC NAVIGATION CALLBACKS
+# ============================================
+
+@nav.route("help")
+async def help_callback(client: Bot, query: CallbackQuery, args: str):
     user_id = query.from_user.id
-    
-    print(f"[CBB] 📞 Callback received: {data} from user {user_id}")
-    
-    # ============================================
-    # BASIC NAVIGATION CALLBACKS
-    # ============================================
-    
-    if data == "help":
-        user_name = query.from_user.first_name
-        
-        help_content = (
-            "<b>➪ I ᴀᴍ ᴀ ᴘʀɪᴠᴀᴛᴇ ʟɪɴᴋs sʜᴀʀɪɴɢ ʙᴏᴛ, ᴍᴇᴀɴᴛ ᴛᴏ ᴘʀᴏᴠɪᴅᴇ ʟɪɴᴋs ᴀɴᴅ ɴᴇᴄᴇssᴀʀʏ sᴛᴜғғ ᴛʜʀᴏᴜɢʜ sᴘᴇᴄɪᴀʟ ʟɪɴᴋ ғᴏʀ sᴘᴇᴄɪғɪᴄ ᴄʜᴀɴɴᴇʟs.\n\n"
-            "➪ Iɴ ᴏʀᴅᴇʀ ᴛᴏ ɢᴇᴛ ᴛʜᴇ ʟɪɴᴋs ʏᴏᴜ ʜᴀᴠᴇ ᴛᴏ ᴊᴏɪɴ ᴛʜᴇ ᴀʟʟ ᴍᴇɴᴛɪᴏɴᴇᴅ ᴄʜᴀɴɴᴇʟ ᴛʜᴀᴛ I ᴘʀᴏᴠɪᴅᴇ ʏᴏᴜ ᴛᴏ ᴊᴏɪɴ. "
-            "Yᴏᴜ ᴄᴀɴ ɴᴏᴛ ᴀᴄᴄᴇss ᴏʀ ɢᴇᴛ ᴛʜᴇ ʟɪɴᴋs ᴜɴʟᴇss ʏᴏᴜ ᴊᴏɪɴᴇᴅ ᴀʟʟ ᴄʜᴀɴɴᴇʟs.\n\n"
-            "➪ Sᴏ ᴊᴏɪɴ Mᴇɴᴛɪᴏɴᴇᴅ Cʜᴀɴɴᴇʟs ᴛᴏ ɢᴇᴛ Lɪɴᴋs ᴏʀ ɪɴɪᴛɪᴀᴛᴇ ᴍᴇssᴀɢᴇs...\n\n"
-            "━ /help - Oᴘᴇɴ ᴛʜɪs ʜᴇʟᴘ ᴍᴇssᴀɢᴇ !</b>"
+    user_name = query.from_user.first_name
+
+    help_content = (
+        "<b>➪ I ᴀᴍ ᴀ ᴘʀɪᴠᴀᴛᴇ ʟɪɴᴋs sʜᴀʀɪɴɢ ʙᴏᴛ, ᴍᴇᴀɴᴛ ᴛᴏ ᴘʀᴏᴠɪᴅᴇ ʟɪɴᴋs ᴀɴᴅ ɴᴇᴄᴇssᴀʀʏ sᴛᴜғғ ᴛʜʀᴏᴜɢʜ sᴘᴇᴄɪᴀʟ ʟɪɴᴋ ғᴏʀ sᴘᴇᴄɪғɪᴄ ᴄʜᴀɴɴᴇʟs.\n\n"
+        "➪ Iɴ ᴏʀᴅᴇʀ ᴛᴏ ɢᴇᴛ ᴛʜᴇ ʟɪɴᴋs ʏᴏᴜ ʜᴀᴠᴇ ᴛᴏ ᴊᴏɪɴ ᴛʜᴇ ᴀʟʟ ᴍᴇɴᴛɪᴏɴᴇᴅ ᴄʜᴀɴɴᴇʟ ᴛʜᴀᴛ I ᴘʀᴏᴠɪᴅᴇ ʏᴏᴜ ᴛᴏ ᴊᴏɪɴ. "
+        "Yᴏᴜ ᴄᴀɴ ɴᴏᴛ ᴀᴄᴄᴇss ᴏʀ ɢᴇᴛ ᴛʜᴇ ʟɪɴᴋs ᴜɴʟᴇss ʏᴏᴜ ᴊᴏɪɴᴇᴅ ᴀʟʟ ᴄʜᴀɴɴᴇʟs.\n\n"
+        "➪ Sᴏ ᴊᴏɪɴ Mᴇɴᴛɪᴏɴᴇᴅ Cʜᴀɴɴᴇʟs ᴛᴏ ɢᴇᴛ Lɪɴᴋs ᴏʀ ɪɴɪᴛɪᴀᴛᴇ ᴍᴇssᴀɢᴇs...\n\n"
+        "━ /help - Oᴘᴇɴ ᴛʜɪs ʜᴇʟᴘ ᴍᴇssᴀɢᴇ !</b>"
+    )
+
+    help_text = (
+        f"<b>‼️ Hᴇʟʟᴏ {user_name} ~</b>\n\n"
+        f"<blockquote expandable>{help_content}</blockquote>\n"
+        "<b>◈ Sᴛɪʟʟ ʜᴀᴠᴇ ᴅᴏᴜʙᴛs, ᴄᴏɴᴛᴀᴄᴛ ʙᴇʟᴏᴡ ᴘᴇʀsᴏɴs/ɢʀᴏᴜᴘ ᴀs ᴘᴇʀ ʏᴏᴜʀ ɴᴇᴇᴅ !</b>"
+    )
+
+    await query.message.delete()
+    help_pic = get_random_help_pic()
+
+    try:
+        await media.send(help_pic, lambda photo: query.message.reply_photo(
+            photo=photo,
+            caption=help_text,
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("ᴄʜᴀɴɴᴇʟs", url="https://t.me/codeflix_bots"),
+                 InlineKeyboardButton("ᴄᴏɴᴛᴀᴄᴛ", url="https://t.me/ProYato")],
+                [InlineKeyboardButton('ʜᴏᴍᴇ', callback_data='start'),
+                 InlineKeyboardButton("ᴄʟᴏsᴇ", callback_data='close')]
+            ]),
+            parse_mode=ParseMode.HTML
+        ))
+        log.debug("Help sent with photo", user_id=user_id, sample=100)
+    except Exception as e:
+        log.warning("Help photo failed", user_id=user_id, error=e)
+        await query.message.reply_text(
+            text=help_text,
+            disable_web_page_preview=True,
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("ᴄʜᴀɴɴᴇʟs", url="https://t.me/codeflix_bots"),
+                 InlineKeyboardButton("ᴄᴏɴᴛᴀᴄᴛ", url="https://t.me/ProYato")],
+                [InlineKeyboardButton('ʜᴏᴍᴇ', callback_data='start'),
+                 InlineKeyboardButton("ᴄʟᴏsᴇ", callback_data='close')]
+            ]),
+            parse_mode=ParseMode.HTML
+        )
+
+@nav.route("about")
+async def about_callback(client: Bot, query: CallbackQuery, args: str):
+    try:
+        await media.send("https://envs.sh/Wdj.jpg", lambda photo: query.edit_message_media(
+            InputMediaPhoto(
+                photo,
+                ABOUT_TXT
+            ),
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton('• ʙᴀᴄᴋ', callback_data='start'), InlineKeyboardButton('ᴄʟᴏsᴇ •', callback_data='close')]
+            ]),
+        ))
+    except:
+        await query.message.edit_text(
+            ABOUT_TXT,
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton('• ʙᴀᴄᴋ', callback_data='start'), InlineKeyboardButton('ᴄʟᴏsᴇ •', callback_data='close')]
+            ]),
+            parse_mode=ParseMode.HTML
         )
-        
-        help_text = (
-            f"<b>‼️ Hᴇʟʟᴏ {user_name} ~</b>\n\n"
-            f"<blockquote expandable>{help_content}</blockquote>\n"
-            "<b>◈ Sᴛɪʟʟ ʜᴀᴠᴇ ᴅᴏᴜʙᴛs, ᴄᴏɴᴛᴀᴄᴛ ʙᴇʟᴏᴡ ᴘᴇʀsᴏɴs/ɢʀᴏᴜᴘ ᴀs ᴘᴇʀ ʏᴏᴜʀ ɴᴇᴇᴅ !</b>"
+
+@nav.route("channels")
+async def channels_callback(client: Bot, query: CallbackQuery, args: str):
+    try:
+        await media.send("https://envs.sh/Wdj.jpg", lambda photo: query.edit_message_media(
+            InputMediaPhoto(photo, 
+                            CHANNELS_TXT
+            ),
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton('• ʙᴀᴄᴋ', callback_data='start'), InlineKeyboardButton('ᴄʟᴏsᴇ •', callback_data='close')]
+            ]),
+        ))
+    except:
+        await query.message.edit_text(
+            CHANNELS_TXT,
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton('• ʙᴀᴄᴋ', callback_data='start'), InlineKeyboardButton('ᴄʟᴏsᴇ •', callback_data='close')]
+            ]),
+            parse_mode=ParseMode.HTML
         )
-        
-        await query.message.delete()
-        help_pic = get_random_help_pic()
-        
-        try:
-            await query.message.reply_photo(
-                photo=help_pic,
-                caption=help_text,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("ᴄʜᴀɴɴᴇʟs", url="https://t.me/codeflix_bots"),
-                     InlineKeyboardButton("ᴄᴏɴᴛᴀᴄᴛ", url="https://t.me/ProYato")],
-                    [InlineKeyboardButton('ʜᴏᴍᴇ', callback_data='start'),
-                     InlineKeyboardButton("ᴄʟᴏsᴇ", callback_data='close')]
-                ]),
-                parse_mode=ParseMode.HTML
-            )
-            print(f"[CBB] ✅ Sent help with photo to {user_id}")
-        except Exception as e:
-            print(f"[CBB] ⚠️ Help photo failed for {user_id}: {e}")
-            await query.message.reply_text(
-                text=help_text,
-                disable_web_page_preview=True,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("ᴄʜᴀɴɴᴇʟs", url="https://t.me/codeflix_bots"),
-                     InlineKeyboardButton("ᴄᴏɴᴛᴀᴄᴛ", url="https://t.me/ProYato")],
-                    [InlineKeyboardButton('ʜᴏᴍᴇ', callback_data='start'),
-                     InlineKeyboardButton("ᴄʟᴏsᴇ", callback_data='close')]
-                ]),
-                parse_mode=ParseMode.HTML
-            )
-    
-    elif data == "about":
-        await query.message.delete()
-        start_pic = get_random_start_pic()
-        
-        try:
-            await query.message.reply_photo(
-                photo=start_pic,
-                caption=ABOUT_TXT,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton('ʜᴏᴍᴇ', callback_data='start'),
-                     InlineKeyboardButton('ᴄʟᴏsᴇ', callback_data='close')]
-                ]),
-                parse_mode=ParseMode.HTML
-            )
-            print(f"[CBB] ✅ Sent about with photo to {user_id}")
-        except Exception as e:
-            print(f"[CBB] ⚠️ About photo failed for {user_id}: {e}")
-            await query.message.reply_text(
-                text=ABOUT_TXT,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton('ʜᴏᴍᴇ', callback_data='start'),
-                     InlineKeyboardButton('ᴄʟᴏsᴇ', callback_data='close')]
-                ]),
-                parse_mode=ParseMode.HTML
-            )
-    
-    elif data == "channels":
-        await query.message.delete()
-        start_pic = get_random_start_pic()
-        
-        try:
-            await query.message.reply_photo(
-                photo=start_pic,
-                caption=CHANNELS_TXT,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton('ʜᴏᴍᴇ', callback_data='start'),
-                     InlineKeyboardButton('ᴄʟᴏsᴇ', callback_data='close')]
-                ]),
-                parse_mode=ParseMode.HTML
-            )
-            print(f"[CBB] ✅ Sent channels with photo to {user_id}")
-        except Exception as e:
-            print(f"[CBB] ⚠️ Channels photo failed for {user_id}: {e}")
-            await query.message.reply_text(
-                text=CHANNELS_TXT,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton('ʜᴏᴍᴇ', callback_data='start'),
-                     InlineKeyboardButton('ᴄʟᴏsᴇ', callback_data='close')]
-                ]),
-                parse_mode=ParseMode.HTML
-            )
-
-    elif data == "close":
-        await query.message.delete()
-        try:
-            await query.message.reply_to_message.delete()
-        except:
-            pass
-        print(f"[CBB] 🗑️ Closed message for user {user_id}")
-    
-    elif data in ["start", "home"]:
-        inline_buttons = InlineKeyboardMarkup([
+
+@nav.route("start", legacy="home")
+async def start_callback(client: Bot, query: CallbackQuery, args: str):
+    inline_buttons = InlineKeyboardMarkup(
+        [
             [InlineKeyboardButton("• ᴀʙᴏᴜᴛ", callback_data="about"),
              InlineKeyboardButton("• ᴄʜᴀɴɴᴇʟs", callback_data="channels")],
             [InlineKeyboardButton("• Close •", callback_data="close")]
-        ])
-        
-        start_pic = get_random_start_pic()
-        
-        try:
-            await query.message.delete()
-            await query.message.reply_photo(
-                photo=start_pic,
-                caption=START_MSG,
-                reply_markup=inline_buttons,
-                parse_mode=ParseMode.HTML
-            )
-            print(f"[CBB] ✅ Sent start/home with photo to {user_id}")
-        except Exception as e:
-            print(f"[CBB] ⚠️ Start/home photo failed for {user_id}: {e}")
-            try:
-                await query.message.delete()
-                await query.message.reply_text(
-                    text=START_MSG,
-                    reply_markup=inline_buttons,
-                    parse_mode=ParseMode.HTML
-                )
-            except:
-                # If delete fails, try editing
-                await query.message.edit_text(
-                    text=START_MSG,
-                    reply_markup=inline_buttons,
-                    parse_mode=ParseMode.HTML
-                )
-
-print("[CBB] ✅ Callback handler loaded successfully!")
+        ]
+    )
+    try:
+        await media.send(START_PIC, lambda photo: query.edit_message_media(
+            InputMediaPhoto(
+                photo,
+                START_MSG
+            ),
+            reply_markup=inline_buttons
+        ))
+    except Exception as e:
+        log.warning("Start/home photo failed", user_id=query.from_user.id, error=e)
+        await query.message.edit_text(
+            START_MSG,
+            reply_markup=inline_buttons,
+            parse_mode=ParseMode.HTML
+        )
+
+@nav.route("close")
+async def close_callback(client: Bot, query: CallbackQuery, args: str):
+    await query.message.delete()
+    try:
+        await query.message.reply_to_message.delete()
+    except:
+        pass
+
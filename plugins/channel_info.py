@@ -12,6 +12,10 @@ from bot import Bot
 from helper_func import is_owner_or_admin, encode
 from database.database import save_channel, delete_channel, save_encoded_link, save_encoded_link2
 from config import ADMINS, OWNER_ID
+from chat_cache import chat_cache
+from callback_router import router
+
+quick_routes = router.group("quick")
 
 @Bot.on_message(filters.command('id') & filters.private)
 async def get_channel_id(client: Bot, message: Message):
@@ -63,8 +67,8 @@ async def get_channel_id(client: Bot, message: Message):
         if user_id == OWNER_ID or user_id in ADMINS:
             keyboard = InlineKeyboardMarkup([
                 [
-                    InlineKeyboardButton("➕ Add Channel", callback_data=f"quickadd_{chat.id}"),
-                    InlineKeyboardButton("➖ Remove Channel", callback_data=f"quickdel_{chat.id}")
+                    InlineKeyboardButton("➕ Add Channel", callback_data=f"quickadd:{chat.id}"),
+                    InlineKeyboardButton("➖ Remove Channel", callback_data=f"quickdel:{chat.id}")
                 ],
                 [
                     InlineKeyboardButton("❌ Close", callback_data="close")
@@ -97,8 +101,8 @@ async def get_channel_id(client: Bot, message: Message):
     await message.reply(info_text, reply_markup=keyboard, quote=True, parse_mode=ParseMode.HTML)
 
 
-@Bot.on_callback_query(filters.regex(r"^quickadd_"))
-async def quick_add_channel(client: Bot, callback_query: CallbackQuery):
+@quick_routes.route("quickadd", legacy="quickadd_")
+async def quick_add_channel(client: Bot, callback_query: CallbackQuery, args: str):
     """Quick add channel from callback button"""
     user_id = callback_query.from_user.id
     
@@ -107,14 +111,14 @@ async def quick_add_channel(client: Bot, callback_query: CallbackQuery):
         return await callback_query.answer("⛔ Only admins can use this!", show_alert=True)
     
     try:
-        channel_id = int(callback_query.data.split("_")[1])
+        channel_id = int(args)
     except:
         return await callback_query.answer("❌ Invalid channel ID", show_alert=True)
     
     await callback_query.answer("⏳ Adding channel...", show_alert=False)
     
     try:
-        chat = await client.get_chat(channel_id)
+        chat = await chat_cache.get(client, channel_id, fresh=True)
 
         # Check permissions
         if chat.permissions:
@@ -169,8 +173,8 @@ async def quick_add_channel(client: Bot, callback_query: CallbackQuery):
         await callback_query.answer("❌ Error occurred", show_alert=True)
 
 
-@Bot.on_callback_query(filters.regex(r"^quickdel_"))
-async def quick_delete_channel(client: Bot, callback_query: CallbackQuery):
+@quick_routes.route("quickdel", legacy="quickdel_")
+async def quick_delete_channel(client: Bot, callback_query: CallbackQuery, args: str):
     """Quick delete channel from callback button"""
     user_id = callback_query.from_user.id
     
@@ -179,14 +183,14 @@ async def quick_delete_channel(client: Bot, callback_query: CallbackQuery):
         return await callback_query.answer("⛔ Only admins can use this!", show_alert=True)
     
     try:
-        channel_id = int(callback_query.data.split("_")[1])
+        channel_id = int(args)
     except:
         return await callback_query.answer("❌ Invalid channel ID", show_alert=True)
     
     await callback_query.answer("⏳ Removing channel...", show_alert=False)
     
     try:
-        chat = await client.get_chat(channel_id)
+        chat = await chat_cache.get(client, channel_id)
         channel_name = chat.title
     except:
         channel_name = f"Channel {channel_id}"
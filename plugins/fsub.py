@@ -4,12 +4,72 @@
 
 from bot import Bot
 from pyrogram import Client, filters
-from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
+from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, ChatMemberUpdated, ChatJoinRequest
 from pyrogram.errors import UserNotParticipant
 from pyrogram.enums import ChatMemberStatus, ParseMode
 from database.database import add_fsub_channel, remove_fsub_channel, get_fsub_channels
 from helper_func import is_owner_or_admin
-from config import ADMINS
+from cache import TTLCache
+from chat_cache import chat_cache
+from stats import stats
+from config import ADMINS, FSUB_MEMBER_CACHE_TTL, FSUB_MEMBER_NEG_CACHE_TTL, FSUB_MEMBER_CACHE_SIZE
+
+JOINED_STATUSES = (ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER)
+
+# ==================== FSUB MEMBERSHIP CACHE ====================
+
+class MembershipCache:
+    """FSub membership results keyed by (user_id, channel_id).
+
+    "Joined" results live for FSUB_MEMBER_CACHE_TTL, "not joined" results for
+    the much shorter FSUB_MEMBER_NEG_CACHE_TTL. Chat member updates and join
+    requests for the channels in `channel_ids` keep entries current.
+    """
+
+    def __init__(self, ttl: int, negative_ttl: int, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.negative_ttl = negative_ttl
+        # FSub channel IDs seen by the last gate check
+        self.channel_ids = frozenset()
+
+    def get(self, user_id: int, channel_id: int):
+        """Cached membership as True/False, or None on a miss"""
+        return self._cache.get((user_id, channel_id))
+
+    def set(self, user_id: int, channel_id: int, joined: bool):
+        self._cache.set((user_id, channel_id), joined, None if joined else self.negative_ttl)
+
+    def invalidate(self, user_id: int, channel_id: int):
+        self._cache.pop((user_id, channel_id))
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+membership_cache = MembershipCache(FSUB_MEMBER_CACHE_TTL, FSUB_MEMBER_NEG_CACHE_TTL, FSUB_MEMBER_CACHE_SIZE)
+stats.track_cache("fsub", membership_cache)
+
+# Group -1 so these run alongside the group 0 handlers (e.g. autoapprove)
+@Bot.on_chat_member_updated(group=-1)
+async def fsub_member_updated(client: Bot, update: ChatMemberUpdated):
+    """Feed joins and leaves in FSub channels into the membership cache"""
+    channel_id = update.chat.id
+    if channel_id not in membership_cache.channel_ids:
+        return
+
+    member = update.new_chat_member or update.old_chat_member
+    if not member or not member.user:
+        return
+
+    if update.new_chat_member and update.new_chat_member.status in JOINED_STATUSES:
+        membership_cache.set(member.user.id, channel_id, True)
+    else:
+        membership_cache.invalidate(member.user.id, channel_id)
+
+@Bot.on_chat_join_request(group=-1)
+async def fsub_join_requested(client: Bot, request: ChatJoinRequest):
+    """Drop the cached result for a user who just asked to join an FSub channel"""
+    if request.chat.id in membership_cache.channel_ids:
+        membership_cache.invalidate(request.from_user.id, request.chat.id)
 
 # ==================== FSUB MANAGEMENT COMMANDS ====================
 
@@ -29,7 +89,7 @@ async def add_fsub_command(client: Bot, message: Message):
     
     # Verify bot has access to the channel
     try:
-        chat = await client.get_chat(channel_id)
+        chat = await chat_cache.get(client, channel_id, fresh=True)
         
         # Check if bot is admin
         bot_member = await client.get_chat_member(channel_id, (await client.get_me()).id)
@@ -98,7 +158,7 @@ async def list_fsub_command(client: Bot, message: Message):
     
     for i, channel_id in enumerate(channels, 1):
         try:
-            chat = await client.get_chat(channel_id)
+            chat = await chat_cache.get(client, channel_id)
             invite_link = f"https://t.me/{chat.username}" if chat.username else "Private Channel"
             text += f"<b>{i}. {chat.title}</b>\n"
             text += f"   <b>➥ ID:</b> <code>{channel_id}</code>\n"
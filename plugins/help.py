@@ -17,6 +17,10 @@ from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram.enums import ParseMode
 from bot import Bot
 from config import *
+from media import media
+from logs import get_logger
+
+log = get_logger(__name__)
 
 # Default help pictures (can be customized via config)
 HELP_PICS = os.environ.get("HELP_PICS", "").split(",")
@@ -105,16 +109,16 @@ async def help_command(client: Bot, message: Message):
     
     try:
         # Try to send with photo
-        await message.reply_photo(
-            photo=help_pic,
+        await media.send(help_pic, lambda photo: message.reply_photo(
+            photo=photo,
             caption=help_text,
             reply_markup=keyboard,
             parse_mode=ParseMode.HTML,
             quote=True
-        )
+        ))
     except Exception as e:
         # Fallback to text-only if photo fails
-        print(f"Error sending help photo: {e}")
+        log.warning("Help photo failed", error=e)
         await message.reply_text(
             text=help_text,
             reply_markup=keyboard,
@@ -10,25 +10,20 @@ from database.database import save_channel, delete_channel, get_channels
 from config import *
 from database.database import *
 from helper_func import *
+from scheduler import scheduler
+from chat_cache import chat_cache
+from callback_router import router
+from logs import get_logger
 from datetime import datetime, timedelta
 
+log = get_logger(__name__)
+
 PAGE_SIZE = 6
+page_routes = router.group("pages")
 
-# Cache for chat information to avoid repeated API calls
-chat_info_cache = {}
-
-# Revoke invite link after 5-10 minutes
-async def revoke_invite_after_5_minutes(client: Bot, channel_id: int, link: str, is_request: bool = False):
-    await asyncio.sleep(300)  # 10 minutes
-    try:
-        if is_request:
-            await client.revoke_chat_invite_link(channel_id, link)
-            print(f"Jᴏɪɴ ʀᴇǫᴜᴇsᴛ ʟɪɴᴋ ʀᴇᴠᴏᴋᴇᴅ ғᴏʀ ᴄʜᴀɴɴᴇʟ {channel_id}")
-        else:
-            await client.revoke_chat_invite_link(channel_id, link)
-            print(f"Iɴᴠɪᴛᴇ ʟɪɴᴋ ʀᴇᴠᴏᴋᴇᴅ ғᴏʀ ᴄʜᴀɴɴᴇʟ {channel_id}")
-    except Exception as e:
-        print(f"Fᴀɪʟᴇᴅ ᴛᴏ ʀᴇᴠᴏᴋᴇ ɪɴᴠɪᴛᴇ ғᴏʀ ᴄʜᴀɴɴᴇʟ {channel_id}: {e}")
+# Revoke invite link after 5 minutes (persisted, survives restarts)
+def revoke_invite_after_5_minutes(channel_id: int, link: str):
+    scheduler.revoke_invite_later(channel_id, link, 300)
 
 # Add chat command - MODIFIED TO SUPPORT FORWARDED MESSAGES
 @Bot.on_message((filters.command('addchat') | filters.command('addch')) & is_owner_or_admin)
@@ -38,7 +33,7 @@ async def set_channel(client: Bot, message: Message):
     # Check if replying to a forwarded message from a channel
     if message.reply_to_message and message.reply_to_message.forward_from_chat:
         channel_id = message.reply_to_message.forward_from_chat.id
-        print(f"📥 Channel ID extracted from forwarded message: {channel_id}")
+        log.debug("Channel ID from forwarded message", channel_id=channel_id)
     # Otherwise check for command argument
     elif len(message.command) > 1:
         try:
@@ -59,7 +54,7 @@ async def set_channel(client: Bot, message: Message):
         )
     
     try:
-        chat = await client.get_chat(channel_id)
+        chat = await chat_cache.get(client, channel_id, fresh=True)
 
         # Check permissions based on chat type
         if chat.permissions:
@@ -112,7 +107,7 @@ async def del_channel(client: Bot, message: Message):
     # Check if replying to a forwarded message from a channel
     if message.reply_to_message and message.reply_to_message.forward_from_chat:
         channel_id = message.reply_to_message.forward_from_chat.id
-        print(f"📥 Channel ID extracted from forwarded message for deletion: {channel_id}")
+        log.debug("Channel ID from forwarded message", channel_id=channel_id)
     # Otherwise check for command argument
     elif len(message.command) > 1:
         try:
@@ -133,7 +128,7 @@ async def del_channel(client: Bot, message: Message):
         )
     
     try:
-        chat = await client.get_chat(channel_id)
+        chat = await chat_cache.get(client, channel_id)
         channel_name = chat.title
     except:
         channel_name = f"Channel {channel_id}"
@@ -171,19 +166,19 @@ async def send_channel_page(client, message, channels, page, status_msg=None, ed
     # Get all chat info concurrently
     chat_tasks = []
     for channel_id in channels[start_idx:end_idx]:
-        chat_tasks.append(get_chat_info(client, channel_id))
+        chat_tasks.append(chat_cache.get(client, channel_id))
     
     try:
         chat_infos = await asyncio.gather(*chat_tasks, return_exceptions=True)
     except Exception as e:
-        print(f"Error gathering chat info: {e}")
+        log.error("Gathering chat info failed", error=e)
         chat_infos = [None] * len(channels[start_idx:end_idx])
 
     row = []
     for i, chat_info in enumerate(chat_infos):
         channel_id = channels[start_idx + i]
         if isinstance(chat_info, Exception) or chat_info is None:
-            print(f"Error getting chat info for channel {channel_id}: {chat_info}")
+            log.warning("Chat info failed", channel_id=channel_id, error=chat_info)
             continue
             
         try:
@@ -196,16 +191,16 @@ async def send_channel_page(client, message, channels, page, status_msg=None, ed
                 buttons.append(row)
                 row = [] 
         except Exception as e:
-            print(f"Error for channel {channel_id}: {e}")
+            log.warning("Channel entry failed", channel_id=channel_id, error=e)
 
     if row: 
         buttons.append(row)
 
     nav_buttons = []
     if page > 0:
-        nav_buttons.append(InlineKeyboardButton("• Pʀᴇᴠɪᴏᴜs •", callback_data=f"channelpage_{page-1}"))
+        nav_buttons.append(InlineKeyboardButton("• Pʀᴇᴠɪᴏᴜs •", callback_data=f"chpage:{page-1}"))
     if page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton("• Nᴇxᴛ •", callback_data=f"channelpage_{page+1}"))
+        nav_buttons.append(InlineKeyboardButton("• Nᴇxᴛ •", callback_data=f"chpage:{page+1}"))
 
     if nav_buttons:
         buttons.append(nav_buttons)
@@ -216,9 +211,9 @@ async def send_channel_page(client, message, channels, page, status_msg=None, ed
     else:
         await message.reply("Sᴇʟᴇᴄᴛ ᴄʜᴀɴɴᴇʟ:", reply_markup=reply_markup)
 
-@Bot.on_callback_query(filters.regex(r"channelpage_(\d+)"))
-async def paginate_channels(client, callback_query):
-    page = int(callback_query.data.split("_")[1])
+@page_routes.route("chpage", legacy="channelpage_")
+async def paginate_channels(client, callback_query, args):
+    page = int(args)
     status_msg = await callback_query.message.edit_text("⏳")
     channels = await get_channels()
     await send_channel_page(client, callback_query.message, channels, page, status_msg=status_msg, edit=True)
@@ -251,19 +246,19 @@ async def send_request_page(client, message, channels, page, status_msg=None, ed
     # Get all chat info concurrently
     chat_tasks = []
     for channel_id in channels[start_idx:end_idx]:
-        chat_tasks.append(get_chat_info(client, channel_id))
+        chat_tasks.append(chat_cache.get(client, channel_id))
     
     try:
         chat_infos = await asyncio.gather(*chat_tasks, return_exceptions=True)
     except Exception as e:
-        print(f"Error gathering chat info: {e}")
+        log.error("Gathering chat info failed", error=e)
         chat_infos = [None] * len(channels[start_idx:end_idx])
 
     row = []
     for i, chat_info in enumerate(chat_infos):
         channel_id = channels[start_idx + i]
         if isinstance(chat_info, Exception) or chat_info is None:
-            print(f"Error getting chat info for channel {channel_id}: {chat_info}")
+            log.warning("Chat info failed", channel_id=channel_id, error=chat_info)
             continue
             
         try:
@@ -277,16 +272,16 @@ async def send_request_page(client, message, channels, page, status_msg=None, ed
                 buttons.append(row)
                 row = [] 
         except Exception as e:
-            print(f"Error generating request link for channel {channel_id}: {e}")
+            log.warning("Request link failed", channel_id=channel_id, error=e)
 
     if row: 
         buttons.append(row)
 
     nav_buttons = []
     if page > 0:
-        nav_buttons.append(InlineKeyboardButton("• Pʀᴇᴠɪᴏᴜs •", callback_data=f"reqpage_{page-1}"))
+        nav_buttons.append(InlineKeyboardButton("• Pʀᴇᴠɪᴏᴜs •", callback_data=f"reqpage:{page-1}"))
     if page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton("• Nᴇxᴛ •", callback_data=f"reqpage_{page+1}"))
+        nav_buttons.append(InlineKeyboardButton("• Nᴇxᴛ •", callback_data=f"reqpage:{page+1}"))
 
     if nav_buttons:
         buttons.append(nav_buttons) 
@@ -296,9 +291,9 @@ async def send_request_page(client, message, channels, page, status_msg=None, ed
     else:
         await message.reply("Sᴇʟᴇᴄᴛ ᴄʜᴀɴɴᴇʟ:", reply_markup=reply_markup)
 
-@Bot.on_callback_query(filters.regex(r"reqpage_(\d+)"))
-async def paginate_requests(client, callback_query):
-    page = int(callback_query.data.split("_")[1])
+@page_routes.route("reqpage", legacy="reqpage_")
+async def paginate_requests(client, callback_query, args):
+    page = int(args)
     status_msg = await callback_query.message.edit_text("⏳")
     channels = await get_channels()
     await send_request_page(client, callback_query.message, channels, page, status_msg=status_msg, edit=True)
@@ -333,7 +328,7 @@ async def send_links_page(client, message, channels, page, status_msg=None, edit
     tasks = []
     for channel_id in channels[start_idx:end_idx]:
         tasks.append(asyncio.gather(
-            get_chat_info(client, channel_id),
+            chat_cache.get(client, channel_id),
             save_encoded_link(channel_id),
             asyncio.create_task(encode(str(channel_id))),
             return_exceptions=True
@@ -342,7 +337,7 @@ async def send_links_page(client, message, channels, page, status_msg=None, edit
     try:
         results = await asyncio.gather(*tasks, return_exceptions=True)
     except Exception as e:
-        print(f"Error gathering link info: {e}")
+        log.error("Gathering link info failed", error=e)
         results = [None] * len(channels[start_idx:end_idx])
 
     for i, result in enumerate(results):
@@ -350,7 +345,7 @@ async def send_links_page(client, message, channels, page, status_msg=None, edit
         channel_id = channels[start_idx + i]
         
         if isinstance(result, Exception) or result is None or any(isinstance(r, Exception) for r in result):
-            print(f"Error getting info for channel {channel_id}: {result}")
+            log.warning("Link info failed", channel_id=channel_id, error=result)
             links_text += f"<b>{idx}. Channel {channel_id}</b> (Error)\n\n"
             continue
             
@@ -369,7 +364,7 @@ async def send_links_page(client, message, channels, page, status_msg=None, edit
             links_text += f"<b>➤ Rᴇǫᴜᴇsᴛ:</b> <code>{request_link}</code>\n\n"
             
         except Exception as e:
-            print(f"Error for channel {channel_id}: {e}")
+            log.warning("Channel entry failed", channel_id=channel_id, error=e)
             links_text += f"<b>{idx}. Channel {channel_id}</b> (Error)\n\n"
 
     # Add pagination info
@@ -379,9 +374,9 @@ async def send_links_page(client, message, channels, page, status_msg=None, edit
     buttons = []
     nav_buttons = []
     if page > 0:
-        nav_buttons.append(InlineKeyboardButton("• Pʀᴇᴠɪᴏᴜs •", callback_data=f"linkspage_{page-1}"))
+        nav_buttons.append(InlineKeyboardButton("• Pʀᴇᴠɪᴏᴜs •", callback_data=f"linkspage:{page-1}"))
     if page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton("• Nᴇxᴛ •", callback_data=f"linkspage_{page+1}"))
+        nav_buttons.append(InlineKeyboardButton("• Nᴇxᴛ •", callback_data=f"linkspage:{page+1}"))
 
     if nav_buttons:
         buttons.append(nav_buttons)
@@ -393,9 +388,9 @@ async def send_links_page(client, message, channels, page, status_msg=None, edit
     else:
         await message.reply(links_text, reply_markup=reply_markup)
 
-@Bot.on_callback_query(filters.regex(r"linkspage_(\d+)"))
-async def paginate_links(client, callback_query):
-    page = int(callback_query.data.split("_")[1])
+@page_routes.route("linkspage", legacy="linkspage_")
+async def paginate_links(client, callback_query, args):
+    page = int(args)
     status_msg = await callback_query.message.edit_text("⏳")
     channels = await get_channels()
     await send_links_page(client, callback_query.message, channels, page, status_msg=status_msg, edit=True)
@@ -413,7 +408,7 @@ async def bulk_link(client: Bot, message: Message):
     for idx, id_str in enumerate(ids, start=1):
         try:
             channel_id = int(id_str)
-            chat = await client.get_chat(channel_id)
+            chat = await chat_cache.get(client, channel_id)
             base64_invite = await save_encoded_link(channel_id)
             normal_link = f"https://t.me/{client.username}?start={base64_invite}"
             base64_request = await encode(str(channel_id))
@@ -442,12 +437,7 @@ async def generate_link_command(client: Bot, message: Message):
         base64_request = await encode(str(channel_id))
         await save_encoded_link2(channel_id, base64_request)
         # Store the original link in the database
-        from database.database import channels_collection
-        await channels_collection.update_one(
-            {"channel_id": channel_id},
-            {"$set": {"original_link": link}},
-            upsert=True
-        )
+        await save_original_link(channel_id, link)
         normal_link = f"https://t.me/{client.username}?start={base64_invite}"
         request_link = f"https://t.me/{client.username}?start=req_{base64_request}"
         reply_text = (
@@ -486,12 +476,12 @@ async def send_channel_ids_page(client, message, channels, page, status_msg=None
     # Get all chat info concurrently
     chat_tasks = []
     for channel_id in channels[start_idx:end_idx]:
-        chat_tasks.append(get_chat_info(client, channel_id))
+        chat_tasks.append(chat_cache.get(client, channel_id))
     
     try:
         chat_infos = await asyncio.gather(*chat_tasks, return_exceptions=True)
     except Exception as e:
-        print(f"Error gathering chat info: {e}")
+        log.error("Gathering chat info failed", error=e)
         chat_infos = [None] * len(channels[start_idx:end_idx])
     
     text = "<b>➤ Cᴏɴɴᴇᴄᴛᴇᴅ Cʜᴀɴɴᴇʟs (ID & Name):</b>\n\n"
@@ -511,9 +501,9 @@ async def send_channel_ids_page(client, message, channels, page, status_msg=None
     buttons = []
     nav_buttons = []
     if page > 0:
-        nav_buttons.append(InlineKeyboardButton("• Pʀᴇᴠɪᴏᴜs •", callback_data=f"channelids_{page-1}"))
+        nav_buttons.append(InlineKeyboardButton("• Pʀᴇᴠɪᴏᴜs •", callback_data=f"idspage:{page-1}"))
     if page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton("• Nᴇxᴛ •", callback_data=f"channelids_{page+1}"))
+        nav_buttons.append(InlineKeyboardButton("• Nᴇxᴛ •", callback_data=f"idspage:{page+1}"))
     if nav_buttons:
         buttons.append(nav_buttons)
         
@@ -523,31 +513,9 @@ async def send_channel_ids_page(client, message, channels, page, status_msg=None
     else:
         await message.reply(text, reply_markup=reply_markup)
 
-@Bot.on_callback_query(filters.regex(r"channelids_(\d+)"))
-async def paginate_channel_ids(client, callback_query):
-    page = int(callback_query.data.split("_")[1])
+@page_routes.route("idspage", legacy="channelids_")
+async def paginate_channel_ids(client, callback_query, args):
+    page = int(args)
     status_msg = await callback_query.message.edit_text("⏳")
     channels = await get_channels()
     await send_channel_ids_page(client, callback_query.message, channels, page, status_msg=status_msg, edit=True)
-
-# Helper function to get chat info with caching
-async def get_chat_info(client, channel_id):
-    # Check cache first
-    if channel_id in chat_info_cache:
-        cached_info, timestamp = chat_info_cache[channel_id]
-        # Cache for 5 minutes
-        if (datetime.now() - timestamp).total_seconds() < 300:
-            return cached_info
-    
-    # Fetch fresh info
-    try:
-        chat_info = await client.get_chat(channel_id)
-        # Cache the result
-        chat_info_cache[channel_id] = (chat_info, datetime.now())
-        return chat_info
-    except Exception as e:
-        print(f"Error getting chat info for {channel_id}: {e}")
-        # Return cached info even if stale if we can't get fresh info
-        if channel_id in chat_info_cache:
-            return chat_info_cache[channel_id][0]
-        raise e
@@ -1,7 +1,48 @@
 from aiohttp import web
 
+from metrics import registry
+from stats import stats
+from scheduler import scheduler
+from broadcast import broadcaster
+
 routes = web.RouteTableDef()
 
 @routes.get("/", allow_head=True)
 async def root_route_handler(request):
     return web.json_response("BeatAnime - Links Share")
+
+@routes.get("/metrics")
+async def metrics_handler(request):
+    return web.Response(body=registry.render().encode(),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+# Values owned by other modules, read only when /metrics is scraped
+
+@registry.collect("counter", "bot_cache_hits_total", "Cache hits by cache", ("cache",))
+def _cache_hits():
+    return {(name,): c["hits"] for name, c in stats.cache_stats().items()}
+
+@registry.collect("counter", "bot_cache_misses_total", "Cache misses by cache", ("cache",))
+def _cache_misses():
+    return {(name,): c["misses"] for name, c in stats.cache_stats().items()}
+
+@registry.collect("gauge", "bot_cache_hit_ratio", "Cache hit ratio since start by cache", ("cache",))
+def _cache_hit_ratio():
+    return {(name,): c["hit_rate"] for name, c in stats.cache_stats().items()}
+
+@registry.collect("gauge", "bot_cache_entries", "Cache entries by cache", ("cache",))
+def _cache_entries():
+    return {(name,): c["size"] for name, c in stats.cache_stats().items()}
+
+@registry.collect("gauge", "bot_scheduled_jobs_pending", "Scheduled revokes and deletions not yet run")
+def _scheduled_jobs():
+    return {(): scheduler.pending}
+
+@registry.collect("gauge", "bot_broadcast_running", "1 while a broadcast is running")
+def _broadcast_running():
+    return {(): int(broadcaster.running)}
+
+@registry.collect("gauge", "bot_stats", "Row counts and event counters shown by /status", ("name",))
+def _stats_counters():
+    return {(name,): value for name, value in stats.snapshot().items()}
@@ -1,8 +1,6 @@
 import asyncio
 import base64
 import time
-from asyncio import Lock
-from collections import defaultdict
 from pyrogram import Client, filters
 from pyrogram.enums import ParseMode, ChatMemberStatus, ChatAction
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, InputMediaPhoto
@@ -16,36 +14,86 @@ from datetime import datetime, timedelta
 from config import *
 from database.database import *
 from plugins.newpost import revoke_invite_after_5_minutes
+from plugins.fsub import membership_cache
+from invite_pool import invite_pool
+from scheduler import scheduler
+from broadcast import broadcaster
+from stats import stats
+from chat_cache import chat_cache
+from fsub_panel import fsub_panel
+from media import media
+from callback_router import router
+from cache import TTLCache, KeyedLocks
+from metrics import start_latency, fsub_latency
 from helper_func import *
+from logs import get_logger
 
-# Create a lock dictionary for each channel to prevent concurrent link generation
-channel_locks = defaultdict(asyncio.Lock)
+log = get_logger(__name__)
 
-user_banned_until = {}
+# Per-channel locks to prevent concurrent link generation; idle locks are dropped
+channel_locks = KeyedLocks()
+stats.track_cache("channel_locks", channel_locks)
 
-# Broadcast variables
-cancel_lock = asyncio.Lock()
-is_canceled = False
+# user_id -> datetime the temporary ban ends; set() with the ban length as ttl
+user_banned_until = TTLCache(maxsize=TEMP_BAN_CACHE_SIZE, ttl=3600)
+stats.track_cache("temp_bans", user_banned_until)
 
-# Create a global dictionary to store chat data
-chat_data_cache = {}
+fsub_routes = router.group("fsub")
+fsub_mode_routes = router.group("fsub_mode")
+
+# Caps concurrent get_chat_member RPCs across all users (FSUB_CHECK_CONCURRENCY)
+fsub_check_semaphore = asyncio.Semaphore(FSUB_CHECK_CONCURRENCY)
 
 async def is_user_joined_channel(client: Client, user_id: int, chat_id: int) -> bool:
     """Check if user has joined a specific channel"""
+    joined = membership_cache.get(user_id, chat_id)
+    if joined is not None:
+        return joined
+
     try:
-        member = await client.get_chat_member(chat_id, user_id)
-        if member.status in [ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
-            return True
-        return False
+        async with fsub_check_semaphore:
+            member = await client.get_chat_member(chat_id, user_id)
+        joined = member.status in [ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]
     except UserNotParticipant:
-        return False
+        joined = False
     except Exception as e:
-        print(f"⚠️ Error checking membership for user {user_id} in channel {chat_id}: {e}")
-        # In case of error, assume user hasn't joined to be safe
+        log.warning("Membership check failed", user_id=user_id, channel_id=chat_id, error=e)
+        # In case of error, assume user hasn't joined to be safe (not cached)
         return False
 
+    membership_cache.set(user_id, chat_id, joined)
+    return joined
+
+def _not_joined_entry(channel_id: int, chat) -> dict:
+    """Panel entry for a channel; without chat metadata the button still gets a join link"""
+    return {
+        'id': channel_id,
+        'title': chat.title if chat else "Join Channel",
+        'username': chat.username if chat else None,
+        'chat': chat
+    }
+
+async def _check_fsub_channel(client: Client, user_id: int, channel_id: int):
+    """Return the not-joined entry for a channel, or None if the user is a member"""
+    if await is_user_joined_channel(client, user_id, channel_id):
+        log.debug("Already joined", user_id=user_id, channel_id=channel_id, sample=100)
+        return None
+
+    # Get channel info
+    chat = await chat_cache.get(client, channel_id)
+
+    log.debug("Not joined", user_id=user_id, channel_id=channel_id, sample=100)
+    return _not_joined_entry(channel_id, chat)
+
+@fsub_latency.time()
 async def get_fsub_channels_not_joined(client: Client, user_id: int) -> list:
-    """Get list of FSub channels the user hasn't joined yet"""
+    """Get list of FSub channels the user hasn't joined yet
+
+    All channels are checked concurrently (bounded by fsub_check_semaphore) and
+    the whole check is cut off after FSUB_CHECK_TIMEOUT seconds. Channels that
+    time out or fail are treated like any other membership error: not joined,
+    with a minimal panel entry if the chat metadata is not cached.
+    """
     not_joined = []
     
     try:
@@ -53,146 +101,57 @@ async def get_fsub_channels_not_joined(client: Client, user_id: int) -> list:
         fsub_channels = await db.show_channels()
         
         if not fsub_channels:
-            print("ℹ️ No FSub channels configured")
+            log.debug("No FSub channels configured", sample=1000)
             return []
         
-        print(f"📋 Checking {len(fsub_channels)} FSub channels for user {user_id}")
+        log.debug("Checking FSub channels", user_id=user_id, channels=len(fsub_channels), sample=100)
+        membership_cache.channel_ids = frozenset(fsub_channels)
         
-        for channel_id in fsub_channels:
-            try:
-                # Check if user has joined this channel
-                is_joined = await is_user_joined_channel(client, user_id, channel_id)
-                
-                if not is_joined:
-                    # Get channel info
-                    try:
-                        if channel_id in chat_data_cache:
-                            chat = chat_data_cache[channel_id]
-                        else:
-                            chat = await client.get_chat(channel_id)
-                            chat_data_cache[channel_id] = chat
-                        
-                        not_joined.append({
-                            'id': channel_id,
-                            'title': chat.title,
-                            'username': chat.username,
-                            'chat': chat
-                        })
-                        print(f"❌ User {user_id} NOT joined: {chat.title} ({channel_id})")
-                    except Exception as e:
-                        print(f"⚠️ Error getting info for channel {channel_id}: {e}")
-                else:
-                    print(f"✅ User {user_id} already joined channel {channel_id}")
-                    
-            except Exception as e:
-                print(f"⚠️ Error processing channel {channel_id}: {e}")
+        tasks = [
+            asyncio.create_task(_check_fsub_channel(client, user_id, channel_id))
+            for channel_id in fsub_channels
+        ]
+        _, pending = await asyncio.wait(tasks, timeout=FSUB_CHECK_TIMEOUT)
+        for task in pending:
+            task.cancel()
+
+        # Collect results in configured channel order; report failures per channel
+        failed = {}
+        for channel_id, task in zip(fsub_channels, tasks):
+            if task in pending or task.exception() is not None:
+                # Fail closed: an unverified channel keeps the user at the panel
+                failed[channel_id] = f"timed out after {FSUB_CHECK_TIMEOUT}s" if task in pending else task.exception()
+                not_joined.append(_not_joined_entry(channel_id, chat_cache.peek(channel_id)))
+                continue
+            entry = task.result()
+            if entry:
+                not_joined.append(entry)
+
+        for channel_id, reason in failed.items():
+            log.warning("FSub channel check failed", channel_id=channel_id, reason=reason)
                 
     except Exception as e:
-        print(f"❌ Error in get_fsub_channels_not_joined: {e}")
+        log.error("FSub check failed", user_id=user_id, error=e)
     
     return not_joined
 
 async def show_fsub_panel(client: Client, message: Message, not_joined_channels: list, original_start_param: str = None, edit: bool = False):
     """Display the Force Subscribe panel with join buttons"""
-    buttons = []
-    
-    print(f"🔧 Creating FSub panel for {len(not_joined_channels)} channels")
-    
-    for idx, channel_info in enumerate(not_joined_channels, 1):
-        channel_id = channel_info['id']
-        chat = channel_info['chat']
-        
-        try:
-            print(f"  Processing channel {idx}: {chat.title} ({channel_id})")
-            
-            # Get channel mode (request link or normal invite) with error handling
-            try:
-                mode = await db.get_channel_mode(channel_id)
-                print(f"    Mode: {mode}")
-            except Exception as mode_error:
-                print(f"    ⚠️ Error getting mode, using 'off' as default: {mode_error}")
-                mode = "off"
-            
-            # Generate invite link for the ACTUAL CHANNEL, not the bot
-            if mode == "on" and not chat.username:
-                # Create request link for the CHANNEL
-                print(f"    Creating request link for channel...")
-                try:
-                    invite = await client.create_chat_invite_link(
-                        chat_id=channel_id,
-                        creates_join_request=True,
-                        expire_date=datetime.utcnow() + timedelta(seconds=FSUB_LINK_EXPIRY) if FSUB_LINK_EXPIRY else None
-                    )
-                    link = invite.invite_link
-                    print(f"    ✅ Request link created: {link}")
-                except Exception as e:
-                    print(f"    ⚠️ Failed to create request link, falling back to normal invite: {e}")
-                    # Fall back to normal invite
-                    invite = await client.create_chat_invite_link(
-                        chat_id=channel_id,
-                        expire_date=datetime.utcnow() + timedelta(seconds=FSUB_LINK_EXPIRY) if FSUB_LINK_EXPIRY else None
-                    )
-                    link = invite.invite_link
-            else:
-                # Create normal invite link or use username for the CHANNEL
-                if chat.username:
-                    link = f"https://t.me/{chat.username}"
-                    print(f"    ✅ Using public channel link: @{chat.username}")
-                else:
-                    print(f"    Creating invite link for channel...")
-                    invite = await client.create_chat_invite_link(
-                        chat_id=channel_id,
-                        expire_date=datetime.utcnow() + timedelta(seconds=FSUB_LINK_EXPIRY) if FSUB_LINK_EXPIRY else None
-                    )
-                    link = invite.invite_link
-                    print(f"    ✅ Invite link created: {link}")
-            
-            # Add button for this channel - Each channel on its own row for better visibility
-            button_text = f" {chat.title.upper()}"
-            buttons.append([InlineKeyboardButton(text=button_text, url=link)])
-            print(f"    ✅ Button added: {button_text} -> {link}")
-            
-        except Exception as e:
-            print(f"    ❌ Error creating button for channel {channel_id}: {e}")
-            import traceback
-            traceback.print_exc()
-            # Try to add a basic link if possible
-            try:
-                if chat.username:
-                    link = f"https://t.me/{chat.username}"
-                    buttons.append([InlineKeyboardButton(
-                        text=f" {chat.title.upper()}", 
-                        url=link
-                    )])
-                else:
-                    # Can't create button without proper link
-                    print(f"    ⚠️ Skipping channel {chat.title} - no username and invite failed")
-            except:
-                pass
-    
-    # Check if we have any buttons
-    if not buttons:
-        print("⚠️ No buttons were created! Falling back to text message.")
+    log.debug("Building FSub panel", channels=len(not_joined_channels), sample=100)
+
+    # Use callback data to pass the original start parameter
+    callback_data = f"retry:{original_start_param}" if original_start_param else "retry"
+    # Cached modes, shared join links and memoized keyboards: no RPCs in the common case
+    reply_markup = await fsub_panel.markup(client, not_joined_channels, callback_data)
+
+    if reply_markup is None:
+        log.warning("FSub panel has no buttons, falling back to text")
         await message.reply_text(
             "<b>⚠️ Please contact admin - FSub channels configured but buttons failed to generate.</b>",
             parse_mode=ParseMode.HTML
         )
         return
     
-    # Add "Try Again" button - Use callback to delete old panel
-    try:
-        # Use callback data to pass the original start parameter
-        callback_data = f"fsub_retry_{original_start_param}" if original_start_param else "fsub_retry_none"
-        
-        # Add reload button after all channel buttons
-        buttons.append([InlineKeyboardButton(text='♻️ Try Again', callback_data=callback_data)])
-        print(f"✅ Reload button added with callback: {callback_data}")
-    except Exception as e:
-        print(f"⚠️ Error adding reload button: {e}")
-        buttons.append([InlineKeyboardButton(text='♻️ Try Again', callback_data="fsub_retry_none")])
-    
-    print(f"✅ Total buttons created: {len(buttons)}")
-    
     # Send FSub message
     try:
         # Create the message text
@@ -215,38 +174,34 @@ async def show_fsub_panel(client: Client, message: Message, not_joined_channels:
         if edit:
             # Edit the existing message
             try:
-                await message.edit_media(
+                await media.send(FORCE_PIC, lambda photo: message.edit_media(
                     InputMediaPhoto(
-                        media=FORCE_PIC,
+                        media=photo,
                         caption=full_caption,
                     ),
-                    reply_markup=InlineKeyboardMarkup(buttons)
-                )
-                print(f"✅ FSub panel edited successfully for user {message.from_user.id if hasattr(message, 'from_user') else 'unknown'}")
+                    reply_markup=reply_markup
+                ))
             except Exception as edit_error:
-                print(f"⚠️ Error editing message, trying to delete and send new: {edit_error}")
+                log.warning("FSub panel edit failed, re-sending", error=edit_error)
                 # If edit fails, delete and send new
                 await message.delete()
-                await message.chat.send_photo(
-                    photo=FORCE_PIC,
+                await media.send(FORCE_PIC, lambda photo: message.chat.send_photo(
+                    photo=photo,
                     caption=full_caption,
-                    reply_markup=InlineKeyboardMarkup(buttons),
+                    reply_markup=reply_markup,
                     parse_mode=ParseMode.HTML
-                )
+                ))
         else:
             # Send new message
-            await message.reply_photo(
-                photo=FORCE_PIC,
+            await media.send(FORCE_PIC, lambda photo: message.reply_photo(
+                photo=photo,
                 caption=full_caption,
-                reply_markup=InlineKeyboardMarkup(buttons),
+                reply_markup=reply_markup,
                 parse_mode=ParseMode.HTML
-            )
-            print(f"✅ FSub panel sent successfully to user {message.from_user.id}")
+            ))
         
     except Exception as e:
-        print(f"❌ Error sending FSub panel with photo: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Sending FSub panel with photo failed")
         
         # Fallback to text message
         try:
@@ -255,7 +210,7 @@ async def show_fsub_panel(client: Client, message: Message, not_joined_channels:
                     f"<b>⚠️ Please join the following channels to use this bot:</b>\n\n" + 
                     "\n".join([f"{ch['title']}" for ch in not_joined_channels]) +
                     f"\n\n<b>After joining, click the TRY AGAIN button below.</b>",
-                    reply_markup=InlineKeyboardMarkup(buttons),
+                    reply_markup=reply_markup,
                     parse_mode=ParseMode.HTML
                 )
             else:
@@ -263,61 +218,91 @@ async def show_fsub_panel(client: Client, message: Message, not_joined_channels:
                     f"<b>⚠️ Please join the following channels to use this bot:</b>\n\n" + 
                     "\n".join([f"{ch['title']}" for ch in not_joined_channels]) +
                     f"\n\n<b>After joining, click the TRY AGAIN button below.</b>",
-                    reply_markup=InlineKeyboardMarkup(buttons),
+                    reply_markup=reply_markup,
                     parse_mode=ParseMode.HTML
                 )
-            print(f"✅ FSub panel sent as text (fallback)")
         except Exception as e2:
-            print(f"❌ Complete failure sending FSub panel: {e2}")
+            log.error("Sending FSub panel failed", error=e2)
             await message.reply_text(
                 "⚠️ Error displaying force subscribe panel. Please contact admin.",
                 parse_mode=ParseMode.HTML
             )
 
-async def delete_after_delay(msg, delay):
-    """Auto-delete message after delay"""
-    await asyncio.sleep(delay)
-    try:
-        await msg.delete()
-    except:
-        pass
+async def get_invite_link_for(client: Client, channel_id: int, is_request: bool):
+    """Return (invite_link, is_request_link) for a channel.
+
+    A pre-minted link from the invite pool is used when one is ready. A miss
+    marks the channel hot, so the pool fills it in the background and only
+    the first users of a cold channel take the fallback: the channel's
+    current link is reused while it is less than 4 minutes old; otherwise a
+    new 10 minute link is created and saved. Only that one RPC runs under the
+    channel lock (waiters then reuse the new link); the old link is revoked
+    by the scheduler, off the request path.
+    """
+    pooled_link = invite_pool.take(channel_id, is_request)
+    if pooled_link:
+        stats.incr("links_served")
+        return pooled_link, is_request
+
+    # Use a lock for this channel to prevent concurrent link generation
+    async with channel_locks[channel_id]:
+        record = await get_channel_record(channel_id)
+        current_time = datetime.now()
+
+        if record and record.is_active and record.current_invite_link:
+            link_created_time = record.invite_link_created_at
+            if link_created_time and (current_time - link_created_time).total_seconds() < 240:  # 4 minutes
+                log.debug("Reusing invite link", channel_id=channel_id)
+                stats.incr("links_served")
+                return record.current_invite_link, record.is_request_link
+
+            # Replaced below; revoked in the background instead of holding the lock
+            scheduler.revoke_invite_later(channel_id, record.current_invite_link, 0)
+
+        invite = await client.create_chat_invite_link(
+            chat_id=channel_id,
+            expire_date=current_time + timedelta(minutes=10),
+            creates_join_request=is_request
+        )
+        await save_invite_link(channel_id, invite.invite_link, is_request)
+        log.debug("Created invite link", channel_id=channel_id, request=is_request)
+
+    revoke_invite_after_5_minutes(channel_id, invite.invite_link)
+    stats.incr("links_served")
+    return invite.invite_link, is_request
 
 @Bot.on_message(filters.command('start') & filters.private)
+@start_latency.time()
 async def start_command(client: Bot, message: Message):
     user_id = message.from_user.id
 
-    print(f"\n{'='*50}")
-    print(f"📨 /start command from user {user_id} ({message.from_user.first_name})")
-    print(f"{'='*50}")
+    log.debug("/start", user_id=user_id, sample=100)
 
     # ✅ STEP 1: CHECK IF USER IS BANNED
     try:
         is_banned = await db.ban_user_exist(user_id)
         if is_banned:
-            print(f"🚫 User {user_id} is BANNED")
+            log.info("Banned user blocked", user_id=user_id)
             return await message.reply_text(
                 f"<b>🚫 Yᴏᴜ ᴀʀᴇ ʙᴀɴɴᴇᴅ ғʀᴏᴍ ᴜsɪɴɢ ᴛʜɪs ʙᴏᴛ!</b>\n\n"
                 f"<b>Cᴏɴᴛᴀᴄᴛ:</b> {BAN_SUPPORT if 'BAN_SUPPORT' in globals() else 'Bot Admin'}",
                 parse_mode=ParseMode.HTML
             )
     except Exception as e:
-        print(f"⚠️ Error checking ban status: {e}")
+        log.warning("Ban check failed", user_id=user_id, error=e)
 
     # Check if user is temporarily banned (spam protection)
-    if user_id in user_banned_until:
-        if datetime.now() < user_banned_until[user_id]:
-            print(f"⏳ User {user_id} temporarily banned until {user_banned_until[user_id]}")
+    banned_until = user_banned_until.get(user_id)
+    if banned_until is not None:
+        if datetime.now() < banned_until:
+            log.info("Temporarily banned user blocked", user_id=user_id, until=banned_until)
             return await message.reply_text(
                 "<b><blockquote expandable>You are temporarily banned from using commands due to spamming. Try again later.</blockquote></b>",
                 parse_mode=ParseMode.HTML
             )
     
-    # ✅ STEP 2: ADD USER TO DATABASE
-    try:
-        await add_user(user_id)
-        print(f"✅ User {user_id} added/verified in database")
-    except Exception as e:
-        print(f"⚠️ Error adding user to database: {e}")
+    # ✅ STEP 2: ADD USER TO DATABASE (queued, written in bulk in the background)
+    user_registrar.register(user_id)
 
     # ✅ STEP 3: Parse start parameter FIRST (before FSub check)
     text = message.text
@@ -327,53 +312,41 @@ async def start_command(client: Bot, message: Message):
     if len(text) > 7:
         start_param = text.split(" ", 1)[1]
         is_refresh = start_param == "refresh"
-        print(f"🔗 Start parameter detected: {start_param} (is_refresh: {is_refresh})")
+        log.debug("Start parameter", user_id=user_id, param=start_param, refresh=is_refresh, sample=100)
 
     # ✅ STEP 4: CHECK FORCE SUBSCRIPTION
     try:
         not_joined_channels = await get_fsub_channels_not_joined(client, user_id)
         
         if not_joined_channels:
-            print(f"❌ User {user_id} needs to join {len(not_joined_channels)} channel(s)")
-            print(f"   Channels: {[ch['title'] for ch in not_joined_channels]}")
+            log.debug("FSub gate", user_id=user_id, not_joined=len(not_joined_channels), sample=100)
             # Pass the original start parameter to FSub panel so it can be preserved
             await show_fsub_panel(client, message, not_joined_channels, start_param if not is_refresh else None)
             return
-        else:
-            print(f"✅ User {user_id} joined all FSub channels (or none configured)")
     except Exception as e:
-        print(f"❌ Error checking FSub: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("FSub check failed", user_id=user_id)
 
     # ✅ STEP 5: PROCESS START PARAMETER (if any and not refresh)
     if start_param and not is_refresh:
-        print(f"🔗 Processing start parameter...")
         try:
-            base64_string = start_param
-            is_request = base64_string.startswith("req_")
+            is_request = start_param.startswith("req_")
+            record = await resolve_start_param(start_param)
             
-            if is_request:
-                base64_string = base64_string[4:]
-                channel_id = await get_channel_by_encoded_link2(base64_string)
-            else:
-                channel_id = await get_channel_by_encoded_link(base64_string)
-            
-            if not channel_id:
-                print(f"❌ Invalid encoded link: {base64_string}")
+            if not record:
+                log.info("Invalid start parameter", user_id=user_id, param=start_param)
                 return await message.reply_text(
                     "<b><blockquote expandable>Invalid or expired invite link.</blockquote></b>",
                     parse_mode=ParseMode.HTML
                 )
 
-            print(f"✅ Decoded channel_id: {channel_id}")
+            channel_id = record.channel_id
 
             # Check if this is a /genlink link (original_link exists)
-            original_link = await get_original_link(channel_id)
-            if original_link:
-                print(f"🔗 Providing original link: {original_link}")
+            if record.original_link:
+                log.debug("Serving original link", channel_id=channel_id, sample=100)
+                stats.incr("links_served")
                 button = InlineKeyboardMarkup(
-                    [[InlineKeyboardButton("• Proceed to Link •", url=original_link)]]
+                    [[InlineKeyboardButton("• Proceed to Link •", url=record.original_link)]]
                 )
                 return await message.reply_text(
                     "<b><blockquote expandable>ʜᴇʀᴇ ɪs ʏᴏᴜʀ ʟɪɴᴋ! ᴄʟɪᴄᴋ ʙᴇʟᴏᴡ ᴛᴏ ᴘʀᴏᴄᴇᴇᴅ</blockquote></b>",
@@ -381,49 +354,7 @@ async def start_command(client: Bot, message: Message):
                     parse_mode=ParseMode.HTML
                 )
 
-            # Use a lock for this channel to prevent concurrent link generation
-            async with channel_locks[channel_id]:
-                # Check if we already have a valid link
-                old_link_info = await get_current_invite_link(channel_id)
-                current_time = datetime.now()
-                
-                # If we have an existing link and it's not expired yet (assuming 5 minutes validity)
-                if old_link_info:
-                    link_created_time = await get_link_creation_time(channel_id)
-                    if link_created_time and (current_time - link_created_time).total_seconds() < 240:  # 4 minutes
-                        # Use existing link
-                        invite_link = old_link_info["invite_link"]
-                        is_request_link = old_link_info["is_request"]
-                        print(f"♻️ Reusing existing invite link")
-                    else:
-                        # Revoke old link and create new one
-                        try:
-                            await client.revoke_chat_invite_link(channel_id, old_link_info["invite_link"])
-                            print(f"🗑️ Revoked old {'request' if old_link_info['is_request'] else 'invite'} link")
-                        except Exception as e:
-                            print(f"⚠️ Failed to revoke old link: {e}")
-                        
-                        # Create new link
-                        invite = await client.create_chat_invite_link(
-                            chat_id=channel_id,
-                            expire_date=current_time + timedelta(minutes=10),
-                            creates_join_request=is_request
-                        )
-                        invite_link = invite.invite_link
-                        is_request_link = is_request
-                        await save_invite_link(channel_id, invite_link, is_request_link)
-                        print(f"✅ Created new {'request' if is_request else 'invite'} link")
-                else:
-                    # Create new link
-                    invite = await client.create_chat_invite_link(
-                        chat_id=channel_id,
-                        expire_date=current_time + timedelta(minutes=10),
-                        creates_join_request=is_request
-                    )
-                    invite_link = invite.invite_link
-                    is_request_link = is_request
-                    await save_invite_link(channel_id, invite_link, is_request_link)
-                    print(f"✅ Created new {'request' if is_request else 'invite'} link")
+            invite_link, is_request_link = await get_invite_link_for(client, channel_id, is_request)
 
             button_text = "• ʀᴇǫᴜᴇsᴛ ᴛᴏ ᴊᴏɪɴ •" if is_request_link else "• ᴊᴏɪɴ ᴄʜᴀɴɴᴇʟ •"
             button = InlineKeyboardMarkup([[InlineKeyboardButton(button_text, url=invite_link)]])
@@ -443,20 +374,16 @@ async def start_command(client: Bot, message: Message):
             )
 
             # Auto-delete the note message after 5 minutes
-            asyncio.create_task(delete_after_delay(note_msg, 300))
-            asyncio.create_task(revoke_invite_after_5_minutes(client, channel_id, invite_link, is_request_link))
+            scheduler.delete_message_later(note_msg.chat.id, note_msg.id, 300)
 
         except Exception as e:
-            print(f"❌ Error processing start parameter: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Start parameter failed", user_id=user_id, param=start_param)
             await message.reply_text(
                 "<b><blockquote expandable>Invalid or expired invite link.</blockquote></b>",
                 parse_mode=ParseMode.HTML
             )
     else:
         # ✅ STEP 6: SEND WELCOME MESSAGE (no start parameter or just refresh)
-        print(f"📬 Sending welcome message to user {user_id}")
         inline_buttons = InlineKeyboardMarkup(
             [
                 [InlineKeyboardButton("• ᴀʙᴏᴜᴛ", callback_data="about"),
@@ -466,16 +393,15 @@ async def start_command(client: Bot, message: Message):
         )
         
         try:
-            await message.reply_photo(
-                photo=START_PIC,
+            await media.send(START_PIC, lambda photo: message.reply_photo(
+                photo=photo,
                 caption=START_MSG,
                 reply_markup=inline_buttons,
                 parse_mode=ParseMode.HTML,
                 message_effect_id=5104841245755180586  # 🔥
-            )
-            print(f"✅ Welcome message sent successfully")
+            ))
         except Exception as e:
-            print(f"⚠️ Error sending photo, trying text: {e}")
+            log.warning("Welcome photo failed, sending text", user_id=user_id, error=e)
             await message.reply_text(
                 START_MSG,
                 reply_markup=inline_buttons,
@@ -483,38 +409,8 @@ async def start_command(client: Bot, message: Message):
             )
 
 
-async def get_link_creation_time(channel_id):
-    """Get the creation time of the current invite link for a channel."""
-    try:
-        if IS_POSTGRES:
-            from database.database import get_connection
-            async with get_connection() as conn:
-                result = await conn.fetchval(
-                    "SELECT invite_link_created_at FROM channels WHERE channel_id = $1 AND status = 'active'",
-                    channel_id
-                )
-                return result
-        else:
-            from database.database import channels_collection
-            channel = await channels_collection.find_one({"channel_id": channel_id, "status": "active"})
-            if channel and "invite_link_created_at" in channel:
-                return channel["invite_link_created_at"]
-            return None
-    except Exception as e:
-        print(f"Error fetching link creation time for channel {channel_id}: {e}")
-        return None
-
-@Bot.on_callback_query(filters.regex("close"))
-async def close_callback(client: Bot, callback_query):
-    await callback_query.answer()
-    await callback_query.message.delete()
-    try:
-        await callback_query.message.reply_to_message.delete()
-    except:
-        pass
-
-@Bot.on_callback_query(filters.regex("check_sub"))
-async def check_sub_callback(client: Bot, callback_query: CallbackQuery):
+@fsub_routes.route("check_sub")
+async def check_sub_callback(client: Bot, callback_query: CallbackQuery, args: str):
     user_id = callback_query.from_user.id
     
     # Re-check subscription
@@ -538,13 +434,32 @@ async def info(client: Bot, message: Message):
     
     ping_time = (end_time - start_time) * 1000
     
-    users = await full_userbase()
+    # Served from in-memory counters; no database round trip
+    counters = stats.snapshot()
     now = datetime.now()
     delta = now - client.uptime
     bottime = get_readable_time(delta.seconds)
+    caches = "\n".join(
+        f"{name}: {c['size']} entries, {c['hit_rate']:.0%} hits"
+        for name, c in stats.cache_stats().items()
+    )
+    callbacks = "\n".join(
+        f"{prefix}: {r['calls']} calls, avg {r['avg_ms']:.0f} ms / max {r['max_ms']:.0f} ms"
+        for prefix, r in list(router.timings().items())[:5] if r['calls']
+    )
+    pool = pool_stats()
+    pool_line = (
+        f"DB pool: {pool['in_use']}/{pool['size']} in use (peak {pool['peak_in_use']}/{pool['max_size']}), "
+        f"wait avg {pool['avg_wait_ms']:.1f} ms / max {pool['max_wait_ms']:.0f} ms\n\n"
+    ) if pool else ""
     
     await temp_msg.edit(
-        f"<b>Users: {len(users)}\n\nUptime: {bottime}\n\nPing: {ping_time:.2f} ms</b>",
+        f"<b>Users: {counters.get('users', 0)}\n\nUptime: {bottime}\n\nPing: {ping_time:.2f} ms\n\n"
+        f"Channels: {counters.get('channels', 0)} | FSub: {counters.get('fsub_channels', 0)} | Bans: {counters.get('bans', 0)}\n"
+        f"Links served: {counters.get('links_served', 0)} | Approvals: {counters.get('approvals', 0)}\n\n"
+        f"{pool_line}"
+        f"Caches:\n{caches}\n\n"
+        f"Callbacks:\n{callbacks or 'none yet'}</b>",
         reply_markup=reply_markup,
         parse_mode=ParseMode.HTML
     )
@@ -552,14 +467,12 @@ async def info(client: Bot, message: Message):
 # Handler for the /cancel command
 @Bot.on_message(filters.command('cancel') & filters.private & is_owner_or_admin)
 async def cancel_broadcast(client: Bot, message: Message):
-    global is_canceled
-    async with cancel_lock:
-        is_canceled = True
+    if not broadcaster.cancel():
+        return await message.reply("<b>No broadcast is running.</b>")
     await message.reply("<b>Broadcast will be canceled...</b>")
 
 @Bot.on_message(filters.private & filters.command('broadcast') & is_owner_or_admin)
 async def broadcast(client: Bot, message: Message):
-    global is_canceled
     args = message.text.split()[1:]
 
     if not message.reply_to_message:
@@ -605,371 +518,174 @@ async def broadcast(client: Bot, message: Message):
     if not mode_text:
         mode_text.append("NORMAL")
 
-    # Reset cancel flag
-    async with cancel_lock:
-        is_canceled = False
-
-    query = await full_userbase()
-    broadcast_msg = message.reply_to_message
-    total = len(query)
-    successful = blocked = deleted = unsuccessful = 0
+    if broadcaster.running:
+        return await message.reply("<b>A broadcast is already running.</b>\nUse /cancel to stop it first.")
 
     pls_wait = await message.reply(f"<i>Broadcasting in <b>{' + '.join(mode_text)}</b> mode...</i>")
+    started = await broadcaster.start(
+        client, message.reply_to_message, pls_wait, mode_text,
+        pin=do_pin, delete_after=duration if do_delete else 0, silent=silent
+    )
+    if not started:
+        # Another /broadcast got there between the check above and start()
+        await pls_wait.edit("<b>A broadcast is already running.</b>\nUse /cancel to stop it first.")
 
-    bar_length = 20
-    progress_bar = ''
-    last_update_percentage = 0
-    update_interval = 0.05  # 5%
-
-    for i, chat_id in enumerate(query, start=1):
-        async with cancel_lock:
-            if is_canceled:
-                await pls_wait.edit(f"›› BROADCAST ({' + '.join(mode_text)}) CANCELED ❌")
-                return
-
-        try:
-            sent_msg = await broadcast_msg.copy(chat_id, disable_notification=silent)
-
-            if do_pin:
-                await client.pin_chat_message(chat_id, sent_msg.id, both_sides=True)
-            if do_delete:
-                asyncio.create_task(auto_delete(sent_msg, duration))
 
-            successful += 1
-        except FloodWait as e:
-            await asyncio.sleep(e.x)
-            try:
-                sent_msg = await broadcast_msg.copy(chat_id, disable_notification=silent)
-                if do_pin:
-                    await client.pin_chat_message(chat_id, sent_msg.id, both_sides=True)
-                if do_delete:
-                    asyncio.create_task(auto_delete(sent_msg, duration))
-                successful += 1
-            except:
-                unsuccessful += 1
-        except UserIsBlocked:
-            await del_user(chat_id)
-            blocked += 1
-        except InputUserDeactivated:
-            await del_user(chat_id)
-            deleted += 1
-        except:
-            unsuccessful += 1
-            await del_user(chat_id)
+@fsub_routes.route("retry", legacy="fsub_retry_")
+async def fsub_retry(client: Bot, query: CallbackQuery, args: str):
+    """Re-check FSub after "Try Again" and serve the original deep link"""
+    user_id = query.from_user.id
 
-        # Progress
-        percent_complete = i / total
-        if percent_complete - last_update_percentage >= update_interval or last_update_percentage == 0:
-            num_blocks = int(percent_complete * bar_length)
-            progress_bar = "●" * num_blocks + "○" * (bar_length - num_blocks)
-            status_update = f"""<b>›› BROADCAST ({' + '.join(mode_text)}) IN PROGRESS...
+    # The original start parameter travels in the callback data
+    original_start_param = args if args and args != "none" else None
 
-<blockquote>⏳:</b> [{progress_bar}] <code>{percent_complete:.0%}</code></blockquote>
+    log.debug("FSub retry", user_id=user_id, param=original_start_param, sample=100)
 
-<b>›› Total Users: <code>{total}</code>
-›› Successful: <code>{successful}</code>
-›› Blocked: <code>{blocked}</code>
-›› Deleted: <code>{deleted}</code>
-›› Unsuccessful: <code>{unsuccessful}</code></b>
-
-<i>➪ To stop broadcasting click: <b>/cancel</b></i>"""
-            await pls_wait.edit(status_update)
-            last_update_percentage = percent_complete
+    # Re-check subscription
+    try:
+        not_joined = await get_fsub_channels_not_joined(client, user_id)
 
-    # Final status
-    final_status = f"""<b>›› BROADCAST ({' + '.join(mode_text)}) COMPLETED ✅
+        if not not_joined:
+            # User has joined all channels - delete FSub panel and process their original request
+            await query.message.delete()
 
-<blockquote>Dᴏɴᴇ:</b> [{progress_bar}] {percent_complete:.0%}</blockquote>
+            # If there was an original start parameter, process it
+            if original_start_param:
 
-<b>›› Total Users: <code>{total}</code>
-›› Successful: <code>{successful}</code>
-›› Blocked: <code>{blocked}</code>
-›› Deleted: <code>{deleted}</code>
-›› Unsuccessful: <code>{unsuccessful}</code></b>"""
-    return await pls_wait.edit(final_status)
+                try:
+                    is_request = original_start_param.startswith("req_")
+                    record = await resolve_start_param(original_start_param)
 
+                    if not record:
+                        log.info("Invalid start parameter", user_id=user_id, param=original_start_param)
+                        return await client.send_message(
+                            user_id,
+                            "<b><blockquote expandable>Invalid or expired invite link.</blockquote></b>",
+                            parse_mode=ParseMode.HTML
+                        )
 
-async def auto_delete(sent_msg, duration):
-    """Helper for delete mode"""
-    await asyncio.sleep(duration)
-    try:
-        await sent_msg.delete()
-    except:
-        pass
+                    channel_id = record.channel_id
 
-@Bot.on_callback_query()
-async def cb_handler(client: Bot, query: CallbackQuery):
-    data = query.data  
-    
-    # Handle Try Again button for FSub
-    if data.startswith("fsub_retry_"):
-        user_id = query.from_user.id
-        
-        print(f"♻️ Try Again clicked by user {user_id}")
-        
-        # Extract the original start parameter from callback data
-        callback_data_parts = data.split("_", 2)
-        original_start_param = callback_data_parts[2] if len(callback_data_parts) > 2 and callback_data_parts[2] != "none" else None
-        
-        print(f"   Original start param: {original_start_param}")
-        
-        # Re-check subscription
-        try:
-            not_joined = await get_fsub_channels_not_joined(client, user_id)
-            
-            if not not_joined:
-                # User has joined all channels - delete FSub panel and process their original request
-                print(f"✅ User {user_id} joined all channels!")
-                await query.message.delete()
-                
-                # If there was an original start parameter, process it
-                if original_start_param:
-                    print(f"🔗 Processing original start parameter: {original_start_param}")
-                    
-                    try:
-                        base64_string = original_start_param
-                        is_request = base64_string.startswith("req_")
-                        
-                        if is_request:
-                            base64_string = base64_string[4:]
-                            channel_id = await get_channel_by_encoded_link2(base64_string)
-                        else:
-                            channel_id = await get_channel_by_encoded_link(base64_string)
-                        
-                        if not channel_id:
-                            print(f"❌ Invalid encoded link: {base64_string}")
-                            return await client.send_message(
-                                user_id,
-                                "<b><blockquote expandable>Invalid or expired invite link.</blockquote></b>",
-                                parse_mode=ParseMode.HTML
-                            )
-
-                        print(f"✅ Decoded channel_id: {channel_id}")
-
-                        # Check if this is a /genlink link
-                        original_link = await get_original_link(channel_id)
-                        if original_link:
-                            print(f"🔗 Providing original link: {original_link}")
-                            button = InlineKeyboardMarkup(
-                                [[InlineKeyboardButton("• Proceed to Link •", url=original_link)]]
-                            )
-                            return await client.send_message(
-                                user_id,
-                                "<b><blockquote expandable>ʜᴇʀᴇ ɪs ʏᴏᴜʀ ʟɪɴᴋ! ᴄʟɪᴄᴋ ʙᴇʟᴏᴡ ᴛᴏ ᴘʀᴏᴄᴇᴇᴅ</blockquote></b>",
-                                reply_markup=button,
-                                parse_mode=ParseMode.HTML
-                            )
-
-                        # Generate invite link
-                        async with channel_locks[channel_id]:
-                            old_link_info = await get_current_invite_link(channel_id)
-                            current_time = datetime.now()
-                            
-                            if old_link_info:
-                                link_created_time = await get_link_creation_time(channel_id)
-                                if link_created_time and (current_time - link_created_time).total_seconds() < 240:
-                                    invite_link = old_link_info["invite_link"]
-                                    is_request_link = old_link_info["is_request"]
-                                    print(f"♻️ Reusing existing invite link")
-                                else:
-                                    try:
-                                        await client.revoke_chat_invite_link(channel_id, old_link_info["invite_link"])
-                                    except:
-                                        pass
-                                    invite = await client.create_chat_invite_link(
-                                        chat_id=channel_id,
-                                        expire_date=current_time + timedelta(minutes=10),
-                                        creates_join_request=is_request
-                                    )
-                                    invite_link = invite.invite_link
-                                    is_request_link = is_request
-                                    await save_invite_link(channel_id, invite_link, is_request_link)
-                            else:
-                                invite = await client.create_chat_invite_link(
-                                    chat_id=channel_id,
-                                    expire_date=current_time + timedelta(minutes=10),
-                                    creates_join_request=is_request
-                                )
-                                invite_link = invite.invite_link
-                                is_request_link = is_request
-                                await save_invite_link(channel_id, invite_link, is_request_link)
-
-                        button_text = "• ʀᴇǫᴜᴇsᴛ ᴛᴏ ᴊᴏɪɴ •" if is_request_link else "• ᴊᴏɪɴ ᴄʜᴀɴɴᴇʟ •"
-                        button = InlineKeyboardMarkup([[InlineKeyboardButton(button_text, url=invite_link)]])
-                        
-                        await client.send_message(
+                    # Check if this is a /genlink link
+                    if record.original_link:
+                        log.debug("Serving original link", channel_id=channel_id, sample=100)
+                        stats.incr("links_served")
+                        button = InlineKeyboardMarkup(
+                            [[InlineKeyboardButton("• Proceed to Link •", url=record.original_link)]]
+                        )
+                        return await client.send_message(
                             user_id,
                             "<b><blockquote expandable>ʜᴇʀᴇ ɪs ʏᴏᴜʀ ʟɪɴᴋ! ᴄʟɪᴄᴋ ʙᴇʟᴏᴡ ᴛᴏ ᴘʀᴏᴄᴇᴇᴅ</blockquote></b>",
                             reply_markup=button,
                             parse_mode=ParseMode.HTML
                         )
 
-                        note_msg = await client.send_message(
-                            user_id,
-                            "<u><b>Note: If the link is expired, please click the post link again to get a new one.</b></u>",
-                            parse_mode=ParseMode.HTML
-                        )
-                        asyncio.create_task(delete_after_delay(note_msg, 300))
-                        asyncio.create_task(revoke_invite_after_5_minutes(client, channel_id, invite_link, is_request_link))
+                    # Generate invite link
+                    invite_link, is_request_link = await get_invite_link_for(client, channel_id, is_request)
+
+                    button_text = "• ʀᴇǫᴜᴇsᴛ ᴛᴏ ᴊᴏɪɴ •" if is_request_link else "• ᴊᴏɪɴ ᴄʜᴀɴɴᴇʟ •"
+                    button = InlineKeyboardMarkup([[InlineKeyboardButton(button_text, url=invite_link)]])
 
-                    except Exception as e:
-                        print(f"❌ Error processing original request: {e}")
-                        await client.send_message(
-                            user_id,
-                            "<b>✅ You can now use the bot! Use /start to begin.</b>",
-                            parse_mode=ParseMode.HTML
-                        )
-                else:
-                    # No original start param, just show success
                     await client.send_message(
                         user_id,
-                        "<b>✅ You can now use the bot! Use /start to begin.</b>",
+                        "<b><blockquote expandable>ʜᴇʀᴇ ɪs ʏᴏᴜʀ ʟɪɴᴋ! ᴄʟɪᴄᴋ ʙᴇʟᴏᴡ ᴛᴏ ᴘʀᴏᴄᴇᴇᴅ</blockquote></b>",
+                        reply_markup=button,
                         parse_mode=ParseMode.HTML
                     )
-            else:
-                # User still hasn't joined all channels - update the panel
-                print(f"❌ User {user_id} still needs to join {len(not_joined)} channel(s)")
-                await show_fsub_panel(client, query.message, not_joined, original_start_param, edit=True)
-                await query.answer("⚠️ Please join all required channels first!", show_alert=True)
-                
-        except Exception as e:
-            print(f"❌ Error in fsub_retry_callback: {e}")
-            import traceback
-            traceback.print_exc()
-            await query.answer("❌ An error occurred. Please try /start again.", show_alert=True)
-        return
-    
-    if data == "close":
-        await query.message.delete()
-        try:
-            await query.message.reply_to_message.delete()
-        except:
-            pass
-    
-    elif data == "about":
-        user = await client.get_users(OWNER_ID)
-        user_link = f"https://t.me/{user.username}" if user.username else f"tg://openmessage?user_id={OWNER_ID}"
-        
-        try:
-            await query.edit_message_media(
-                InputMediaPhoto(
-                    "https://envs.sh/Wdj.jpg",
-                    ABOUT_TXT
-                ),
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton('• ʙᴀᴄᴋ', callback_data='start'), InlineKeyboardButton('ᴄʟᴏsᴇ •', callback_data='close')]
-                ]),
-            )
-        except:
-            await query.message.edit_text(
-                ABOUT_TXT,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton('• ʙᴀᴄᴋ', callback_data='start'), InlineKeyboardButton('ᴄʟᴏsᴇ •', callback_data='close')]
-                ]),
-                parse_mode=ParseMode.HTML
-            )
 
-    elif data == "channels":
-        try:
-            await query.edit_message_media(
-                InputMediaPhoto("https://envs.sh/Wdj.jpg", 
-                                CHANNELS_TXT
-                ),
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton('• ʙᴀᴄᴋ', callback_data='start'), InlineKeyboardButton('ᴄʟᴏsᴇ •', callback_data='close')]
-                ]),
-            )
-        except:
-            await query.message.edit_text(
-                CHANNELS_TXT,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton('• ʙᴀᴄᴋ', callback_data='start'), InlineKeyboardButton('ᴄʟᴏsᴇ •', callback_data='close')]
-                ]),
-                parse_mode=ParseMode.HTML
-            )
-    
-    elif data in ["start", "home"]:
-        inline_buttons = InlineKeyboardMarkup(
-            [
-                [InlineKeyboardButton("• ᴀʙᴏᴜᴛ", callback_data="about"),
-                 InlineKeyboardButton("• ᴄʜᴀɴɴᴇʟs", callback_data="channels")],
-                [InlineKeyboardButton("• Close •", callback_data="close")]
-            ]
-        )
-        try:
-            await query.edit_message_media(
-                InputMediaPhoto(
-                    START_PIC,
-                    START_MSG
-                ),
-                reply_markup=inline_buttons
-            )
-        except Exception as e:
-            print(f"Error sending start/home photo: {e}")
-            await query.message.edit_text(
-                START_MSG,
-                reply_markup=inline_buttons,
-                parse_mode=ParseMode.HTML
-            )
+                    note_msg = await client.send_message(
+                        user_id,
+                        "<u><b>Note: If the link is expired, please click the post link again to get a new one.</b></u>",
+                        parse_mode=ParseMode.HTML
+                    )
+                    scheduler.delete_message_later(note_msg.chat.id, note_msg.id, 300)
 
-    elif data.startswith("rfs_ch_"):
-        cid = int(data.split("_")[2])
-        try:
-            chat = await client.get_chat(cid)
-            try:
-                mode = await db.get_channel_mode(cid)
-            except:
-                mode = "off"
-            status = "🟢 ᴏɴ" if mode == "on" else "🔴 ᴏғғ"
-            new_mode = "ᴏғғ" if mode == "on" else "on"
-            buttons = [
-                [InlineKeyboardButton(f"ʀᴇǫ ᴍᴏᴅᴇ {'OFF' if mode == 'on' else 'ON'}", callback_data=f"rfs_toggle_{cid}_{new_mode}")],
-                [InlineKeyboardButton("‹ ʙᴀᴄᴋ", callback_data="fsub_back")]
-            ]
-            await query.message.edit_text(
-                f"Channel: {chat.title}\nCurrent Force-Sub Mode: {status}",
-                reply_markup=InlineKeyboardMarkup(buttons)
-            )
-        except Exception:
-            await query.answer("Failed to fetch channel info", show_alert=True)
+                except Exception as e:
+                    log.error("Original request failed", user_id=user_id, param=original_start_param, error=e)
+                    await client.send_message(
+                        user_id,
+                        "<b>✅ You can now use the bot! Use /start to begin.</b>",
+                        parse_mode=ParseMode.HTML
+                    )
+            else:
+                # No original start param, just show success
+                await client.send_message(
+                    user_id,
+                    "<b>✅ You can now use the bot! Use /start to begin.</b>",
+                    parse_mode=ParseMode.HTML
+                )
+        else:
+            # User still hasn't joined all channels - update the panel
+            log.debug("Still not joined", user_id=user_id, not_joined=len(not_joined), sample=100)
+            await show_fsub_panel(client, query.message, not_joined, original_start_param, edit=True)
+            await query.answer("⚠️ Please join all required channels first!", show_alert=True)
 
-    elif data.startswith("rfs_toggle_"):
-        cid, action = data.split("_")[2:]
-        cid = int(cid)
-        mode = "on" if action == "on" else "off"
+    except Exception as e:
+        log.exception("FSub retry failed", user_id=user_id)
+        await query.answer("❌ An error occurred. Please try /start again.", show_alert=True)
 
-        await db.set_channel_mode(cid, mode)
-        await query.answer(f"Force-Sub set to {'ON' if mode == 'on' else 'OFF'}")
 
-        # Refresh the same channel's mode view
-        chat = await client.get_chat(cid)
-        status = "🟢 ON" if mode == "on" else "🔴 OFF"
-        new_mode = "off" if mode == "on" else "on"
+@fsub_mode_routes.route("rfs", legacy="rfs_ch_")
+async def fsub_mode_channel(client: Bot, query: CallbackQuery, args: str):
+    cid = int(args)
+    try:
+        chat = await chat_cache.get(client, cid)
+        try:
+            mode = await db.get_channel_mode(cid)
+        except:
+            mode = "off"
+        status = "🟢 ᴏɴ" if mode == "on" else "🔴 ᴏғғ"
+        new_mode = "ᴏғғ" if mode == "on" else "on"
         buttons = [
-            [InlineKeyboardButton(f"ʀᴇǫ ᴍᴏᴅᴇ {'OFF' if mode == 'on' else 'ON'}", callback_data=f"rfs_toggle_{cid}_{new_mode}")],
-            [InlineKeyboardButton("‹ ʙᴀᴄᴋ", callback_data="fsub_back")]
+            [InlineKeyboardButton(f"ʀᴇǫ ᴍᴏᴅᴇ {'OFF' if mode == 'on' else 'ON'}", callback_data=f"rfsset:{cid}:{new_mode}")],
+            [InlineKeyboardButton("‹ ʙᴀᴄᴋ", callback_data="rfsback")]
         ]
         await query.message.edit_text(
             f"Channel: {chat.title}\nCurrent Force-Sub Mode: {status}",
             reply_markup=InlineKeyboardMarkup(buttons)
         )
+    except Exception:
+        await query.answer("Failed to fetch channel info", show_alert=True)
+
+@fsub_mode_routes.route("rfsset", legacy="rfs_toggle_", legacy_sep="_")
+async def fsub_mode_toggle(client: Bot, query: CallbackQuery, args: str):
+    cid, action = args.split(":")
+    cid = int(cid)
+    mode = "on" if action == "on" else "off"
+
+    await db.set_channel_mode(cid, mode)
+    await query.answer(f"Force-Sub set to {'ON' if mode == 'on' else 'OFF'}")
+
+    # Refresh the same channel's mode view
+    chat = await chat_cache.get(client, cid)
+    status = "🟢 ON" if mode == "on" else "🔴 OFF"
+    new_mode = "off" if mode == "on" else "on"
+    buttons = [
+        [InlineKeyboardButton(f"ʀᴇǫ ᴍᴏᴅᴇ {'OFF' if mode == 'on' else 'ON'}", callback_data=f"rfsset:{cid}:{new_mode}")],
+        [InlineKeyboardButton("‹ ʙᴀᴄᴋ", callback_data="rfsback")]
+    ]
+    await query.message.edit_text(
+        f"Channel: {chat.title}\nCurrent Force-Sub Mode: {status}",
+        reply_markup=InlineKeyboardMarkup(buttons)
+    )
 
-    elif data == "fsub_back":
-        channels = await db.show_channels()
-        buttons = []
-        for cid in channels:
+@fsub_mode_routes.route("rfsback", legacy="fsub_back")
+async def fsub_mode_list(client: Bot, query: CallbackQuery, args: str):
+    channels = await db.show_channels()
+    buttons = []
+    for cid in channels:
+        try:
+            chat = await chat_cache.get(client, cid)
             try:
-                chat = await client.get_chat(cid)
-                try:
-                    mode = await db.get_channel_mode(cid)
-                except:
-                    mode = "off"
-                status = "🟢" if mode == "on" else "🔴"
-                buttons.append([InlineKeyboardButton(f"{status} {chat.title}", callback_data=f"rfs_ch_{cid}")])
+                mode = await db.get_channel_mode(cid)
             except:
-                continue
+                mode = "off"
+            status = "🟢" if mode == "on" else "🔴"
+            buttons.append([InlineKeyboardButton(f"{status} {chat.title}", callback_data=f"rfs:{cid}")])
+        except:
+            continue
 
-        await query.message.edit_text(
-            "sᴇʟᴇᴄᴛ ᴀ ᴄʜᴀɴɴᴇʟ ᴛᴏ ᴛᴏɢɢʟᴇ ɪᴛs ғᴏʀᴄᴇ-sᴜʙ ᴍᴏᴅᴇ:",
-            reply_markup=InlineKeyboardMarkup(buttons)
-        )
+    await query.message.edit_text(
+        "sᴇʟᴇᴄᴛ ᴀ ᴄʜᴀɴɴᴇʟ ᴛᴏ ᴛᴏɢɢʟᴇ ɪᴛs ғᴏʀᴄᴇ-sᴜʙ ᴍᴏᴅᴇ:",
+        reply_markup=InlineKeyboardMarkup(buttons)
+    )
@@ -0,0 +1,200 @@
+"""
+Persistent job scheduler
+
+One heap-ordered timer replaces the per-link `asyncio.sleep` tasks used for
+revoking invite links and deleting messages. Jobs are written to the
+scheduled_jobs table in batches, so pending revokes/deletes are resumed after
+a restart instead of being lost.
+"""
+
+import asyncio
+import heapq
+import time
+
+from pyrogram.errors import FloodWait
+
+from config import SCHEDULER_BATCH_SIZE, SCHEDULER_FLUSH_INTERVAL
+from database.database import save_scheduled_jobs, delete_scheduled_jobs, get_scheduled_jobs
+from logs import get_logger
+
+log = get_logger(__name__)
+
+REVOKE_INVITE = "revoke_invite"
+DELETE_MESSAGE = "delete_message"
+
+
+class _Job:
+    __slots__ = ("key", "kind", "chat_id", "payload", "run_at")
+
+    def __init__(self, key: str, kind: str, chat_id: int, payload: str, run_at: float):
+        self.key = key
+        self.kind = kind
+        self.chat_id = chat_id
+        self.payload = payload
+        self.run_at = run_at  # unix time
+
+    def as_row(self) -> tuple:
+        return (self.key, self.kind, self.chat_id, self.payload, self.run_at)
+
+
+class JobScheduler:
+    """Heap-based scheduler for delayed Telegram actions.
+
+    Jobs are deduplicated by (kind, chat_id, payload); scheduling the same job
+    again keeps the earliest run time. Scheduling never awaits: new jobs are
+    persisted and finished jobs deleted by the run loop every
+    `flush_interval` seconds. Due jobs run in batches of up to `batch_size`,
+    with message deletes grouped into one call per chat.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._heap = []      # (run_at, key); stale entries are skipped lazily
+        self._jobs = {}      # key -> _Job
+        self._to_save = {}   # key -> _Job
+        self._to_delete = set()
+        self._wakeup = asyncio.Event()
+        self._client = None
+        self._task = None
+
+    def schedule(self, kind: str, chat_id: int, payload, delay: float):
+        """Run a job `delay` seconds from now (deduplicated, earliest wins)"""
+        payload = str(payload)
+        key = f"{kind}:{chat_id}:{payload}"
+        run_at = time.time() + delay
+
+        existing = self._jobs.get(key)
+        if existing and existing.run_at <= run_at:
+            return
+        self._add(_Job(key, kind, chat_id, payload, run_at))
+        self._to_save[key] = self._jobs[key]
+        self._to_delete.discard(key)
+        if self._heap[0][1] == key:
+            self._wakeup.set()
+
+    def revoke_invite_later(self, channel_id: int, link: str, delay: float = 300):
+        self.schedule(REVOKE_INVITE, channel_id, link, delay)
+
+    def delete_message_later(self, chat_id: int, message_id: int, delay: float = 300):
+        self.schedule(DELETE_MESSAGE, chat_id, message_id, delay)
+
+    @property
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    async def start(self, client):
+        """Load pending jobs from the database and start the run loop"""
+        self._client = client
+        for key, kind, chat_id, payload, run_at in await get_scheduled_jobs():
+            if key not in self._jobs:
+                self._add(_Job(key, kind, chat_id, payload, run_at))
+        if self._jobs:
+            log.info("Scheduled jobs resumed", count=len(self._jobs))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._flush()
+
+    def _add(self, job: _Job):
+        self._jobs[job.key] = job
+        heapq.heappush(self._heap, (job.run_at, job.key))
+
+    async def _flush(self):
+        if self._to_save:
+            jobs, self._to_save = self._to_save, {}
+            if not await save_scheduled_jobs([job.as_row() for job in jobs.values()]):
+                # Retry on the next flush; jobs rescheduled or finished meanwhile take precedence
+                for key, job in jobs.items():
+                    if key not in self._to_save and key not in self._to_delete:
+                        self._to_save[key] = job
+        if self._to_delete:
+            keys, self._to_delete = self._to_delete, set()
+            if not await delete_scheduled_jobs(list(keys)):
+                # A key scheduled again meanwhile has a new row that must not be deleted
+                self._to_delete.update(key for key in keys if key not in self._jobs and key not in self._to_save)
+
+    def _pop_due(self, now: float) -> list:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            run_at, key = heapq.heappop(self._heap)
+            job = self._jobs.get(key)
+            if job is None or job.run_at != run_at:
+                continue
+            del self._jobs[key]
+            due.append(job)
+        return due
+
+    async def _run(self):
+        while True:
+            try:
+                await self._flush()
+                due = self._pop_due(time.time())
+                if due:
+                    await self._execute(due)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Scheduler loop error", error=e)
+
+            timeout = self.flush_interval
+            if self._heap:
+                timeout = max(0, min(timeout, self._heap[0][0] - time.time()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _execute(self, jobs: list):
+        deletes = {}
+        calls = []
+        for job in jobs:
+            if job.kind == DELETE_MESSAGE:
+                deletes.setdefault(job.chat_id, []).append(job)
+            elif job.kind == REVOKE_INVITE:
+                calls.append(([job], self._revoke(job)))
+            else:
+                log.warning("Unknown scheduled job kind", kind=job.kind, key=job.key)
+                self._to_delete.add(job.key)
+        for chat_id, chat_jobs in deletes.items():
+            calls.append((chat_jobs, self._delete(chat_id, chat_jobs)))
+
+        results = await asyncio.gather(*(call for _, call in calls), return_exceptions=True)
+        for (batch, _), result in zip(calls, results):
+            if isinstance(result, FloodWait):
+                # Put the batch back and retry once the wait is over
+                for job in batch:
+                    self.schedule(job.kind, job.chat_id, job.payload, result.value)
+                continue
+            for job in batch:
+                self._to_delete.add(job.key)
+
+    async def _revoke(self, job: _Job):
+        try:
+            await self._client.revoke_chat_invite_link(job.chat_id, job.payload)
+            log.info("Invite link revoked", channel_id=job.chat_id)
+        except FloodWait:
+            raise
+        except Exception as e:
+            log.error("Failed to revoke invite link", channel_id=job.chat_id, error=e)
+
+    async def _delete(self, chat_id: int, jobs: list):
+        try:
+            await self._client.delete_messages(chat_id, [int(job.payload) for job in jobs])
+        except FloodWait:
+            raise
+        except Exception:
+            pass
+
+
+scheduler = JobScheduler(batch_size=SCHEDULER_BATCH_SIZE, flush_interval=SCHEDULER_FLUSH_INTERVAL)
@@ -0,0 +1,78 @@
+"""
+In-memory bot statistics
+
+Row counts (users, channels, FSub channels, bans) are loaded with cheap count
+queries, kept current by the database writers and reconciled periodically.
+Event counters (links served, approvals) count since the last restart.
+In-memory caches register here so their sizes and hit rates are reported too.
+/status reads a snapshot without touching the database.
+"""
+
+import asyncio
+import time
+
+from config import STATS_RECONCILE_INTERVAL
+from logs import get_logger
+
+log = get_logger(__name__)
+
+
+class StatsCounters:
+    """Named integer counters with a periodic reconcile from the database.
+
+    `reconcile` is an async callable returning {name: count}; those names are
+    overwritten with the fresh counts, every other counter is left alone.
+    """
+
+    def __init__(self, reconcile_interval: float):
+        self.reconcile_interval = reconcile_interval
+        self.reconciled_at = None  # unix time of the last successful reconcile
+        self._values = {}
+        self._caches = {}  # name -> object with a stats() method
+        self._task = None
+
+    def incr(self, name: str, amount: int = 1):
+        self._values[name] = self._values.get(name, 0) + amount
+
+    def decr(self, name: str, amount: int = 1):
+        self._values[name] = max(0, self._values.get(name, 0) - amount)
+
+    def get(self, name: str) -> int:
+        return self._values.get(name, 0)
+
+    def snapshot(self) -> dict:
+        return dict(self._values)
+
+    def track_cache(self, name: str, cache):
+        """Report `cache.stats()` (size, hits, misses, hit_rate) under `name`"""
+        self._caches[name] = cache
+
+    def cache_stats(self) -> dict:
+        return {name: cache.stats() for name, cache in self._caches.items()}
+
+    def start(self, reconcile):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(reconcile))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, reconcile):
+        while True:
+            try:
+                self._values.update(await reconcile())
+                self.reconciled_at = time.time()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Stats reconcile failed", error=e)
+            await asyncio.sleep(self.reconcile_interval)
+
+
+stats = StatsCounters(reconcile_interval=STATS_RECONCILE_INTERVAL)
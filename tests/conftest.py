@@ -0,0 +1,67 @@
+"""
+Test setup
+
+The bot modules read their configuration at import time, so the minimum
+environment is provided here before any of them is imported. Tests run
+against the in-memory backend (the `repo` fixture) unless they build their
+own repository, and talk to FakeClient instead of Telegram.
+"""
+
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("APP_ID", "1")
+os.environ.setdefault("OWNER_ID", "1")
+os.environ.setdefault("DATABASE_CHANNEL", "-1001")
+os.environ.setdefault("DB_URI", "memory://")
+os.environ.setdefault("LOG_FILE_NAME", os.path.join(tempfile.mkdtemp(), "tests.log"))
+
+
+class FakeClient:
+    """Stand-in for the bot client that records the Telegram calls it gets.
+
+    Tests subclass it for scenario-specific behaviour (membership answers,
+    FloodWaits, ...).
+    """
+
+    def __init__(self):
+        self.sent = []     # (chat_id, text)
+        self.status = []   # edited message texts
+        self.created = []  # chat ids an invite link was created for
+        self.revoked = []  # (chat_id, link)
+        self.deleted = []  # (chat_id, sorted message ids)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+        return SimpleNamespace(chat=SimpleNamespace(id=chat_id), id=len(self.sent))
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        self.status.append(text)
+
+    async def create_chat_invite_link(self, chat_id, expire_date=None, creates_join_request=False):
+        self.created.append(chat_id)
+        return SimpleNamespace(invite_link=f"https://t.me/+new{len(self.created)}")
+
+    async def revoke_chat_invite_link(self, chat_id, link):
+        self.revoked.append((chat_id, link))
+
+    async def delete_messages(self, chat_id, message_ids):
+        self.deleted.append((chat_id, sorted(message_ids)))
+
+
+@pytest.fixture
+def repo():
+    """Fresh in-memory repository behind the database facade"""
+    from database import database
+    from database.memory import InMemoryRepository
+
+    repository = InMemoryRepository()
+    database.set_repository(repository)
+    return repository
@@ -0,0 +1,28 @@
+from database.database import BanIndex, BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for user_id in range(0, 2000, 2):
+        bloom.add(user_id)
+    assert all(user_id in bloom for user_id in range(0, 2000, 2))
+    false_positives = sum(user_id in bloom for user_id in range(1, 20001, 2))
+    assert false_positives < 10000 * 0.05
+
+
+def test_small_index_is_exact():
+    index = BanIndex(bloom_threshold=10, error_rate=0.01)
+    index.load([1, 2, 3])
+    assert index.lookup(2) is True
+    assert index.lookup(4) is False
+    index.add(4)
+    index.discard(2)
+    assert index.lookup(4) is True
+    assert index.lookup(2) is False
+
+
+def test_large_index_defers_positives_to_the_database():
+    index = BanIndex(bloom_threshold=10, error_rate=0.001)
+    index.load(list(range(100)))
+    assert all(index.lookup(user_id) is None for user_id in range(100))
+    assert sum(index.lookup(user_id) is False for user_id in range(1000, 2000)) > 950
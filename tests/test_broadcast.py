@@ -0,0 +1,152 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pyrogram")
+
+from pyrogram.errors import UserIsBlocked
+
+from broadcast import BroadcastEngine, TokenBucket
+from conftest import FakeClient
+from database import database
+
+
+class FakeMessage:
+    """The message being broadcast; copy() completes out of order"""
+
+    def __init__(self, blocked=()):
+        self.chat = SimpleNamespace(id=-1001)
+        self.id = 5
+        self.empty = False
+        self.blocked = set(blocked)
+        self.delivered = []
+
+    async def copy(self, chat_id, disable_notification=False):
+        await asyncio.sleep(random.random() / 1000)
+        if chat_id in self.blocked:
+            raise UserIsBlocked()
+        self.delivered.append(chat_id)
+        return SimpleNamespace(id=len(self.delivered))
+
+
+class BroadcastClient(FakeClient):
+    """get_messages returns the broadcast message, as resume() expects"""
+
+    def __init__(self, message):
+        super().__init__()
+        self.message = message
+
+    async def get_messages(self, chat_id, message_id):
+        return self.message
+
+
+def fail_stream_after(repo, monkeypatch, count: int):
+    """Make the userbase stream raise after `count` users"""
+    stream = repo.iter_user_ids
+
+    async def failing(after, batch_size):
+        streamed = 0
+        async for user_id in stream(after, batch_size):
+            if streamed == count:
+                raise ConnectionError("database went away")
+            streamed += 1
+            yield user_id
+    monkeypatch.setattr(repo, "iter_user_ids", failing)
+
+
+@pytest.fixture
+def userbase(repo):
+    asyncio.run(repo.add_users(list(range(1, 51)), datetime.utcnow()))
+    return repo
+
+
+def engine():
+    return BroadcastEngine(rate=10000, burst=10000, workers=4, max_retries=1, checkpoint_interval=0.01)
+
+
+async def run_broadcast(broadcaster, client, message):
+    status = SimpleNamespace(chat=SimpleNamespace(id=1), id=10)
+    assert await broadcaster.start(client, message, status, ["Normal"])
+    await broadcaster._task
+
+
+def test_token_bucket_limits_rate():
+    async def main():
+        bucket = TokenBucket(rate=200, capacity=1)
+        started = time.monotonic()
+        for _ in range(11):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 10 / 200 * 0.9
+
+
+def test_broadcast_delivers_everyone_and_drops_checkpoint(userbase):
+    message = FakeMessage(blocked={7, 8})
+    client = BroadcastClient(message)
+    broadcaster = engine()
+    asyncio.run(run_broadcast(broadcaster, client, message))
+
+    assert sorted(message.delivered) == [user_id for user_id in range(1, 51) if user_id not in (7, 8)]
+    assert "COMPLETED" in client.status[-1]
+    assert asyncio.run(database.get_broadcasts()) == []
+    assert not asyncio.run(userbase.user_exists(7))
+
+
+def test_stream_failure_keeps_checkpoint_and_resume_finishes(userbase, monkeypatch):
+    fail_stream_after(userbase, monkeypatch, 20)
+    message = FakeMessage()
+    client = BroadcastClient(message)
+    broadcaster = engine()
+    asyncio.run(run_broadcast(broadcaster, client, message))
+
+    assert "INTERRUPTED" in client.status[-1]
+    [(broadcast_id, state)] = asyncio.run(database.get_broadcasts())
+    acked_upto = state["acked_upto"]
+    assert acked_upto <= 20
+    # The watermark only covers users that were really delivered
+    assert set(range(1, acked_upto + 1)) <= set(message.delivered)
+    assert state["counts"]["successful"] == acked_upto
+
+    monkeypatch.undo()
+
+    async def resume():
+        await broadcaster.resume(client)
+        await broadcaster._task
+    asyncio.run(resume())
+
+    assert "COMPLETED" in client.status[-1]
+    assert set(message.delivered) == set(range(1, 51))
+    # Users past the watermark may be sent twice (at least once), never users before it
+    assert all(message.delivered.count(user_id) == 1 for user_id in range(1, acked_upto + 1))
+    assert asyncio.run(database.get_broadcasts()) == []
+
+
+def test_concurrent_starts_launch_one_broadcast(userbase, monkeypatch):
+    count_users = userbase.count_users
+
+    async def slow_count_users():
+        await asyncio.sleep(0.01)  # a real backend yields here
+        return await count_users()
+    monkeypatch.setattr(userbase, "count_users", slow_count_users)
+
+    message = FakeMessage()
+    client = BroadcastClient(message)
+    broadcaster = engine()
+
+    async def main():
+        first = SimpleNamespace(chat=SimpleNamespace(id=1), id=10)
+        second = SimpleNamespace(chat=SimpleNamespace(id=1), id=11)
+        started = await asyncio.gather(
+            broadcaster.start(client, message, first, ["Normal"]),
+            broadcaster.start(client, message, second, ["Normal"]),
+        )
+        await broadcaster._task
+        return started
+
+    assert sorted(asyncio.run(main())) == [False, True]
+    assert sorted(message.delivered) == list(range(1, 51))
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from cache import TTLCache, KeyedLocks
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    now[0] += 10
+    assert cache.get("a") is None
+    assert cache.peek("b") == 2
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 1
+
+
+def test_peek_does_not_count_or_reorder():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.peek("a") == 1
+    cache.set("c", 3)
+    assert "a" not in cache
+    assert cache.stats()["hits"] == 0
+
+
+def test_keyed_locks_share_while_held_and_drop_when_idle():
+    locks = KeyedLocks()
+
+    async def main():
+        order = []
+
+        async def worker(name):
+            async with locks["channel"]:
+                order.append(name)
+                await asyncio.sleep(0)
+                order.append(name)
+
+        await asyncio.gather(worker(1), worker(2))
+        return order
+
+    assert asyncio.run(main()) == [1, 1, 2, 2]
+    assert locks.stats()["hits"] == 1
+    assert len(locks) == 0
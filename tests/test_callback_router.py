@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from callback_router import CallbackRouter
+
+
+class FakeQuery:
+    def __init__(self, data):
+        self.data = data
+        self.answered = False
+
+    async def answer(self, *args, **kwargs):
+        self.answered = True
+
+
+@pytest.fixture
+def router():
+    router = CallbackRouter()
+    nav = router.group("nav")
+    fsub = router.group("fsub")
+
+    @nav.route("start", legacy="home")
+    async def start(client, query, args):
+        return ("start", args)
+
+    @fsub.route("retry", legacy="fsub_retry_")
+    async def retry(client, query, args):
+        return ("retry", args)
+
+    @fsub.route("rfsset", legacy="rfs_toggle_", legacy_sep="_")
+    async def rfsset(client, query, args):
+        return ("rfsset", args)
+
+    @fsub.route("rfs", legacy="rfs_ch_")
+    async def rfs(client, query, args):
+        return ("rfs", args)
+
+    return router
+
+
+def resolved(router, data):
+    route, args = router.resolve(data)
+    return (route.prefix, args) if route else None
+
+
+def test_prefix_routes(router):
+    assert resolved(router, "start") == ("start", "")
+    assert resolved(router, "retry:abc:def") == ("retry", "abc:def")
+    assert resolved(router, "unknown:1") is None
+
+
+def test_legacy_exact_and_prefix_aliases(router):
+    assert resolved(router, "home") == ("start", "")
+    assert resolved(router, "homepage") is None
+    assert resolved(router, "fsub_retry_req_xyz") == ("retry", "req_xyz")
+    assert resolved(router, "rfs_ch_-100123") == ("rfs", "-100123")
+
+
+def test_legacy_separator_is_translated(router):
+    assert resolved(router, "rfs_toggle_-100123_on") == ("rfsset", "-100123:on")
+
+
+def test_duplicate_and_invalid_prefixes_are_rejected(router):
+    with pytest.raises(ValueError):
+        router.add("start", "nav", None)
+    with pytest.raises(ValueError):
+        router.add("a:b", "nav", None)
+
+
+def test_dispatch_times_routes_and_answers_unrouted(router):
+    client = SimpleNamespace()
+    assert asyncio.run(router.dispatch(client, FakeQuery("retry:x"))) == ("retry", "x")
+    assert router.timings()["retry"]["calls"] == 1
+
+    query = FakeQuery("nothing")
+    asyncio.run(router.dispatch(client, query))
+    assert query.answered
+    assert router.unrouted == 1
+
+
+def test_dispatch_counts_errors(router):
+    @router.group("broken").route("boom")
+    async def boom(client, query, args):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(router.dispatch(SimpleNamespace(), FakeQuery("boom")))
+    assert router.timings()["boom"] == {**router.timings()["boom"], "calls": 1, "errors": 1}
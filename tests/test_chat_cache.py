@@ -0,0 +1,73 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from chat_cache import ChatCache
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.fail = False
+
+    async def get_chat(self, chat_id):
+        self.calls += 1
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("get_chat failed")
+        return SimpleNamespace(id=chat_id, title=f"Chat {self.calls}")
+
+
+def test_concurrent_misses_share_one_rpc():
+    async def main():
+        cache = ChatCache(ttl=60, stale_ttl=60, maxsize=10)
+        client = FakeClient()
+        waiters = [asyncio.create_task(cache.get(client, 1)) for _ in range(5)]
+        await asyncio.sleep(0)
+        client.release.set()
+        chats = await asyncio.gather(*waiters)
+        return cache, client, chats
+
+    cache, client, chats = asyncio.run(main())
+    assert client.calls == 1
+    assert all(chat is chats[0] for chat in chats)
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_stale_entry_is_served_while_refreshing(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+
+    async def main():
+        cache = ChatCache(ttl=10, stale_ttl=60, maxsize=10)
+        client = FakeClient()
+        client.release.set()
+        first = await cache.get(client, 1)
+        now[0] += 20
+        stale = await cache.get(client, 1)
+        await asyncio.sleep(0)  # let the background refresh run
+        fresh = await cache.get(client, 1)
+        return first, stale, fresh, cache
+
+    first, stale, fresh, cache = asyncio.run(main())
+    assert stale is first
+    assert fresh.title == "Chat 2"
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def main():
+        cache = ChatCache(ttl=60, stale_ttl=60, maxsize=10)
+        client = FakeClient()
+        client.fail = True
+        waiters = [asyncio.create_task(cache.get(client, 1)) for _ in range(2)]
+        await asyncio.sleep(0)
+        client.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        return cache, results
+
+    cache, results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.peek(1) is None
+    assert cache.stats()["errors"] == 1
@@ -0,0 +1,110 @@
+"""
+Repository contract, run against every backend that needs no server
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from database.memory import InMemoryRepository
+from database.sqlite import SqliteRepository
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        repository = InMemoryRepository()
+    else:
+        repository = SqliteRepository(str(tmp_path / "bot.db"))
+    asyncio.run(repository.init())
+    return repository
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_users(repo):
+    now = datetime.utcnow()
+    assert run(repo.add_users([3, 1, 2], now)) == 3
+    assert run(repo.add_users([2, 4], now)) == 1
+    assert run(repo.user_exists(4))
+    assert not run(repo.user_exists(5))
+    assert run(repo.count_users()) == 4
+
+    async def stream(after, batch_size):
+        return [user_id async for user_id in repo.iter_user_ids(after, batch_size)]
+    assert run(stream(0, 2)) == [1, 2, 3, 4]
+    assert run(stream(2, 1)) == [3, 4]
+
+    assert run(repo.delete_user(3))
+    assert not run(repo.delete_user(3))
+    assert run(repo.count_users()) == 3
+
+
+def test_admins_and_bans(repo):
+    assert run(repo.add_admin(10))
+    assert not run(repo.add_admin(10))
+    assert run(repo.admin_exists(10))
+    assert run(repo.admin_ids()) == [10]
+    assert run(repo.remove_admin(10))
+    assert not run(repo.admin_exists(10))
+
+    assert run(repo.add_ban(20))
+    assert run(repo.ban_exists(20))
+    assert run(repo.ban_ids()) == [20]
+    assert run(repo.remove_ban(20))
+    assert not run(repo.ban_exists(20))
+
+
+def test_channels(repo):
+    now = datetime.utcnow()
+    assert run(repo.save_channel(-100, now))
+    run(repo.update_channel(-100, {"encoded_link": "abc", "req_encoded_link": "def"}))
+    assert run(repo.fetch_channel("encoded_link", "abc"))["channel_id"] == -100
+    assert run(repo.fetch_channel("req_encoded_link", "def"))["channel_id"] == -100
+    assert run(repo.fetch_channel("encoded_link", "missing")) is None
+    assert run(repo.active_channel_ids()) == [-100]
+
+    run(repo.save_invite_link(-100, "https://t.me/+x", True, now))
+    row = run(repo.fetch_channel("channel_id", -100))
+    assert row["current_invite_link"] == "https://t.me/+x"
+    assert row["is_request_link"]
+
+    assert run(repo.delete_channel(-100))
+    assert run(repo.fetch_channel("channel_id", -100, active_only=True)) is None
+
+
+def test_fsub_modes_and_join_requests(repo):
+    run(repo.add_fsub(-200))
+    assert run(repo.fsub_exists(-200))
+    assert run(repo.fsub_ids()) == [-200]
+    run(repo.set_fsub_mode(-200, "on"))
+    assert run(repo.get_fsub_mode(-200)) == "on"
+    run(repo.remove_fsub(-200))
+    assert not run(repo.fsub_exists(-200))
+
+    run(repo.add_join_request(-200, 7))
+    assert run(repo.join_request_exists(-200, 7))
+    run(repo.remove_join_request(-200, 7))
+    assert not run(repo.join_request_exists(-200, 7))
+
+
+def test_scheduled_jobs_broadcasts_and_media(repo):
+    now = datetime.utcnow()
+    run(repo.save_scheduled_jobs([("revoke:1:a", "revoke", 1, "a", 100.0), ("delete:2:5", "delete", 2, "5", 50.0)]))
+    assert sorted(job[0] for job in run(repo.scheduled_jobs())) == ["delete:2:5", "revoke:1:a"]
+    run(repo.delete_scheduled_jobs(["revoke:1:a"]))
+    assert [job[0] for job in run(repo.scheduled_jobs())] == ["delete:2:5"]
+
+    run(repo.save_broadcast("b1", {"acked_upto": 5}, now))
+    run(repo.save_broadcast("b1", {"acked_upto": 9}, now))
+    assert run(repo.broadcasts()) == [("b1", {"acked_upto": 9})]
+    run(repo.delete_broadcast("b1"))
+    assert run(repo.broadcasts()) == []
+
+    run(repo.save_media_file_id("https://x/pic.jpg", "FILE1", now))
+    assert run(repo.media_file_ids()) == {"https://x/pic.jpg": "FILE1"}
+    run(repo.delete_media_file_id("https://x/pic.jpg"))
+    assert run(repo.media_file_ids()) == {}
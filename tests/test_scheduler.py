@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pyrogram")
+
+from pyrogram.errors import FloodWait
+
+from conftest import FakeClient
+from scheduler import JobScheduler
+
+
+class FloodOnceClient(FakeClient):
+    """The first delete_messages call raises FloodWait"""
+
+    def __init__(self):
+        super().__init__()
+        self.flooded = False
+
+    async def delete_messages(self, chat_id, message_ids):
+        if not self.flooded:
+            self.flooded = True
+            raise FloodWait(value=0)
+        await super().delete_messages(chat_id, message_ids)
+
+
+async def settle(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "scheduler did not run the jobs"
+        await asyncio.sleep(0.01)
+
+
+def test_jobs_survive_a_restart_and_run_batched(repo):
+    async def main():
+        first = JobScheduler(batch_size=100, flush_interval=0.01)
+        first.revoke_invite_later(-100, "https://t.me/+a", 3600)
+        first.revoke_invite_later(-100, "https://t.me/+a", 0.05)  # earliest run time wins
+        first.delete_message_later(42, 1, 0.05)
+        first.delete_message_later(42, 2, 0.05)
+        assert first.pending == 3
+        await first.stop()  # never started: only flushes
+        assert len(await repo.scheduled_jobs()) == 3
+
+        client = FakeClient()
+        second = JobScheduler(batch_size=100, flush_interval=0.01)
+        await second.start(client)
+        await settle(lambda: client.revoked and client.deleted)
+        await second.stop()
+        return client
+
+    client = asyncio.run(main())
+    assert client.revoked == [(-100, "https://t.me/+a")]
+    assert client.deleted == [(42, [1, 2])]
+    assert asyncio.run(repo.scheduled_jobs()) == []
+
+
+def test_flood_wait_reschedules_the_batch(repo):
+    async def main():
+        client = FloodOnceClient()
+        scheduler = JobScheduler(batch_size=100, flush_interval=0.01)
+        await scheduler.start(client)
+        scheduler.delete_message_later(42, 7, 0)
+        await settle(lambda: client.deleted)
+        await scheduler.stop()
+        return client, scheduler
+
+    client, scheduler = asyncio.run(main())
+    assert client.deleted == [(42, [7])]
+    assert scheduler.pending == 0
+
+
+def test_failed_save_is_retried_on_the_next_flush(repo, monkeypatch):
+    save = repo.save_scheduled_jobs
+    failures = [ConnectionError("database went away")]
+
+    async def flaky_save(jobs):
+        if failures:
+            raise failures.pop()
+        await save(jobs)
+    monkeypatch.setattr(repo, "save_scheduled_jobs", flaky_save)
+
+    async def main():
+        scheduler = JobScheduler(batch_size=100, flush_interval=0.01)
+        scheduler.revoke_invite_later(-100, "https://t.me/+a", 3600)
+        scheduler.delete_message_later(42, 1, 3600)
+        await scheduler._flush()
+        assert await repo.scheduled_jobs() == []
+        # Rescheduled while the failed batch waited: the newer run time wins
+        scheduler.revoke_invite_later(-100, "https://t.me/+a", 60)
+        await scheduler._flush()
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    rows = {key: run_at for key, _, _, _, run_at in asyncio.run(repo.scheduled_jobs())}
+    assert len(rows) == 2
+    assert rows["revoke_invite:-100:https://t.me/+a"] == scheduler._jobs["revoke_invite:-100:https://t.me/+a"].run_at
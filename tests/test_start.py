@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pyrogram")
+
+from pyrogram.enums import ChatMemberStatus
+
+from conftest import FakeClient
+from plugins import start
+
+
+class MembershipClient(FakeClient):
+    """Answers membership checks per channel"""
+
+    def __init__(self, slow=(), failing=(), members=()):
+        super().__init__()
+        self.slow = set(slow)        # get_chat_member never answers in time
+        self.failing = set(failing)  # get_chat_member and get_chat raise
+        self.members = set(members)
+
+    async def get_chat_member(self, chat_id, user_id):
+        if chat_id in self.slow:
+            await asyncio.sleep(10)
+        if chat_id in self.failing:
+            raise ConnectionError("telegram unavailable")
+        status = ChatMemberStatus.MEMBER if chat_id in self.members else ChatMemberStatus.LEFT
+        return SimpleNamespace(status=status)
+
+    async def get_chat(self, chat_id):
+        if chat_id in self.failing:
+            raise ConnectionError("telegram unavailable")
+        return SimpleNamespace(id=chat_id, title=f"Channel {chat_id}", username=None)
+
+
+@pytest.fixture
+def fsub_channels(repo, monkeypatch):
+    monkeypatch.setattr(start, "FSUB_CHECK_TIMEOUT", 0.05)
+
+    def configure(*channel_ids):
+        for channel_id in channel_ids:
+            asyncio.run(repo.add_fsub(channel_id))
+    return configure
+
+
+def not_joined_ids(client, user_id):
+    return [entry['id'] for entry in asyncio.run(start.get_fsub_channels_not_joined(client, user_id))]
+
+
+def test_fsub_lists_channels_the_user_has_not_joined(fsub_channels):
+    fsub_channels(-1101, -1102)
+    assert not_joined_ids(MembershipClient(members={-1101}), 101) == [-1102]
+
+
+def test_fsub_timeout_on_a_cold_cache_keeps_the_user_out(fsub_channels):
+    fsub_channels(-1201, -1202)
+    client = MembershipClient(slow={-1202}, members={-1201})
+    entries = asyncio.run(start.get_fsub_channels_not_joined(client, 201))
+    assert [entry['id'] for entry in entries] == [-1202]
+    assert entries[0]['title'] and entries[0]['username'] is None
+
+
+def test_fsub_check_error_keeps_the_user_out(fsub_channels):
+    fsub_channels(-1301)
+    assert not_joined_ids(MembershipClient(failing={-1301}), 301) == [-1301]
+
+
+class FakeQuery:
+    def __init__(self, data, user_id):
+        self.data = data
+        self.from_user = SimpleNamespace(id=user_id)
+        self.message = SimpleNamespace(deleted=False)
+        self.answers = []
+
+        async def delete():
+            self.message.deleted = True
+        self.message.delete = delete
+
+    async def answer(self, *args, **kwargs):
+        self.answers.append((args, kwargs))
+
+
+@pytest.mark.parametrize("data", ["retry", "retry:missing", "fsub_retry_none"])
+def test_retry_button_serves_a_user_who_joined(fsub_channels, data):
+    fsub_channels(-1401)
+    client = MembershipClient(members={-1401})
+    query = FakeQuery(data, 401)
+    asyncio.run(start.router.dispatch(client, query))
+
+    assert query.message.deleted
+    assert query.answers == []
+    assert client.sent and client.sent[0][0] == 401
+
+
+def test_cold_pool_link_is_created_once_and_old_link_revoked_later(repo):
+    asyncio.run(repo.save_channel(-1501, datetime.utcnow()))
+    asyncio.run(repo.save_invite_link(-1501, "https://t.me/+old", False, datetime.now() - timedelta(minutes=5)))
+    client = FakeClient()
+    pending = start.scheduler.pending
+    served = start.stats.get("links_served")
+
+    async def main():
+        return await asyncio.gather(*(start.get_invite_link_for(client, -1501, False) for _ in range(5)))
+
+    links = asyncio.run(main())
+    assert links == [("https://t.me/+new1", False)] * 5
+    assert client.created == [-1501]
+    # Revoking the old link is left to the scheduler
+    assert client.revoked == []
+    assert start.scheduler.pending > pending
+    assert start.stats.get("links_served") == served + 5
+
+
+class FailingInviteClient(FakeClient):
+    async def create_chat_invite_link(self, chat_id, expire_date=None, creates_join_request=False):
+        raise ConnectionError("telegram unavailable")
+
+
+def test_failed_link_creation_is_not_counted_as_served(repo):
+    asyncio.run(repo.save_channel(-1601, datetime.utcnow()))
+    served = start.stats.get("links_served")
+    with pytest.raises(ConnectionError):
+        asyncio.run(start.get_invite_link_for(FailingInviteClient(), -1601, False))
+    assert start.stats.get("links_served") == served